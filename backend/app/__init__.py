@@ -0,0 +1,5 @@
+import os
+from dotenv import load_dotenv
+
+# Load backend/.env once, before any module reads its settings from the environment
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
@@ -1,7 +1,27 @@
 # app/main.py
-from fastapi import FastAPI
+import os
+import time
+import uuid
+import asyncio
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import chat, auth, admin, guest
+from app.routes import chat, auth, admin, guest, metrics
+from app.services.scheduler import start_scheduler, stop_scheduler
+from app.services.session_janitor import register_session_janitor
+from app.services.archive_services import register_archive_job
+from app.services.snapshot_services import register_snapshot_job
+from app.services.analytics_services import shutdown_analytics_worker
+from app.services.metrics import METRICS_ENABLED, observe_http_request
+from app.services.compression import CompressionMiddleware
+from app.services.tracing import REQUEST_ID_HEADER, start_trace, finish_trace
+from app.services.http_transport import close_http_client
+from app.services.pg_fast_path import close_pg_pool
+from app.services.db_services import get_supabase
+from app.services.ai_services import get_model, shutdown_llm_executor, TIER_FULL, TIER_LIGHT
+
+# Build the database and Gemini clients in the background at startup instead of on
+# the first request; /health answers while they are being built
+WARM_UP_CLIENTS = os.getenv("WARM_UP_CLIENTS", "true").lower() in ("1", "true", "yes")
 
 app = FastAPI(title="Hotel Service API", version="1.0.0")
 
@@ -17,11 +37,63 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for large bodies, negotiated per request from Accept-Encoding
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(chat.router)
 app.include_router(auth.router)
 app.include_router(admin.router)
 app.include_router(guest.router)
+if METRICS_ENABLED:
+    app.include_router(metrics.router)
+
+# Per-route latency histograms (labelled by route template, not raw path, to bound
+# cardinality) and a request trace whose ID is echoed back in X-Request-ID
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    started = time.perf_counter()
+    request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+    trace_token = start_trace(f"{request.method} {request.url.path}", request_id)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+    finally:
+        route = request.scope.get("route")
+        observe_http_request(getattr(route, "path", "unmatched"), request.method, status,
+                             time.perf_counter() - started)
+        finish_trace(trace_token, status)
+
+# Background maintenance jobs (only the scheduler leader worker runs them)
+@app.on_event("startup")
+async def start_background_jobs():
+    register_session_janitor()
+    register_archive_job()
+    register_snapshot_job()
+    start_scheduler()
+
+def warm_up_clients():
+    for build_client, args in ((get_supabase, ()), (get_model, (TIER_FULL,)), (get_model, (TIER_LIGHT,))):
+        try:
+            build_client(*args)
+        except Exception as e:
+            print(f"Client warm-up failed ({build_client.__name__}{args}): {e}")
+
+@app.on_event("startup")
+async def start_client_warm_up():
+    if WARM_UP_CLIENTS:
+        asyncio.get_running_loop().run_in_executor(None, warm_up_clients)
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    await stop_scheduler()
+    shutdown_analytics_worker()
+    close_http_client()
+    close_pg_pool()
+    shutdown_llm_executor()
 
 # Health check endpoint
 @app.get("/")
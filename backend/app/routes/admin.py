@@ -1,11 +1,17 @@
 # app/routes/admin.py
-from fastapi import APIRouter, HTTPException, Header, Depends
+from fastapi import APIRouter, HTTPException, Header, Depends, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
+import asyncio
+import csv
+import io
+import json
 from app.services.db_services import (
     verify_session_token,
     get_all_service_requests,
     get_staff_members,
+    get_dashboard_counts,
     assign_request_to_staff,
     update_request_status,
     get_staff_assignments,
@@ -19,8 +25,23 @@ from app.services.db_services import (
     update_staff_member,
     get_customer_request_history,
     delete_cancelled_request,
-    get_persistent_customer_history
+    get_persistent_customer_history,
+    iter_persistent_customer_history
 )
+from app.services.change_versions import (
+    SCOPE_REQUESTS,
+    SCOPE_STAFF,
+    current_etag,
+    etag_headers,
+    not_modified_response
+)
+from app.services.responses import FastJSONResponse
+from app.services.scheduler import get_job_stats
+from app.services.archive_services import merge_with_archive, needs_archive
+from app.services.analytics_services import run_operations_analytics
+from app.services.snapshot_services import rebuild_projections
+from app.services.session_janitor import get_janitor_stats
+from app.services.http_transport import get_pool_stats
 
 router = APIRouter()
 
@@ -101,6 +122,47 @@ class ServiceRequestResponse(BaseModel):
     assigned_by: str = None
     assigned_at: str = None
     notes: str = None
+    updated_at: str = None
+    session_token: str = None
+    staff_members: dict = None
+    admin_users: dict = None
+
+class ServiceRequestListResponse(BaseModel):
+    requests: List[ServiceRequestResponse]
+
+class RequestHistoryEventResponse(BaseModel):
+    id: str
+    request_id: str
+    action: str
+    details: str = None
+    user_type: str = None
+    user_id: str = None
+    timestamp: str
+    payload: dict = None
+    seq: int = None
+
+class RequestHistoryResponse(BaseModel):
+    history: List[RequestHistoryEventResponse]
+
+class CustomerHistoryEntryResponse(BaseModel):
+    request_id: str
+    customer_name: str = None
+    room_number: str
+    checkout_time: str = None
+    request_date: str
+    request_type: str
+    description: str
+    status: str
+    priority: str
+    deleted_at: str = None
+    notes: str = None
+
+class CustomerHistoryResponse(BaseModel):
+    customer_history: List[CustomerHistoryEntryResponse]
+
+# The list endpoints below declare their response models for the OpenAPI schema but
+# return FastJSONResponse directly, so rows are serialized once instead of being
+# validated and re-encoded field by field
 
 class StaffMemberResponse(BaseModel):
     id: str
@@ -147,23 +209,39 @@ async def admin_login(request: AdminLoginRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
 
-@router.get("/admin/requests")
+@router.get("/admin/requests", response_model=ServiceRequestListResponse, response_class=FastJSONResponse)
 async def get_service_requests(
     status: Optional[str] = None,
-    session_info: dict = Depends(verify_admin_session)
+    session_info: dict = Depends(verify_admin_session),
+    if_none_match: str = Header(None)
 ):
     """Get all service requests with optional status filter"""
     try:
+        etag = current_etag(SCOPE_REQUESTS, SCOPE_STAFF, variant=status or "")
+        not_modified = not_modified_response("admin_requests", if_none_match, etag)
+        if not_modified:
+            return not_modified
+        
         requests = get_all_service_requests(status_filter=status)
-        return {"requests": requests}
+        return FastJSONResponse({"requests": requests}, headers=etag_headers(etag))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch requests: {str(e)}")
 
 @router.get("/admin/staff")
-async def get_staff(session_info: dict = Depends(verify_admin_session)):
+async def get_staff(
+    response: Response,
+    session_info: dict = Depends(verify_admin_session),
+    if_none_match: str = Header(None)
+):
     """Get all staff members"""
     try:
+        etag = current_etag(SCOPE_STAFF)
+        not_modified = not_modified_response("admin_staff", if_none_match, etag)
+        if not_modified:
+            return not_modified
+        
         staff = get_staff_members()
+        response.headers.update(etag_headers(etag))
         return {"staff": staff}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch staff: {str(e)}")
@@ -226,24 +304,21 @@ async def get_assignments(
         raise HTTPException(status_code=500, detail=f"Failed to fetch assignments: {str(e)}")
 
 @router.get("/admin/dashboard")
-async def get_dashboard_stats(session_info: dict = Depends(verify_admin_session)):
+async def get_dashboard_stats(
+    response: Response,
+    session_info: dict = Depends(verify_admin_session),
+    if_none_match: str = Header(None)
+):
     """Get dashboard statistics"""
     try:
-        all_requests = get_all_service_requests()
-        staff = get_staff_members()
+        etag = current_etag(SCOPE_REQUESTS, SCOPE_STAFF)
+        not_modified = not_modified_response("admin_dashboard", if_none_match, etag)
+        if not_modified:
+            return not_modified
         
-        # Calculate statistics
-        stats = {
-            "total_requests": len(all_requests),
-            "pending_requests": len([r for r in all_requests if r["status"] == "pending"]),
-            "in_progress_requests": len([r for r in all_requests if r["status"] in ["assigned", "in_progress"]]),
-            "completed_requests": len([r for r in all_requests if r["status"] == "completed"]),
-            "total_staff": len(staff),
-            "available_staff": len([s for s in staff if s.get("is_available", True)]),
-            "urgent_requests": len([r for r in all_requests if r["priority"] == "urgent"]),
-            "emergency_requests": len([r for r in all_requests if r["priority"] == "emergency"])
-        }
+        stats = get_dashboard_counts()
         
+        response.headers.update(etag_headers(etag))
         return {"stats": stats}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch dashboard stats: {str(e)}")
@@ -353,37 +428,132 @@ async def update_priority(
 
 # Request History Endpoints
 
-@router.get("/admin/requests/{request_id}/history")
+@router.get("/admin/requests/{request_id}/history", response_model=RequestHistoryResponse,
+            response_class=FastJSONResponse)
 async def get_request_history_endpoint(
     request_id: str,
+    include_archived: bool = False,
     session_info: dict = Depends(verify_admin_session)
 ):
     """Get the history of actions for a specific request"""
     try:
         history = get_request_history(request_id)
-        return {"history": history}
+        if include_archived:
+            history = merge_with_archive(
+                "request_history", history, filters={"request_id": request_id}, desc=False
+            )
+        return FastJSONResponse({"history": history})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch request history: {str(e)}")
 
-@router.get("/admin/history")
+@router.get("/admin/history", response_model=RequestHistoryResponse, response_class=FastJSONResponse)
 async def get_all_history(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    include_archived: bool = False,
     session_info: dict = Depends(verify_admin_session)
 ):
-    """Get the history of all requests"""
+    """Get the history of all requests; archived rows are included for ranges past retention"""
     try:
-        history = get_all_request_history()
-        return {"history": history}
+        history = get_all_request_history(since=since, until=until)
+        if include_archived or needs_archive(since):
+            history = merge_with_archive("request_history", history, since=since, until=until)
+        return FastJSONResponse({"history": history})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch request history: {str(e)}")
 
 # Customer Request History Endpoint
-@router.get("/admin/customer-history")
+@router.get("/admin/customer-history", response_model=CustomerHistoryResponse, response_class=FastJSONResponse)
 async def get_customer_history(
     session_info: dict = Depends(verify_admin_session)
 ):
     """Get persistent customer request history with guest details"""
     try:
         customer_history = get_persistent_customer_history()
-        return {"customer_history": customer_history}
+        return FastJSONResponse({"customer_history": customer_history})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch customer request history: {str(e)}")
+
+CUSTOMER_HISTORY_EXPORT_FIELDS = [
+    "request_id", "customer_name", "room_number", "request_date", "request_type",
+    "description", "status", "priority", "checkout_time", "deleted_at", "notes"
+]
+
+def _customer_history_csv_rows(history):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CUSTOMER_HISTORY_EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for row in history:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    yield buffer.getvalue()
+
+def _customer_history_ndjson_rows(history):
+    for row in history:
+        yield json.dumps(row, default=str) + "\n"
+
+@router.get("/admin/customer-history/export")
+async def export_customer_history(
+    format: str = "csv",
+    session_info: dict = Depends(verify_admin_session)
+):
+    """Stream the full persistent customer history as CSV or NDJSON"""
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+
+    try:
+        history = iter_persistent_customer_history()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export customer request history: {str(e)}")
+
+    if format == "csv":
+        rows, media_type = _customer_history_csv_rows(history), "text/csv"
+    else:
+        rows, media_type = _customer_history_ndjson_rows(history), "application/x-ndjson"
+
+    return StreamingResponse(
+        rows,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=customer_history.{format}"}
+    )
+
+# Operations Analytics Endpoint
+@router.get("/admin/analytics")
+async def get_operations_analytics(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    include_archived: bool = False,
+    session_info: dict = Depends(verify_admin_session)
+):
+    """Get response-time percentiles by department, request type, hour and staff member"""
+    try:
+        analytics = await run_operations_analytics(since=since, until=until, include_archived=include_archived)
+        return {"analytics": analytics}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compute analytics: {str(e)}")
+
+# Maintenance Endpoints
+@router.get("/admin/maintenance/jobs")
+async def get_maintenance_jobs(
+    session_info: dict = Depends(verify_admin_session)
+):
+    """Get background job statistics, including expired-session cleanup counts"""
+    return {
+        "scheduler": get_job_stats(),
+        "session_cleanup": get_janitor_stats(),
+        "supabase_http_pool": get_pool_stats()
+    }
+
+@router.post("/admin/maintenance/rebuild-projections")
+async def rebuild_request_projections(
+    session_info: dict = Depends(verify_admin_session)
+):
+    """Rebuild service_requests and customer history from the request event log"""
+    try:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, rebuild_projections)
+        return {"message": "Projections rebuilt successfully", "result": result}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch customer request history: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to rebuild projections: {str(e)}")
@@ -1,8 +1,9 @@
 # app/routes/chat.py
 from fastapi import APIRouter, HTTPException, Header
 from pydantic import BaseModel
-from app.services.ai_services import get_ai_response
+from app.services.ai_services import get_ai_response_async
 from app.services.db_services import verify_session_token
+from app.services.rate_limiter import check_session_rate_limit, check_room_rate_limit
 
 router = APIRouter()
 
@@ -12,18 +13,39 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     reply: str
 
+def raise_rate_limited(retry_after: int):
+    raise HTTPException(
+        status_code=429,
+        detail="Too many messages, please wait a moment before sending another",
+        headers={"Retry-After": str(retry_after)}
+    )
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest, authorization: str = Header(None)):
+async def chat_endpoint(request: ChatRequest, authorization: str = Header(None),
+                        idempotency_key: str = Header(None, max_length=128)):
     # Verify session token
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
     
     session_token = authorization.replace("Bearer ", "")
+    
+    # Rate limits run before any LLM work; the session bucket also before the DB lookup
+    retry_after = check_session_rate_limit(session_token)
+    if retry_after:
+        raise_rate_limited(retry_after)
+    
     guest_info = verify_session_token(session_token)
     
     if not guest_info or not guest_info.get("valid"):
         raise HTTPException(status_code=401, detail="Invalid or expired session")
     
+    retry_after = check_room_rate_limit(guest_info["room_number"]) if guest_info.get("room_number") else None
+    if retry_after:
+        raise_rate_limited(retry_after)
+    
     # Use the verified guest info for the AI response with session token
-    reply = get_ai_response(request.text, guest_info["room_number"], session_token)
+    # A client retrying a message sends the same Idempotency-Key so it cannot file the request twice.
+    # The model call blocks (up to the LLM deadline), so it runs on a worker thread: other chats,
+    # polls and /health keep being served, and concurrent chats reach the load-shedding thresholds
+    reply = await get_ai_response_async(request.text, guest_info["room_number"], session_token, idempotency_key)
     return ChatResponse(reply=reply)
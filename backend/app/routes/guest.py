@@ -1,7 +1,10 @@
 # app/routes/guest.py
-from fastapi import APIRouter, HTTPException, Header, Depends
-from typing import List
-from app.services.db_services import verify_session_token, get_requests_by_room
+import json
+import base64
+from fastapi import APIRouter, HTTPException, Header, Depends, Response, Query
+from typing import List, Optional
+from app.services.db_services import verify_session_token, get_requests_by_room, get_chat_history_page
+from app.services.change_versions import SCOPE_STAFF, current_etag, etag_headers, not_modified_response, room_scope
 
 router = APIRouter()
 
@@ -22,13 +25,23 @@ def verify_guest_session(authorization: str = Header(None)):
     return session_info
 
 @router.get("/guest/my-requests")
-async def get_my_requests(session_info: dict = Depends(verify_guest_session)):
+async def get_my_requests(
+    response: Response,
+    session_info: dict = Depends(verify_guest_session),
+    if_none_match: str = Header(None)
+):
     """Get all service requests for the logged-in guest's room"""
     try:
         room_number = session_info.get("room_number")
         if not room_number:
             raise HTTPException(status_code=400, detail="Room number not found in session")
         
+        # Taken before the query: a concurrent write makes the next poll refetch
+        etag = current_etag(room_scope(room_number), SCOPE_STAFF)
+        not_modified = not_modified_response("guest_my_requests", if_none_match, etag)
+        if not_modified:
+            return not_modified
+        
         requests = get_requests_by_room(room_number)
         
         # Format the response to include status information
@@ -55,18 +68,28 @@ async def get_my_requests(session_info: dict = Depends(verify_guest_session)):
             
             formatted_requests.append(formatted_req)
         
+        response.headers.update(etag_headers(etag))
         return {"requests": formatted_requests}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch requests: {str(e)}")
 
 @router.get("/guest/requests/status")
-async def get_request_status_summary(session_info: dict = Depends(verify_guest_session)):
+async def get_request_status_summary(
+    response: Response,
+    session_info: dict = Depends(verify_guest_session),
+    if_none_match: str = Header(None)
+):
     """Get a summary of request statuses for the guest"""
     try:
         room_number = session_info.get("room_number")
         if not room_number:
             raise HTTPException(status_code=400, detail="Room number not found in session")
         
+        etag = current_etag(room_scope(room_number))
+        not_modified = not_modified_response("guest_request_status", if_none_match, etag)
+        if not_modified:
+            return not_modified
+        
         requests = get_requests_by_room(room_number)
         
         # Calculate status summary
@@ -89,6 +112,48 @@ async def get_request_status_summary(session_info: dict = Depends(verify_guest_s
                 "created_at": latest["created_at"]
             }
         
+        response.headers.update(etag_headers(etag))
         return {"status_summary": status_summary}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch status summary: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to fetch status summary: {str(e)}")
+
+def encode_chat_cursor(message: dict) -> str:
+    """Opaque cursor for the position of a message: (created_at, id)"""
+    raw = json.dumps([message["created_at"], message["id"]], default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_chat_cursor(cursor: str) -> tuple:
+    try:
+        created_at, message_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(created_at), str(message_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/guest/chat-history")
+async def get_guest_chat_history(
+    limit: int = Query(30, ge=1, le=100),
+    before: Optional[str] = None,
+    session_info: dict = Depends(verify_guest_session)
+):
+    """Chat messages of the guest's room, newest page first; pass next_cursor as `before` for older ones"""
+    room_number = session_info.get("room_number")
+    if not room_number:
+        raise HTTPException(status_code=400, detail="Room number not found in session")
+    position = decode_chat_cursor(before) if before else None
+    
+    try:
+        messages, has_more = get_chat_history_page(room_number, limit, position)
+        return {
+            "messages": [
+                {
+                    "id": message["id"],
+                    "sender_type": message["sender_type"],
+                    "message_text": message["message_text"],
+                    "created_at": message["created_at"]
+                }
+                for message in messages
+            ],
+            "next_cursor": encode_chat_cursor(messages[0]) if has_more and messages else None
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch chat history: {str(e)}")
@@ -1,20 +1,105 @@
 import os
 import re
-import google.generativeai as genai
-from dotenv import load_dotenv
+import time
+import uuid
+import functools
+import threading
+import contextvars
+import anyio
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from app.services.db_services import log_message, create_service_request, get_requests_by_room, get_active_requests_by_room, cancel_service_request
+from app.services.metrics import observe_llm_call, counter, gauge, histogram
+from app.services.tracing import span
+from app.services.faq_services import answer_faq
 from typing import Dict, Optional, Tuple, List
 
-load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    # Allow startup but reply with a clear error message when called
-    model = None
-else:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash')
-
-# Hotel info for quick replies
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+# Smaller, faster model for simple messages; empty to send them to the full model
+GEMINI_LIGHT_MODEL_NAME = os.getenv("GEMINI_LIGHT_MODEL_NAME", "gemini-1.5-flash-8b")
+GEMINI_LIGHT_MAX_OUTPUT_TOKENS = int(os.getenv("GEMINI_LIGHT_MAX_OUTPUT_TOKENS", "256"))
+
+# Model routing: each LLM-bound message goes to a tier picked from its features
+# (length, number of questions, multi-part or planning wording) and from the number
+# of LLM calls in flight in this worker. Small talk gets a templated reply; under
+# load, full-tier messages shed to the light model and then everything to templates
+# (service requests are still filed by the keyword fallback).
+MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_COMPLEX_MESSAGE_WORDS = int(os.getenv("LLM_COMPLEX_MESSAGE_WORDS", "30"))
+LLM_SHED_TO_LIGHT_IN_FLIGHT = int(os.getenv("LLM_SHED_TO_LIGHT_IN_FLIGHT", "8"))
+LLM_SHED_TO_TEMPLATE_IN_FLIGHT = int(os.getenv("LLM_SHED_TO_TEMPLATE_IN_FLIGHT", "24"))
+
+# Hedged requests: when a call has not answered within the model's recent
+# LLM_HEDGE_PERCENTILE latency (LLM_HEDGE_DELAY_MS until enough calls are seen), a
+# second identical call is issued and the first answer wins. Past LLM_DEADLINE_SECONDS
+# the guest gets a local reply instead (service requests are still filed by the
+# keyword fallback). No hedging once the worker is shedding load.
+LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_DELAY_MS = float(os.getenv("LLM_HEDGE_DELAY_MS", "3000"))
+LLM_HEDGE_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "500"))
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "12"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+# Worker threads for chat replies, which block on the model for up to LLM_DEADLINE_SECONDS
+CHAT_MAX_THREADS = int(os.getenv("CHAT_MAX_THREADS", "40"))
+LLM_LATENCY_WINDOW = 200
+LLM_LATENCY_MIN_SAMPLES = 20
+
+TIER_TEMPLATE = "template"
+TIER_LIGHT = "light"
+TIER_FULL = "full"
+
+# Built by get_model() on first use: importing the Gemini SDK takes most of a
+# worker's boot time. Stay None without GEMINI_API_KEY, so startup still works
+# and chat replies with a clear error message.
+model = None
+light_model = None
+_models_initialized = set()
+_model_lock = threading.Lock()
+
+def get_model(tier: str = TIER_FULL):
+    """The Gemini model for a tier (created on first use)"""
+    global model, light_model
+    if tier == TIER_LIGHT and not GEMINI_LIGHT_MODEL_NAME:
+        tier = TIER_FULL
+    current = light_model if tier == TIER_LIGHT else model
+    if current is not None or tier in _models_initialized:
+        return current
+    with _model_lock:
+        if tier not in _models_initialized:
+            if GEMINI_API_KEY:
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
+                if tier == TIER_LIGHT:
+                    light_model = genai.GenerativeModel(
+                        GEMINI_LIGHT_MODEL_NAME,
+                        generation_config={"max_output_tokens": GEMINI_LIGHT_MAX_OUTPUT_TOKENS}
+                    )
+                else:
+                    model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+            _models_initialized.add(tier)
+    return light_model if tier == TIER_LIGHT else model
+
+def model_name_for_tier(tier: str) -> str:
+    return GEMINI_LIGHT_MODEL_NAME if tier == TIER_LIGHT and GEMINI_LIGHT_MODEL_NAME else GEMINI_MODEL_NAME
+
+_llm_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+chat_routes = counter("chat_model_routes_total", "LLM-bound chat messages by tier and routing reason", ("tier", "reason"))
+chat_tier_duration = histogram("chat_model_tier_duration_seconds", "Reply generation latency by tier", ("tier",))
+gauge("llm_in_flight", "LLM calls in flight in this worker", (), lambda: {(): _llm_in_flight})
+llm_hedges = counter("llm_hedged_calls_total", "Replies that needed a hedge call, by model and winning call",
+                     ("model", "winner"))
+llm_fallback_replies = counter("llm_fallback_replies_total", "Local replies sent after the LLM deadline, by model",
+                               ("model",))
+
+# Attempts run on this pool so the caller can stop waiting for a slow one
+_llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+_llm_latencies: Dict[str, deque] = {}
+
+# Hotel info filled into FAQ answers ({wifi}, {checkout})
 hotel_info = {
     "wifi": os.getenv("WIFI_PASSWORD", "HotelGuest123"),
     "checkout": os.getenv("CHECKOUT_TIME", "12:00 PM")
@@ -171,7 +256,166 @@ def detect_service_request_from_text(user_text: str) -> Optional[Tuple[str, str,
     # If we have action words but no specific category, default to concierge
     return ("concierge", user_text.strip(), "normal")
 
-def process_ai_response(ai_reply: str, user_text: str, room_number: str, session_token: str = None) -> str:
+# Short small-talk messages answered without the LLM
+small_talk_replies = [
+    (re.compile(r"^(thanks|thank you|thx|ty|cheers|much appreciated)\b"),
+     "You're welcome! Let me know if there's anything else I can do for you."),
+    (re.compile(r"^(hi|hello|hey|good (morning|afternoon|evening))\b"),
+     "Hello! How can I help you today?"),
+    (re.compile(r"^(bye|goodbye|good night|see you)\b"),
+     "Have a wonderful stay! I'm here whenever you need anything."),
+    (re.compile(r"^(ok|okay|great|perfect|got it|awesome|cool|sounds good)\b"),
+     "Great! Just let me know if you need anything else.")
+]
+SMALL_TALK_MAX_EXTRA_WORDS = 2
+
+BUSY_REPLY = ("Thank you for your message! Our assistant is very busy right now, so I can't give a "
+              "detailed answer this moment. Please try again shortly, or call the front desk for anything urgent.")
+
+# Wording that calls for the full model: planning, comparisons, cancellations, multi-part asks
+complex_message_pattern = re.compile(
+    r"\b(recommend|recommendation|suggest|plan|itinerary|compare|options|explain|why|cancel|"
+    r"and also|as well as|after that|then)\b"
+)
+
+def small_talk_reply(text_lower: str) -> Optional[str]:
+    """The templated reply when the message is only a small-talk phrase (plus a word or two)"""
+    if "?" in text_lower:
+        return None
+    normalized = " ".join(re.sub(r"[^\w\s']", " ", text_lower).split())
+    for pattern, reply in small_talk_replies:
+        match = pattern.match(normalized)
+        if match and len(normalized[match.end():].split()) <= SMALL_TALK_MAX_EXTRA_WORDS:
+            return reply
+    return None
+
+def route_message(user_text: str) -> Tuple[str, str]:
+    """Pick the tier for an LLM-bound message; returns (tier, reason)"""
+    if not MODEL_ROUTING_ENABLED:
+        return TIER_FULL, "routing_disabled"
+
+    text_lower = user_text.lower().strip()
+    if small_talk_reply(text_lower) and not detect_service_request_from_text(user_text):
+        return TIER_TEMPLATE, "small_talk"
+
+    in_flight = _llm_in_flight
+    if in_flight >= LLM_SHED_TO_TEMPLATE_IN_FLIGHT:
+        return TIER_TEMPLATE, "shed"
+
+    complex_message = (
+        len(text_lower.split()) > LLM_COMPLEX_MESSAGE_WORDS
+        or text_lower.count("?") >= 2
+        or complex_message_pattern.search(text_lower) is not None
+    )
+    if not complex_message:
+        return TIER_LIGHT, "simple"
+    if in_flight >= LLM_SHED_TO_LIGHT_IN_FLIGHT:
+        return TIER_LIGHT, "shed"
+    return TIER_FULL, "complex"
+
+DEADLINE_REPLY = ("I'm sorry, I'm taking longer than usual to answer right now. "
+                  "Please try again in a moment, or call the front desk for anything urgent.")
+
+def hedge_delay_seconds(model_name: str) -> float:
+    """The model's recent LLM_HEDGE_PERCENTILE latency, bounded below by LLM_HEDGE_MIN_DELAY_MS"""
+    latencies = sorted(_llm_latencies.get(model_name, ()))
+    if len(latencies) < LLM_LATENCY_MIN_SAMPLES:
+        return LLM_HEDGE_DELAY_MS / 1000
+    index = min(len(latencies) - 1, int(len(latencies) * LLM_HEDGE_PERCENTILE / 100))
+    return max(LLM_HEDGE_MIN_DELAY_MS / 1000, latencies[index])
+
+def _generate_once(tier_model, model_name: str, tier: str, prompt: str, attempt: str) -> str:
+    """One generate_content call; runs on the LLM pool"""
+    global _llm_in_flight
+    with _in_flight_lock:
+        _llm_in_flight += 1
+    started = time.perf_counter()
+    try:
+        with span("llm.generate", model=model_name, tier=tier, attempt=attempt, prompt_chars=len(prompt)):
+            response = tier_model.generate_content(prompt)
+        ai_reply = (response.text or "").strip()
+        elapsed = time.perf_counter() - started
+        observe_llm_call(model_name, elapsed, "ok" if ai_reply else "empty", getattr(response, "usage_metadata", None))
+        _llm_latencies.setdefault(model_name, deque(maxlen=LLM_LATENCY_WINDOW)).append(elapsed)
+        return ai_reply
+    except Exception:
+        observe_llm_call(model_name, time.perf_counter() - started, "error")
+        raise
+    finally:
+        with _in_flight_lock:
+            _llm_in_flight -= 1
+
+def _submit_attempt(tier_model, model_name: str, tier: str, prompt: str, attempt: str):
+    # Each attempt runs in a copy of the caller's context so its span joins the request trace
+    context = contextvars.copy_context()
+    return _llm_executor.submit(context.run, _generate_once, tier_model, model_name, tier, prompt, attempt)
+
+def generate_hedged(tier_model, model_name: str, tier: str, prompt: str) -> Optional[str]:
+    """The first answer from the primary call or its hedge; None past the deadline"""
+    # Blocks until then: runs on a chat worker thread (get_ai_response_async), never on the event loop
+    started = time.perf_counter()
+    deadline = started + LLM_DEADLINE_SECONDS
+    hedge_at = started + hedge_delay_seconds(model_name)
+    pending = {_submit_attempt(tier_model, model_name, tier, prompt, "primary"): "primary"}
+    hedged = False
+    error = None
+
+    while time.perf_counter() < deadline:
+        wait_until = deadline if hedged else min(hedge_at, deadline)
+        done, _ = wait(list(pending), timeout=max(0, wait_until - time.perf_counter()), return_when=FIRST_COMPLETED)
+        for future in done:
+            attempt = pending.pop(future)
+            if future.exception() is None:
+                if hedged:
+                    llm_hedges.inc(model_name, attempt)
+                return future.result()
+            error = future.exception()
+
+        # Hedge once the delay has passed, or straight away if the primary call failed
+        if not hedged and (not pending or time.perf_counter() >= hedge_at):
+            if LLM_HEDGING_ENABLED and _llm_in_flight < LLM_SHED_TO_LIGHT_IN_FLIGHT:
+                pending[_submit_attempt(tier_model, model_name, tier, prompt, "hedge")] = "hedge"
+            hedged = True
+        if not pending:
+            raise error
+
+    if hedged:
+        llm_hedges.inc(model_name, "none")
+    llm_fallback_replies.inc(model_name)
+    return None
+
+def shutdown_llm_executor():
+    """Stop waiting on abandoned (timed-out) LLM calls at shutdown"""
+    _llm_executor.shutdown(wait=False, cancel_futures=True)
+
+def generate_reply(tier: str, user_text: str, room_number: str) -> str:
+    """Ask the tier's model for a reply (hedged, with a deadline)"""
+    tier_model = get_model(tier)
+    if tier_model is None:
+        return (
+            "AI is not configured (missing GEMINI_API_KEY). "
+            "Please set the backend .env and restart the server."
+        )
+
+    model_name = model_name_for_tier(tier)
+    try:
+        # Combine system prompt with user message for Gemini
+        full_prompt = f"{system_prompt}\n\nGuest from Room {room_number}: {user_text}\nAssistant:"
+        ai_reply = generate_hedged(tier_model, model_name, tier, full_prompt)
+        if ai_reply is None:
+            return DEADLINE_REPLY
+        if not ai_reply:
+            ai_reply = "I'm sorry, I couldn't generate a response just now. Please try again."
+        return ai_reply
+    except Exception as e:
+        return f"AI error: {e}"
+
+def request_idempotency_key(session_token: str, room_number: str, turn_key: str) -> str:
+    """One key per guest turn, so a retried message cannot file its request twice"""
+    return f"{session_token or room_number}:{turn_key}"
+
+def process_ai_response(ai_reply: str, user_text: str, room_number: str, session_token: str = None,
+                        idempotency_key: str = None) -> str:
     """Process AI response to handle service requests and cancellations."""
     
     # Check for service request format in AI response
@@ -200,9 +444,12 @@ def process_ai_response(ai_reply: str, user_text: str, room_number: str, session
                         request_type=category,
                         description=description,
                         priority=priority,
-                        session_token=session_token
+                        session_token=session_token,
+                        idempotency_key=idempotency_key
                     )
                     
+                    if result and result.get("deduplicated"):
+                        return f"You already have an open {category} request, so I've added this to it. Our team is on it!"
                     if result:
                         # Return natural response + remaining AI text
                         combined_response = remaining_text.strip() if remaining_text.strip() else natural_response
@@ -256,41 +503,33 @@ def process_ai_response(ai_reply: str, user_text: str, room_number: str, session
     # Return original AI response if no special processing needed
     return ai_reply
 
-def get_ai_response(user_text: str, room_number: str = "Unknown", session_token: str = None) -> str:
+def get_ai_response(user_text: str, room_number: str = "Unknown", session_token: str = None,
+                    turn_key: str = None) -> str:
     text_lower = user_text.lower()
+    # The client's Idempotency-Key when it sent one, so its retries reuse the key
+    idempotency_key = request_idempotency_key(session_token, room_number, turn_key or uuid.uuid4().hex)
 
-    # Rule-based quick answers for basic hotel info
-    if "wifi" in text_lower and "password" in text_lower:
-        reply = f"Here is your Wi-Fi password: {hotel_info['wifi']}"
-        log_message(room_number, user_text, "guest")
-        log_message(room_number, reply, "bot")
-        return reply
-
-    if "check-out" in text_lower or "checkout" in text_lower:
-        reply = f"Check-out time is {hotel_info['checkout']}"
-        log_message(room_number, user_text, "guest")
-        log_message(room_number, reply, "bot")
-        return reply
+    # Quick answers from the FAQ knowledge base (hours, amenities, policies, Wi-Fi),
+    # unless the message is a service request or needs the model
+    if not detect_service_request_from_text(user_text) and not complex_message_pattern.search(text_lower):
+        reply = answer_faq(user_text, hotel_info)
+        if reply:
+            log_message(room_number, user_text, "guest")
+            log_message(room_number, reply, "bot")
+            return reply
 
-    # Use AI with system prompt for all other requests
-    if model is None:
-        ai_reply = (
-            "AI is not configured (missing GEMINI_API_KEY). "
-            "Please set the backend .env and restart the server."
-        )
+    # Use AI with system prompt for all other requests, on the tier the router picks
+    tier, reason = route_message(user_text)
+    started = time.perf_counter()
+    if tier == TIER_TEMPLATE:
+        ai_reply = small_talk_reply(text_lower.strip()) if reason == "small_talk" else BUSY_REPLY
     else:
-        try:
-            # Combine system prompt with user message for Gemini
-            full_prompt = f"{system_prompt}\n\nGuest from Room {room_number}: {user_text}\nAssistant:"
-            response = model.generate_content(full_prompt)
-            ai_reply = (response.text or "").strip()
-            if not ai_reply:
-                ai_reply = "I'm sorry, I couldn't generate a response just now. Please try again."
-        except Exception as e:
-            ai_reply = f"AI error: {e}"
+        ai_reply = generate_reply(tier, user_text, room_number)
+    chat_routes.inc(tier, reason)
+    chat_tier_duration.observe(time.perf_counter() - started, tier)
 
     # Process AI response for service requests and cancellations
-    processed_reply = process_ai_response(ai_reply, user_text, room_number, session_token)
+    processed_reply = process_ai_response(ai_reply, user_text, room_number, session_token, idempotency_key)
     
     # FALLBACK: If AI didn't create a service request but user text suggests one, create it manually
     if "SERVICE_REQUEST|" not in ai_reply and "CANCEL_REQUEST|" not in ai_reply:
@@ -303,10 +542,13 @@ def get_ai_response(user_text: str, room_number: str = "Unknown", session_token:
                     request_type=category,
                     description=description,
                     priority=priority,
-                    session_token=session_token
+                    session_token=session_token,
+                    idempotency_key=idempotency_key
                 )
                 
-                if result:
+                if result and result.get("deduplicated"):
+                    processed_reply = f"{processed_reply}\n\nYou already have an open {category} request, so I've added this to it."
+                elif result:
                     # Enhance the AI reply to acknowledge the service request
                     processed_reply = f"{processed_reply}\n\nI've also submitted your {category} request to our team. They'll assist you shortly!"
             except Exception as e:
@@ -322,3 +564,17 @@ def get_ai_response(user_text: str, room_number: str = "Unknown", session_token:
         pass
     
     return processed_reply
+
+# Created on first use: an anyio limiter belongs to the running event loop
+_chat_limiter = None
+
+async def get_ai_response_async(user_text: str, room_number: str = "Unknown", session_token: str = None,
+                                turn_key: str = None) -> str:
+    """get_ai_response on a worker thread of its own, so hedging and the deadline wait off the event loop.
+    Chats get their own CHAT_MAX_THREADS limit: slow model calls cannot use up the shared
+    threadpool that sync dependencies (session checks on the admin polls) run on."""
+    global _chat_limiter
+    if _chat_limiter is None:
+        _chat_limiter = anyio.CapacityLimiter(CHAT_MAX_THREADS)
+    call = functools.partial(get_ai_response, user_text, room_number, session_token, turn_key)
+    return await anyio.to_thread.run_sync(call, limiter=_chat_limiter)
@@ -0,0 +1,227 @@
+import asyncio
+import multiprocessing
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from app.services.db_services import DB_BACKEND, iter_table_columns
+from app.services.archive_services import read_archived_rows
+from app.services.metrics import gauge
+
+# Response-time analytics over request_history.
+# Rows are loaded column-wise into NumPy arrays and every statistic is computed with
+# vectorized ops; the whole computation runs in a worker process so it never blocks
+# the API event loop.
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Lifecycle stages in order; index 0 (created) comes from service_requests.
+# A request is acknowledged by the first staff response: a status change to
+# acknowledged or in_progress, or being assigned, whichever comes first
+STAGES = ["created", "acknowledged", "assigned", "completed"]
+ACKNOWLEDGING_STATUSES = {"acknowledged": "acknowledged", "in_progress": "acknowledged"}
+
+# Intervals reported, as (name, from stage, to stage)
+INTERVALS = [
+    ("created_to_acknowledged", "created", "acknowledged"),
+    ("acknowledged_to_assigned", "acknowledged", "assigned"),
+    ("assigned_to_completed", "assigned", "completed"),
+    ("created_to_completed", "created", "completed")
+]
+
+DIMENSIONS = ["department", "request_type", "hour", "staff"]
+
+_status_change_pattern = re.compile(r"to (\w+)\s*$")
+_offset_pattern = re.compile(r"([+-])(\d{2}):?(\d{2})$")
+
+_executor: Optional[Executor] = None
+analytics_stats = {"pending_jobs": 0, "completed_jobs": 0}
+
+gauge("analytics_jobs_pending", "Analytics computations queued or running in the worker pool", (),
+      lambda: {(): analytics_stats["pending_jobs"]})
+
+def _to_epoch_seconds(values: List[Optional[str]]) -> np.ndarray:
+    """Parse ISO timestamps (with or without UTC offset) into float epoch seconds"""
+    stamps = np.array([v[:19] if v else "NaT" for v in values], dtype="datetime64[s]")
+    seconds = stamps.astype("int64").astype(np.float64)
+    seconds[np.isnat(stamps)] = np.nan
+
+    offsets = np.zeros(len(values))
+    for i, value in enumerate(values):
+        match = _offset_pattern.search(value[19:]) if value else None
+        if match:
+            sign = -1 if match.group(1) == "-" else 1
+            offsets[i] = sign * (int(match.group(2)) * 3600 + int(match.group(3)) * 60)
+    return seconds - offsets
+
+def _history_stage(action: str, details: str) -> int:
+    """Map a history row to the lifecycle stage it records (-1 for none)"""
+    if action == "assigned":
+        return STAGES.index("assigned")
+    if action == "status_changed" and details:
+        match = _status_change_pattern.search(details)
+        status = ACKNOWLEDGING_STATUSES.get(match.group(1), match.group(1)) if match else None
+        if status in STAGES:
+            return STAGES.index(status)
+    return -1
+
+def _local_hours(values: List[Optional[str]]) -> np.ndarray:
+    """Hour of day on the hotel's clock: naive timestamps are stored in local time and
+    keep their hour, ones with a UTC offset are converted to local time (-1 when missing)"""
+    hours = np.full(len(values), -1, dtype=np.int64)
+    for i, value in enumerate(values):
+        if not value:
+            continue
+        if _offset_pattern.search(value[19:]) or value.endswith("Z"):
+            hours[i] = datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone().hour
+        else:
+            hours[i] = int(value[11:13])
+    return hours
+
+def load_columns(since: str = None, until: str = None, include_archived: bool = False) -> Dict[str, np.ndarray]:
+    """Load the columns analytics needs from service_requests, staff and request_history"""
+    staff = {
+        row["id"]: row for row in iter_table_columns(
+            "staff_members", "id, staff_id, full_name, department", "created_at"
+        )
+    }
+
+    request_ids, request_types, created, departments, staff_names = [], [], [], [], []
+    for row in iter_table_columns(
+        "service_requests", "id, request_type, created_at, assigned_staff_id", "created_at",
+        since=since, until=until
+    ):
+        member = staff.get(row.get("assigned_staff_id"))
+        request_ids.append(row["id"])
+        request_types.append(row["request_type"])
+        created.append(row["created_at"])
+        departments.append(member["department"] if member else "unassigned")
+        staff_names.append(member["full_name"] if member else "unassigned")
+
+    history = iter_table_columns(
+        "request_history", "id, request_id, action, details, timestamp", "timestamp", since=since, until=until
+    )
+    if include_archived:
+        history = list(history) + list(read_archived_rows("request_history", since=since, until=until))
+
+    event_ids, event_stages, event_times = [], [], []
+    for row in history:
+        stage = _history_stage(row.get("action"), row.get("details"))
+        if stage > 0:
+            event_ids.append(row["request_id"])
+            event_stages.append(stage)
+            event_times.append(row["timestamp"])
+
+    return {
+        "request_id": np.array(request_ids, dtype=object),
+        "request_type": np.array(request_types, dtype=object),
+        "department": np.array(departments, dtype=object),
+        "staff": np.array(staff_names, dtype=object),
+        "created": _to_epoch_seconds(created),
+        "hour": _local_hours(created),
+        "event_request_id": np.array(event_ids, dtype=object),
+        "event_stage": np.array(event_stages, dtype=np.int64),
+        "event_time": _to_epoch_seconds(event_times)
+    }
+
+def stage_times(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Return a (requests x stages) matrix with the first time each stage was reached"""
+    n_requests = len(columns["request_id"])
+    times = np.full((n_requests, len(STAGES)), np.inf)
+    times[:, 0] = columns["created"]
+
+    if n_requests and len(columns["event_request_id"]):
+        # Map event request ids onto request rows; events for unknown requests are dropped
+        order = np.argsort(columns["request_id"])
+        sorted_ids = columns["request_id"][order]
+        positions = np.searchsorted(sorted_ids, columns["event_request_id"])
+        positions = np.clip(positions, 0, n_requests - 1)
+        known = sorted_ids[positions] == columns["event_request_id"]
+
+        rows = order[positions[known]]
+        np.minimum.at(times, (rows, columns["event_stage"][known]), columns["event_time"][known])
+
+    acknowledged, assigned = STAGES.index("acknowledged"), STAGES.index("assigned")
+    times[:, acknowledged] = np.minimum(times[:, acknowledged], times[:, assigned])
+    times[np.isinf(times)] = np.nan
+    return times
+
+def grouped_percentiles(values: np.ndarray, groups: np.ndarray) -> Dict[str, dict]:
+    """Percentiles of `values` per group label, computed without a per-row loop"""
+    valid = ~np.isnan(values)
+    values, groups = values[valid], groups[valid]
+    if not len(values):
+        return {}
+
+    labels, codes = np.unique(groups.astype(str), return_inverse=True)
+    order = np.lexsort((values, codes))
+    sorted_values, sorted_codes = values[order], codes[order]
+
+    counts = np.bincount(sorted_codes, minlength=len(labels))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sums = np.bincount(sorted_codes, weights=sorted_values, minlength=len(labels))
+
+    result = {label: {"count": int(counts[i]), "mean": round(float(sums[i] / counts[i]), 1)}
+              for i, label in enumerate(labels)}
+    for q in PERCENTILES:
+        # Linear interpolation inside each group's sorted slice
+        position = starts + (counts - 1) * (q / 100.0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, starts + counts - 1)
+        fraction = position - lower
+        percentile = sorted_values[lower] * (1 - fraction) + sorted_values[upper] * fraction
+        for i, label in enumerate(labels):
+            result[label][f"p{q}"] = round(float(percentile[i]), 1)
+    return result
+
+def compute_operations_analytics(since: str = None, until: str = None, include_archived: bool = False) -> dict:
+    """Response-time percentiles (seconds) per lifecycle interval and dimension"""
+    columns = load_columns(since=since, until=until, include_archived=include_archived)
+    times = stage_times(columns)
+
+    intervals = {}
+    everything = np.full(len(times), "all", dtype=object)
+    for name, start_stage, end_stage in INTERVALS:
+        durations = times[:, STAGES.index(end_stage)] - times[:, STAGES.index(start_stage)]
+        intervals[name] = {"overall": grouped_percentiles(durations, everything).get("all")}
+        for dimension in DIMENSIONS:
+            intervals[name][f"by_{dimension}"] = grouped_percentiles(durations, columns[dimension])
+
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "since": since,
+        "until": until,
+        "requests": int(len(times)),
+        "units": "seconds",
+        "intervals": intervals
+    }
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None and DB_BACKEND == "memory":
+        # An in-memory database is only visible inside this process
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analytics")
+    elif _executor is None:
+        # spawn: the child builds its own DB client instead of inheriting open sockets
+        _executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+async def run_operations_analytics(since: str = None, until: str = None, include_archived: bool = False) -> dict:
+    """Compute analytics in the worker process without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    analytics_stats["pending_jobs"] += 1
+    try:
+        return await loop.run_in_executor(
+            _get_executor(), compute_operations_analytics, since, until, include_archived
+        )
+    finally:
+        analytics_stats["pending_jobs"] -= 1
+        analytics_stats["completed_jobs"] += 1
+
+def shutdown_analytics_worker():
+    """Stop the worker process (call from a shutdown hook)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
@@ -0,0 +1,136 @@
+import os
+import gzip
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+from app.services.db_services import get_rows_older_than, delete_rows_by_id
+from app.services.scheduler import register_job
+from app.services.snapshot_services import take_snapshots
+
+# Rows older than the retention window are moved from the hot tables into
+# day-partitioned, gzip-compressed NDJSON files: <ARCHIVE_DIR>/<table>/<YYYY-MM-DD>.ndjson.gz
+# In a multi-node deployment ARCHIVE_DIR should live on storage shared by all nodes.
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(backend_dir, "archive"))
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "90"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "86400"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+ARCHIVE_MAX_BATCHES = int(os.getenv("ARCHIVE_MAX_BATCHES", "50"))
+
+# Keep `in.(...)` delete filters well under PostgREST URL limits
+DELETE_CHUNK_SIZE = 200
+
+# Archivable tables and the column their partitions are keyed on
+ARCHIVED_TABLES = {
+    "chat_messages": "created_at",
+    "request_history": "timestamp"
+}
+
+def get_retention_cutoff() -> datetime:
+    """Rows created before this moment belong in the archive"""
+    return datetime.utcnow() - timedelta(days=ARCHIVE_RETENTION_DAYS)
+
+def _partition_path(table: str, day: str) -> str:
+    return os.path.join(ARCHIVE_DIR, table, f"{day}.ndjson.gz")
+
+def _write_partitions(table: str, time_column: str, rows: List[dict]):
+    """Append rows to their day partitions; each append is a new gzip member"""
+    by_day: Dict[str, List[dict]] = {}
+    for row in rows:
+        by_day.setdefault(str(row[time_column])[:10], []).append(row)
+
+    os.makedirs(os.path.join(ARCHIVE_DIR, table), exist_ok=True)
+    for day, day_rows in by_day.items():
+        payload = "".join(json.dumps(row, default=str) + "\n" for row in day_rows)
+        with open(_partition_path(table, day), "ab") as f:
+            f.write(gzip.compress(payload.encode("utf-8")))
+            f.flush()
+            os.fsync(f.fileno())
+
+def archive_table(table: str, older_than: Optional[datetime] = None) -> dict:
+    """Move rows older than the cutoff from a hot table into archive partitions"""
+    time_column = ARCHIVED_TABLES[table]
+    cutoff = (older_than or get_retention_cutoff()).isoformat()
+    archived = 0
+    failed = False
+
+    for _ in range(ARCHIVE_MAX_BATCHES):
+        rows = get_rows_older_than(table, time_column, cutoff, limit=ARCHIVE_BATCH_SIZE)
+        if not rows:
+            break
+
+        # Files first, then delete: a crash in between only leaves duplicates,
+        # which the readers drop by id
+        _write_partitions(table, time_column, rows)
+        ids = [row["id"] for row in rows]
+        for start in range(0, len(ids), DELETE_CHUNK_SIZE):
+            deleted = delete_rows_by_id(table, ids[start:start + DELETE_CHUNK_SIZE])
+            if not deleted:
+                # The rows are still in the hot table: stop instead of archiving them again
+                # every batch; the next run retries them and readers drop the duplicates
+                print(f"Archiving {table} stopped: a delete removed no rows")
+                failed = True
+                break
+            archived += deleted
+
+        if failed or len(rows) < ARCHIVE_BATCH_SIZE:
+            break
+
+    return {"table": table, "archived": archived, "cutoff": cutoff, "failed": failed}
+
+def run_archival() -> dict:
+    """Archive every archivable table (scheduler job)"""
+    # request_history is the request event log: fold it into snapshots before
+    # old events leave the hot table, so projections stay rebuildable
+    take_snapshots()
+    return {table: archive_table(table)["archived"] for table in ARCHIVED_TABLES}
+
+def read_archived_rows(table: str, since: str = None, until: str = None,
+                       filters: Dict[str, str] = None) -> Iterator[dict]:
+    """Stream archived rows in a time range, skipping partitions outside it"""
+    time_column = ARCHIVED_TABLES[table]
+    table_dir = os.path.join(ARCHIVE_DIR, table)
+    if not os.path.isdir(table_dir):
+        return
+
+    seen_ids = set()
+    for name in sorted(os.listdir(table_dir)):
+        day = name[:10]
+        if since and day < since[:10]:
+            continue
+        if until and day > until[:10]:
+            continue
+
+        with gzip.open(os.path.join(table_dir, name), "rt", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                if row["id"] in seen_ids:
+                    continue
+                timestamp = str(row[time_column])
+                if since and timestamp < since:
+                    continue
+                if until and timestamp > until:
+                    continue
+                if filters and any(str(row.get(k)) != str(v) for k, v in filters.items()):
+                    continue
+                seen_ids.add(row["id"])
+                yield row
+
+def needs_archive(since: str = None) -> bool:
+    """Whether a query starting at `since` reaches into the archived range"""
+    return bool(since) and since < get_retention_cutoff().isoformat()
+
+def merge_with_archive(table: str, hot_rows: list, since: str = None, until: str = None,
+                       filters: Dict[str, str] = None, desc: bool = True) -> list:
+    """Combine hot-table rows with archived rows for the same range"""
+    time_column = ARCHIVED_TABLES[table]
+    hot_ids = {row["id"] for row in hot_rows}
+    archived = [
+        row for row in read_archived_rows(table, since=since, until=until, filters=filters)
+        if row["id"] not in hot_ids
+    ]
+    return sorted(hot_rows + archived, key=lambda row: str(row[time_column]), reverse=desc)
+
+def register_archive_job():
+    """Schedule archival with the configured interval"""
+    return register_job("archive", ARCHIVE_INTERVAL_SECONDS, run_archival)
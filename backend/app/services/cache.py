@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.services.metrics import record_cache_lookup, gauge
+
+try:
+    import redis
+except ImportError:  # optional: without it the shared tier is per worker process
+    redis = None
+
+# Two-level cache for hot lookups (sessions, staff).
+# Level 1 is a small LRU in each worker; level 2 is a store shared by every worker
+# and node (Redis when REDIS_URL is set, otherwise an in-process stand-in with the
+# same interface, for tests and single-worker runs). A write invalidates the key in
+# the shared store and publishes it on CACHE_INVALIDATION_CHANNEL so every worker
+# drops its local copy; the short local TTL bounds staleness if a message is lost.
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_LOCAL_MAX_ENTRIES = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "10000"))
+CACHE_LOCAL_TTL_SECONDS = float(os.getenv("CACHE_LOCAL_TTL_SECONDS", "30"))
+CACHE_INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache-invalidate")
+REDIS_URL = os.getenv("REDIS_URL")
+
+class LocalLRU:
+    """Thread-safe LRU with a per-entry expiry"""
+
+    def __init__(self, max_entries: int):
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= now:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class LocalSharedStore:
+    """In-process stand-in for the shared tier: same interface as RedisSharedStore"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[float, str]] = {}
+        self._counters: Dict[str, int] = {}
+        self._subscribers: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._values.pop(key, None)
+                return None
+            return entry[1]
+
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._values[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._values.pop(key, None)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            return self._counters[key]
+
+    def get_counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def publish(self, message: str):
+        for callback in list(self._subscribers):
+            callback(message)
+
+    def subscribe(self, callback: Callable[[str], None]):
+        self._subscribers.append(callback)
+
+class RedisSharedStore:
+    """Shared tier in Redis; invalidations fan out over pub/sub"""
+
+    def __init__(self, url: str):
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._url = url
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._client.get(key)
+        return value.decode() if value is not None else None
+
+    def set(self, key: str, value: str, ttl: float):
+        self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str):
+        self._client.delete(key)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        return int(self._client.incr(key, amount))
+
+    def get_counter(self, key: str) -> int:
+        value = self._client.get(key)
+        return int(value) if value is not None else 0
+
+    def publish(self, message: str):
+        self._client.publish(CACHE_INVALIDATION_CHANNEL, message)
+
+    def subscribe(self, callback: Callable[[str], None]):
+        def listen():
+            # Own connection without a read timeout: the subscriber blocks between messages
+            while True:
+                try:
+                    pubsub = redis.Redis.from_url(self._url).pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                    for message in pubsub.listen():
+                        callback(message["data"].decode())
+                except Exception as e:
+                    print(f"Cache invalidation subscriber error, reconnecting: {e}")
+                    time.sleep(1)
+        threading.Thread(target=listen, name="cache-invalidation", daemon=True).start()
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+_caches: Dict[str, "TwoLevelCache"] = {}
+
+def _on_invalidation(message: str):
+    # "key <namespace> <key>" or "clear <namespace> <generation>"
+    kind, namespace, value = message.split(" ", 2)
+    cache = _caches.get(namespace)
+    if cache is None:
+        return
+    if kind == "key":
+        cache._local.delete(f"{cache.generation}:{value}")
+    elif kind == "clear":
+        cache._set_generation(int(value))
+
+def get_shared_store():
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            if REDIS_URL and redis is not None:
+                _shared_store = RedisSharedStore(REDIS_URL)
+            else:
+                if REDIS_URL:
+                    print("Warning: REDIS_URL is set but the redis package is missing; caches are per worker")
+                _shared_store = LocalSharedStore()
+            _shared_store.subscribe(_on_invalidation)
+        return _shared_store
+
+class TwoLevelCache:
+    """A namespace of JSON-serializable values cached in the local LRU and the shared store"""
+
+    def __init__(self, namespace: str, ttl: float, local_ttl: float = CACHE_LOCAL_TTL_SECONDS,
+                 max_local_entries: int = CACHE_LOCAL_MAX_ENTRIES):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local_ttl = min(local_ttl, ttl)
+        self._local = LocalLRU(max_local_entries)
+        # clear() bumps the generation: keys of older generations are never read again
+        self.generation = None
+        _caches[namespace] = self
+
+    def _set_generation(self, generation: int):
+        if generation != self.generation:
+            self.generation = generation
+            self._local.clear()
+
+    def _shared_key(self, key: str) -> str:
+        if self.generation is None:
+            self.generation = get_shared_store().get_counter(f"cache:{self.namespace}:generation")
+        return f"cache:{self.namespace}:{self.generation}:{key}"
+
+    def lookup(self, key: str) -> Any:
+        """The cached value for key, or None on a miss in both tiers"""
+        if not CACHE_ENABLED:
+            return None
+        try:
+            shared_key = self._shared_key(key)
+            local_key = f"{self.generation}:{key}"
+            hit, value = self._local.get(local_key)
+            record_cache_lookup(f"{self.namespace}_local", hit)
+            if hit:
+                return value
+
+            cached = get_shared_store().get(shared_key)
+            record_cache_lookup(f"{self.namespace}_shared", cached is not None)
+            if cached is None:
+                return None
+            value = json.loads(cached)
+            self._local.set(local_key, value, self.local_ttl)
+            return value
+        except Exception as e:
+            # A broken shared store degrades to uncached lookups
+            print(f"Cache error ({self.namespace}): {e}")
+            return None
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """The cached value for key, else loader()'s. A None result is not cached."""
+        value = self.lookup(key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if not CACHE_ENABLED or ttl <= 0:
+            return
+        try:
+            shared_key = self._shared_key(key)
+            get_shared_store().set(shared_key, json.dumps(value, default=str), ttl)
+            self._local.set(f"{self.generation}:{key}", value, min(ttl, self.local_ttl))
+        except Exception as e:
+            print(f"Cache error ({self.namespace}): {e}")
+
+    def invalidate(self, key: str):
+        """Drop key from the shared store and from every worker's local LRU"""
+        if not CACHE_ENABLED:
+            return
+        try:
+            store = get_shared_store()
+            store.delete(self._shared_key(key))
+            self._local.delete(f"{self.generation}:{key}")
+            store.publish(f"key {self.namespace} {key}")
+        except Exception as e:
+            print(f"Cache invalidation error ({self.namespace}): {e}")
+
+    def clear(self):
+        """Invalidate every key in the namespace, in every worker"""
+        if not CACHE_ENABLED:
+            return
+        try:
+            store = get_shared_store()
+            generation = store.incr(f"cache:{self.namespace}:generation")
+            self._set_generation(generation)
+            store.publish(f"clear {self.namespace} {generation}")
+        except Exception as e:
+            print(f"Cache invalidation error ({self.namespace}): {e}")
+
+gauge("cache_local_entries", "Entries in this worker's local cache tier", ("cache",),
+      lambda: {(namespace,): len(cache._local) for namespace, cache in _caches.items()})
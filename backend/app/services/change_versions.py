@@ -0,0 +1,102 @@
+import os
+import time
+import uuid
+import hashlib
+from typing import Optional
+from fastapi import Response
+from app.services.cache import RedisSharedStore, get_shared_store
+from app.services.metrics import counter
+
+# Change counters for conditional GETs on polled endpoints.
+# db_services bumps a counter per scope ("service_requests", "staff_members",
+# "room:<number>") in the shared cache store on every write, and a polled endpoint
+# derives its ETag from the counters of the scopes its body depends on. Reading
+# them is a dict or Redis lookup, so an unchanged poll is answered with 304 before
+# the database is queried or the body is built. Writes made outside db_services
+# (SQL console, other services) are not counted. "chat:<number>" versions a room's
+# chat log for the recent-message buffer (chat_buffer.py).
+CONDITIONAL_GET_ENABLED = os.getenv("CONDITIONAL_GET_ENABLED", "true").lower() in ("1", "true", "yes")
+# Without Redis each worker only counts its own writes: ETags then also roll over
+# every window, so another worker's write is seen within that time
+CHANGE_VERSION_LOCAL_WINDOW_SECONDS = float(os.getenv("CHANGE_VERSION_LOCAL_WINDOW_SECONDS", "30"))
+
+SCOPE_REQUESTS = "service_requests"
+SCOPE_STAFF = "staff_members"
+# Bumped when every projection may have changed (rebuild from the event log)
+SCOPE_ALL = "all"
+
+# Per-process counters restart at zero: never match an ETag issued before a restart
+_local_epoch = uuid.uuid4().hex[:8]
+
+conditional_requests = counter(
+    "conditional_requests_total", "Polled GETs by route and result (not_modified, modified)", ("route", "result")
+)
+
+def room_scope(room_number: str) -> str:
+    return f"room:{room_number}"
+
+def chat_scope(room_number: str) -> str:
+    return f"chat:{room_number}"
+
+def versions_shared() -> bool:
+    """Whether every worker sees the same counters (Redis), rather than only its own writes"""
+    return isinstance(get_shared_store(), RedisSharedStore)
+
+def bump_version(scope: str) -> Optional[int]:
+    """Record a change to scope and return its new version (None when the store fails)"""
+    try:
+        return get_shared_store().incr(f"changes:{scope}")
+    except Exception as e:
+        print(f"Error bumping change version {scope}: {e}")
+        return None
+
+def get_version(scope: str) -> Optional[int]:
+    try:
+        return get_shared_store().get_counter(f"changes:{scope}")
+    except Exception as e:
+        print(f"Error reading change version {scope}: {e}")
+        return None
+
+def bump_versions(*scopes: str):
+    """Record a change to each scope; never fails the write that caused it"""
+    for scope in scopes:
+        bump_version(scope)
+
+def current_etag(*scopes: str, variant: str = "") -> Optional[str]:
+    """Weak ETag over the change counters of scopes, or None when they cannot be read"""
+    if not CONDITIONAL_GET_ENABLED:
+        return None
+    try:
+        store = get_shared_store()
+        parts = [f"{scope}={store.get_counter(f'changes:{scope}')}" for scope in (SCOPE_ALL,) + scopes]
+    except Exception as e:
+        print(f"Error reading change versions {scopes}: {e}")
+        return None
+    if not isinstance(store, RedisSharedStore):
+        parts.append(f"{_local_epoch}:{int(time.time() // CHANGE_VERSION_LOCAL_WINDOW_SECONDS)}")
+    parts.append(variant)
+    return 'W/"' + hashlib.sha1("|".join(parts).encode()).hexdigest()[:20] + '"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (candidate[2:] if candidate.startswith("W/") else candidate) == opaque
+        for candidate in (part.strip() for part in if_none_match.split(","))
+    )
+
+def not_modified_response(route: str, if_none_match: Optional[str], etag: Optional[str]) -> Optional[Response]:
+    """A 304 response when the client already has the current version, else None"""
+    if etag is None:
+        return None
+    if if_none_match and _etag_matches(if_none_match, etag):
+        conditional_requests.inc(route, "not_modified")
+        return Response(status_code=304, headers=etag_headers(etag))
+    conditional_requests.inc(route, "modified")
+    return None
+
+def etag_headers(etag: Optional[str]) -> dict:
+    # private: bodies are per guest or admin; no-cache: revalidate on every poll
+    return {"ETag": etag, "Cache-Control": "private, no-cache"} if etag else {}
@@ -0,0 +1,103 @@
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from app.services.change_versions import CHANGE_VERSION_LOCAL_WINDOW_SECONDS, versions_shared
+from app.services.metrics import gauge
+
+# Recent chat messages per room, kept in each worker.
+# A room's buffer holds its newest CHAT_BUFFER_MESSAGES_PER_ROOM messages, oldest
+# first, loaded with one query on first use and then fed by log_message. Each buffer
+# remembers the room's chat version (change_versions.chat_scope) it is current for:
+# a write by another worker bumps the shared counter, so the next read reloads
+# instead of serving a stale log. Rooms are evicted least recently used first.
+CHAT_BUFFER_ENABLED = os.getenv("CHAT_BUFFER_ENABLED", "true").lower() in ("1", "true", "yes")
+CHAT_BUFFER_MESSAGES_PER_ROOM = int(os.getenv("CHAT_BUFFER_MESSAGES_PER_ROOM", "100"))
+CHAT_BUFFER_MAX_ROOMS = int(os.getenv("CHAT_BUFFER_MAX_ROOMS", "2000"))
+
+def message_position(message: dict) -> Tuple[datetime, str]:
+    """Sort key of a chat message: (created_at, id), the order history pages use"""
+    created_at = message["created_at"]
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at, str(message["id"])
+
+class _RoomBuffer:
+    __slots__ = ("messages", "version", "complete", "loaded_at")
+
+    def __init__(self, messages: list, version: int, complete: bool):
+        self.messages = deque(messages, maxlen=CHAT_BUFFER_MESSAGES_PER_ROOM)
+        self.version = version
+        # True when the buffer holds the room's whole log, not just its newest part
+        self.complete = complete
+        self.loaded_at = time.monotonic()
+
+class ChatBuffer:
+    """Bounded per-room ring buffers of recent chat messages"""
+
+    def __init__(self, max_rooms: int = CHAT_BUFFER_MAX_ROOMS):
+        self._rooms: "OrderedDict[str, _RoomBuffer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_rooms = max_rooms
+
+    def lookup(self, room_number: str, version: Optional[int]) -> Optional[Tuple[List[dict], bool]]:
+        """(messages oldest first, complete) if the room's buffer is current for version"""
+        if not CHAT_BUFFER_ENABLED or version is None:
+            return None
+        with self._lock:
+            room = self._rooms.get(room_number)
+            if room is None:
+                return None
+            # Without Redis other workers' writes are invisible: reload after a window
+            if room.version != version or (
+                    not versions_shared() and time.monotonic() - room.loaded_at > CHANGE_VERSION_LOCAL_WINDOW_SECONDS):
+                del self._rooms[room_number]
+                return None
+            self._rooms.move_to_end(room_number)
+            # A full buffer has dropped its oldest messages: no longer the whole log
+            complete = room.complete and len(room.messages) < CHAT_BUFFER_MESSAGES_PER_ROOM
+            return list(room.messages), complete
+
+    def load(self, room_number: str, messages: list, version: Optional[int], complete: bool):
+        """Replace the room's buffer with messages (oldest first) current for version"""
+        if not CHAT_BUFFER_ENABLED or version is None:
+            return
+        with self._lock:
+            self._rooms[room_number] = _RoomBuffer(messages[-CHAT_BUFFER_MESSAGES_PER_ROOM:], version, complete)
+            self._rooms.move_to_end(room_number)
+            while len(self._rooms) > self._max_rooms:
+                self._rooms.popitem(last=False)
+
+    def append(self, room_number: str, message: dict, version: Optional[int]):
+        """Add a just-logged message; the buffer is dropped if it missed a write in between"""
+        with self._lock:
+            room = self._rooms.get(room_number)
+            if room is None:
+                return
+            if version is None or room.version != version - 1:
+                del self._rooms[room_number]
+                return
+            if room.messages:
+                position, last = message_position(message), message_position(room.messages[-1])
+                if position < last:
+                    # Logged concurrently with a later message: keep the buffer in order
+                    del self._rooms[room_number]
+                    return
+                if position == last:
+                    # Already loaded by a read between the insert and the version bump
+                    room.version = version
+                    return
+            room.messages.append(message)
+            room.version = version
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+chat_buffer = ChatBuffer()
+
+gauge("chat_buffer_rooms", "Rooms with recent chat messages buffered in this worker", (),
+      lambda: {(): len(chat_buffer)})
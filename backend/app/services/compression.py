@@ -0,0 +1,154 @@
+import os
+import zlib
+from typing import Optional
+from app.services.metrics import counter
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+# Response compression negotiated from Accept-Encoding (brotli preferred, then gzip).
+# Bodies under COMPRESSION_MIN_BYTES are sent as they are. Streamed bodies (the
+# customer history exports) are compressed chunk by chunk as they are produced;
+# Server-Sent Events and responses that already carry a Content-Encoding are not
+# touched, and neither are 204/304 responses.
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+# 4 compresses JSON better than gzip -6 at a similar CPU cost; 11 is for static assets
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Content types that are already compressed or must reach the client unbuffered
+UNCOMPRESSED_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/gzip",
+                              "application/zip", "application/octet-stream")
+
+compressed_bytes = counter(
+    "http_compression_bytes_total", "Response body bytes before and after compression", ("encoding", "stage")
+)
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """The best encoding the client accepts: "br", "gzip" or None"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.strip()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits 31: gzip container
+            self._zlib = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._brotli.process(data) if self.encoding == "br" else self._zlib.compress(data)
+
+    def finish(self) -> bytes:
+        return self._brotli.finish() if self.encoding == "br" else self._zlib.flush()
+
+class CompressionMiddleware:
+    """ASGI middleware compressing response bodies for clients that accept it"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSender(send, encoding, self.minimum_size))
+
+class _CompressingSender:
+    """Holds http.response.start until the first body chunk shows whether to compress"""
+
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            headers = {name.lower(): value for name, value in message.get("headers", [])}
+            content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+            if (message["status"] < 200 or message["status"] in (204, 304) or b"content-encoding" in headers
+                    or content_type.startswith(UNCOMPRESSED_CONTENT_TYPES)):
+                self.passthrough = True
+                await self.send(message)
+            else:
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+
+            self.compressor = _Compressor(self.encoding)
+            headers, vary = [], [b"Accept-Encoding"]
+            for name, value in start.get("headers", []):
+                if name.lower() == b"vary":
+                    vary.insert(0, value)
+                elif name.lower() not in (b"content-length", b"content-encoding"):
+                    headers.append((name, value))
+            headers.append((b"content-encoding", self.encoding.encode()))
+            headers.append((b"vary", b", ".join(vary)))
+            if not more_body:
+                # Whole body in one message: compress it and send an exact Content-Length
+                compressed = self.compressor.compress(body) + self.compressor.finish()
+                headers.append((b"content-length", str(len(compressed)).encode()))
+                self._count(len(body), len(compressed))
+                await self.send(dict(start, headers=headers))
+                await self.send({"type": "http.response.body", "body": compressed, "more_body": False})
+                return
+            await self.send(dict(start, headers=headers))
+
+        # Streamed body: chunked transfer, compressor output as it becomes available
+        compressed = self.compressor.compress(body)
+        if not more_body:
+            compressed += self.compressor.finish()
+        self._count(len(body), len(compressed))
+        if compressed or not more_body:
+            await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _count(self, raw: int, sent: int):
+        compressed_bytes.inc(self.encoding, "raw", amount=raw)
+        compressed_bytes.inc(self.encoding, "sent", amount=sent)
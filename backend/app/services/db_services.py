@@ -1,25 +1,109 @@
 import os
-from supabase import create_client, Client
 from datetime import datetime, timedelta
 import secrets
 import hashlib
+import threading
 import uuid
-from dotenv import load_dotenv
+from app.services.request_events import (
+    EVENT_CREATED,
+    EVENT_ASSIGNED,
+    EVENT_STATUS_CHANGED,
+    EVENT_PRIORITY_CHANGED,
+    EVENT_CANCELLED,
+    EVENT_DELETED,
+    EVENT_MERGED,
+    PRIORITY_ORDER,
+    OPEN_STATUSES,
+    normalize_priority,
+    apply_event,
+    service_request_row
+)
+from app.services.storage import LOCAL_BACKENDS, create_local_client, normalize_guest_name
+from app.services.http_transport import get_http_client
+from app.services import pg_fast_path
+from app.services.cache import TwoLevelCache
+from app.services.change_versions import (
+    SCOPE_ALL,
+    SCOPE_REQUESTS,
+    SCOPE_STAFF,
+    bump_version,
+    bump_versions,
+    chat_scope,
+    get_version,
+    room_scope
+)
+from app.services.chat_buffer import CHAT_BUFFER_ENABLED, CHAT_BUFFER_MESSAGES_PER_ROOM, chat_buffer, message_position
+from app.services.metrics import instrument_module_functions, record_cache_lookup
+from app.services.tracing import trace_module_functions
 
-# Load .env from the backend directory
 backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-env_path = os.path.join(backend_dir, '.env')
-load_dotenv(env_path)
 
-# Initialize Supabase client
+# Storage backend: "supabase" (default), or "sqlite" / "memory" for local runs.
+# The local backends expose the same table()/rpc() client interface as Supabase.
+DB_BACKEND = os.getenv("DB_BACKEND", "supabase").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(backend_dir, "hotel.db"))
+LOCAL_DB_SEED_DEMO = os.getenv("LOCAL_DB_SEED_DEMO", "true").lower() == "true"
+
+# A repeat request (same room and category) within this window merges into the
+# open request instead of creating another one; 0 disables
+REQUEST_DEDUP_WINDOW_SECONDS = int(os.getenv("REQUEST_DEDUP_WINDOW_SECONDS", "900"))
+# Namespace for request ids derived from idempotency keys
+IDEMPOTENCY_NAMESPACE = uuid.UUID("5b0c3c52-52a4-4a7e-9a51-7f1d0e3c9b21")
+# Keep `in.(...)` filters well under PostgREST URL limits (as archive_services' deletes)
+IN_FILTER_CHUNK_SIZE = 200
+
+# Verified sessions and staff lookups are cached across workers (see cache.py).
+# A session entry never outlives the session's expires_at; staff writes clear the staff cache.
+SESSION_CACHE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "300"))
+STAFF_CACHE_TTL_SECONDS = float(os.getenv("STAFF_CACHE_TTL_SECONDS", "600"))
+session_cache = TwoLevelCache("sessions", SESSION_CACHE_TTL_SECONDS)
+staff_cache = TwoLevelCache("staff", STAFF_CACHE_TTL_SECONDS)
+
+# Supabase client, built on first use rather than at import so workers boot fast
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-if SUPABASE_URL and SUPABASE_KEY:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-else:
-    supabase = None
-    print("Warning: Supabase not configured. Database operations will be skipped.")
+_client = None
+_client_initialized = False
+_client_lock = threading.Lock()
+
+def database_configured() -> bool:
+    return DB_BACKEND in LOCAL_BACKENDS or bool(SUPABASE_URL and SUPABASE_KEY)
+
+def get_supabase():
+    """The process-wide database client (created on first use); None if not configured"""
+    global _client, _client_initialized
+    if _client_initialized:
+        return _client
+    with _client_lock:
+        if not _client_initialized:
+            if DB_BACKEND in LOCAL_BACKENDS:
+                _client = create_local_client(DB_BACKEND, SQLITE_PATH, seed_demo=LOCAL_DB_SEED_DEMO)
+            elif SUPABASE_URL and SUPABASE_KEY:
+                from supabase import create_client, ClientOptions
+                # All PostgREST calls share one pooled keep-alive HTTP client per worker
+                _client = create_client(
+                    SUPABASE_URL, SUPABASE_KEY, options=ClientOptions(httpx_client=get_http_client())
+                )
+            else:
+                print("Warning: Supabase not configured. Database operations will be skipped.")
+            _client_initialized = True
+    return _client
+
+class _LazySupabase:
+    """Module-level `supabase` handle: truthy when a database is configured, and
+    builds the client on first attribute access"""
+
+    def __bool__(self) -> bool:
+        return database_configured()
+
+    def __getattr__(self, name):
+        client = get_supabase()
+        if client is None:
+            raise Exception("Database connection required")
+        return getattr(client, name)
+
+supabase = _LazySupabase()
 
 # Database operations now require Supabase connection
 
@@ -29,26 +113,15 @@ def create_guest_session(room_number: str, guest_name: str) -> str:
         raise Exception("Database connection required - Supabase not configured")
     
     try:
-        # Validate that the guest exists in the guest_sessions table
-        validation_result = supabase.table("guest_sessions").select("*").eq(
+        # One indexed lookup on (room_number, guest_name_normalized) in the occupancy roster
+        roster_result = supabase.table("guest_roster").select("guest_name").eq(
             "room_number", room_number
-        ).ilike(
-            "guest_name", guest_name
-        ).is_("checkout_time", "null").execute()  # Only active guests (not checked out)
-        
-        if not validation_result.data:
-            # Try case-insensitive match
-            all_room_sessions = supabase.table("guest_sessions").select("*").eq(
-                "room_number", room_number
-            ).execute()
-            
-            matching_guests = [
-                g for g in (all_room_sessions.data or []) 
-                if g.get('guest_name', '').lower() == guest_name.lower() and g.get('checkout_time') is None
-            ]
-            
-            if not matching_guests:
-                raise Exception(f"Invalid guest credentials: No active guest found for room {room_number} with name {guest_name}")
+        ).eq(
+            "guest_name_normalized", normalize_guest_name(guest_name)
+        ).is_("checkout_time", "null").limit(1).execute()  # Only checked-in guests
+
+        if not roster_result.data:
+            raise Exception(f"Invalid guest credentials: No active guest found for room {room_number} with name {guest_name}")
         
         # Guest validation passed - generate a new session token
         session_token = secrets.token_urlsafe(32)
@@ -56,7 +129,7 @@ def create_guest_session(room_number: str, guest_name: str) -> str:
         # Create a new session record to avoid foreign key constraint issues
         new_session_result = supabase.table("guest_sessions").insert({
             "room_number": room_number,
-            "guest_name": guest_name,
+            "guest_name": roster_result.data[0]["guest_name"],  # as registered at check-in
             "session_token": session_token,
             "expires_at": (datetime.now() + timedelta(hours=24)).isoformat(),
             "checkout_time": None
@@ -113,11 +186,62 @@ def create_admin_session(username: str, password: str) -> dict:
         print(f"Error creating admin session: {e}")
         return {"success": False, "message": "Login failed"}
 
+def _session_cache_key(session_token: str) -> str:
+    # Session tokens are credentials: never use them verbatim as cache keys
+    return hashlib.sha256(session_token.encode()).hexdigest()
+
+def _seconds_until(expires_at) -> float:
+    """Seconds from now until an expires_at timestamp (naive values are local time)"""
+    try:
+        if isinstance(expires_at, str):
+            expires_at = datetime.fromisoformat(expires_at)
+        if expires_at.tzinfo is not None:
+            expires_at = expires_at.astimezone().replace(tzinfo=None)
+        return (expires_at - datetime.now()).total_seconds()
+    except (TypeError, ValueError, AttributeError):
+        return 0
+
 def verify_session_token(session_token: str) -> dict:
     """Verify session token and return session info"""
     if not supabase:
         raise Exception("Database connection required")
     
+    cache_key = _session_cache_key(session_token)
+    cached = session_cache.lookup(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Only valid sessions are cached, and only until they expire
+    session, expires_at = _lookup_session_token(session_token)
+    if session.get("valid"):
+        session_cache.set(cache_key, session, ttl=_seconds_until(expires_at))
+    return session
+
+def _lookup_session_token(session_token: str) -> tuple:
+    """Session info and the session's expires_at, from the database"""
+    if pg_fast_path.pg_fast_path_enabled():
+        try:
+            session = pg_fast_path.fetch_session(session_token)
+            if not session:
+                return {"valid": False}, None
+            if session["user_type"] == "admin":
+                return {
+                    "valid": True,
+                    "user_type": "admin",
+                    "username": session["username"],
+                    "full_name": session["full_name"],
+                    "role": session["role"],
+                    "admin_user_id": session["admin_user_id"]
+                }, session["expires_at"]
+            return {
+                "valid": True,
+                "user_type": "guest",
+                "room_number": session["room_number"],
+                "guest_name": session["guest_name"]
+            }, session["expires_at"]
+        except Exception as e:
+            print(f"Postgres fast path failed, using PostgREST: {e}")
+    
     try:
         # Check if it's an admin session
         admin_result = supabase.table("admin_sessions").select(
@@ -136,7 +260,7 @@ def verify_session_token(session_token: str) -> dict:
                 "full_name": admin_user["full_name"],
                 "role": admin_user["role"],
                 "admin_user_id": admin_user["id"]
-            }
+            }, session["expires_at"]
         
         # Check if it's a guest session
         guest_result = supabase.table("guest_sessions").select("*").eq(
@@ -152,13 +276,13 @@ def verify_session_token(session_token: str) -> dict:
                 "user_type": "guest",
                 "room_number": session["room_number"],
                 "guest_name": session["guest_name"]
-            }
+            }, session["expires_at"]
         else:
-            return {"valid": False}
+            return {"valid": False}, None
             
     except Exception as e:
         print(f"Error verifying session: {e}")
-        return {"valid": False}
+        return {"valid": False}, None
 
 def log_message(room_number: str, message_text: str, sender_type: str, session_token: str = None):
     """Log a chat message to the database"""
@@ -167,89 +291,257 @@ def log_message(room_number: str, message_text: str, sender_type: str, session_t
         return
     
     try:
-        supabase.table("chat_messages").insert({
+        result = supabase.table("chat_messages").insert({
             "room_number": room_number,
             "message_text": message_text,
             "sender_type": sender_type,
             "session_token": session_token
         }).execute()
+        version = bump_version(chat_scope(room_number))
+        if result.data:
+            chat_buffer.append(room_number, result.data[0], version)
     except Exception as e:
         print(f"Error logging message: {e}")
 
+def request_id_for_idempotency_key(idempotency_key: str) -> str:
+    """Deterministic request id: replaying a key can never create a second request"""
+    return str(uuid.uuid5(IDEMPOTENCY_NAMESPACE, idempotency_key))
+
+def _get_service_request(request_id: str) -> dict:
+    result = supabase.table("service_requests").select("*").eq("id", request_id).limit(1).execute()
+    return result.data[0] if result.data else None
+
+def find_open_duplicate_request(room_number: str, request_type: str) -> dict:
+    """The newest open request for the room and category inside the dedup window"""
+    if REQUEST_DEDUP_WINDOW_SECONDS <= 0:
+        return None
+    cutoff = (datetime.utcnow() - timedelta(seconds=REQUEST_DEDUP_WINDOW_SECONDS)).isoformat() + "+00:00"
+    result = supabase.table("service_requests").select("*").eq(
+        "room_number", room_number
+    ).eq("request_type", request_type).in_("status", list(OPEN_STATUSES)).gte(
+        "created_at", cutoff
+    ).order("created_at", desc=True).limit(1).execute()
+    return result.data[0] if result.data else None
+
+def _merge_into_request(existing: dict, description: str, priority: str, session_token: str) -> dict:
+    """Record a repeat against an open request, raising its priority if the repeat is more urgent.
+
+    The repeat is still covered by the open request when the event cannot be written,
+    so a failed append keeps the request as it was instead of dropping the repeat.
+    """
+    payload = {}
+    current_rank = PRIORITY_ORDER.index(normalize_priority(existing.get("priority")))
+    if PRIORITY_ORDER.index(priority) > current_rank:
+        payload["priority"] = priority
+
+    try:
+        event = append_request_event(
+            request_id=existing["id"],
+            action=EVENT_MERGED,
+            details=f"Repeat request merged: {description}",
+            user_type="guest",
+            user_id=session_token or "guest_chat",
+            payload=payload,
+            room_number=existing["room_number"]
+        )
+    except Exception as e:
+        print(f"Error merging repeat into request {existing['id']}: {e}")
+        event = None
+    merged = dict(existing, **payload) if event else dict(existing)
+    merged["deduplicated"] = True
+    return merged
+
 def create_service_request(room_number: str, request_type: str, description: str, 
-                         priority: str = "normal", session_token: str = None):
-    """Create a new service request"""
+                         priority: str = "normal", session_token: str = None,
+                         idempotency_key: str = None):
+    """Create a new service request by appending its creation event.
+
+    A replayed idempotency key returns the request it created; a repeat of an open
+    request for the same room and category inside the dedup window is merged into
+    it. Both return the existing request with "deduplicated": True.
+    """
     if not supabase:
         print(f"Would create service request: {request_type} for room {room_number}")
         return
     
+    request_id = request_id_for_idempotency_key(idempotency_key) if idempotency_key else str(uuid.uuid4())
+    # The model's reply is free text: only priorities the schema accepts reach the event
+    priority = normalize_priority(priority)
     try:
-        # Create the main service request
-        result = supabase.table("service_requests").insert({
-            "room_number": room_number,
-            "request_type": request_type,
-            "description": description,
-            "priority": priority,
-            "session_token": session_token
-        }).execute()
+        if idempotency_key:
+            existing = _get_service_request(request_id)
+            if existing:
+                return dict(existing, deduplicated=True)
         
-        if result.data:
-            service_request = result.data[0]
-            
-            # Get customer name from session token
-            customer_name = "Unknown Guest"
-            if session_token:
-                guest_result = supabase.table("guest_sessions").select("guest_name").eq(
-                    "session_token", session_token
-                ).execute()
-                if guest_result.data:
-                    customer_name = guest_result.data[0].get('guest_name', 'Unknown Guest')
-            
-            # Create persistent history entry (optional - don't fail if this fails)
-            try:
-                create_persistent_history_entry(
-                    original_request_id=service_request['id'],
-                    customer_name=customer_name,
-                    room_number=room_number,
-                    request_type=request_type,
-                    description=description,
-                    priority=priority,
-                    status="pending",
-                    session_token=session_token
-                )
-            except Exception as e:
-                print(f"Warning: Could not create persistent history entry: {e}")
-            
-            return service_request
-        return None
+        duplicate = find_open_duplicate_request(room_number, request_type)
+        if duplicate:
+            return _merge_into_request(duplicate, description, priority, session_token)
+        
+        # Get customer name from session token for the persistent customer view
+        customer_name = "Unknown Guest"
+        if session_token:
+            guest_result = supabase.table("guest_sessions").select("guest_name").eq(
+                "session_token", session_token
+            ).execute()
+            if guest_result.data:
+                customer_name = guest_result.data[0].get('guest_name', 'Unknown Guest')
+        
+        # One event insert; the projection trigger creates the service_requests
+        # and customer_request_history rows in the same transaction
+        event = append_request_event(
+            request_id=request_id,
+            action=EVENT_CREATED,
+            details=f"Request created: {description}",
+            user_type="guest",
+            user_id=session_token or "guest_chat",
+            payload={
+                "room_number": room_number,
+                "request_type": request_type,
+                "description": description,
+                "priority": priority,
+                "status": "pending",
+                "session_token": session_token,
+                "customer_name": customer_name
+            },
+            room_number=room_number
+        )
+        return service_request_row(apply_event(None, event)) if event else None
     except Exception as e:
+        if idempotency_key:
+            # A concurrent call with the same key won the insert (duplicate primary key)
+            existing = _get_service_request(request_id)
+            if existing:
+                return dict(existing, deduplicated=True)
         print(f"Error creating service request: {e}")
         return None
 
 def get_chat_history(room_number: str, limit: int = 50) -> list:
-    """Get chat history for a room"""
+    """Get the newest `limit` chat messages of a room, oldest first"""
+    messages, _ = get_chat_history_page(room_number, limit)
+    return messages
+
+def get_chat_history_page(room_number: str, limit: int = 50, before: tuple = None) -> tuple:
+    """Up to `limit` messages of a room older than the `before` (created_at, id) position
+    (newest when None), oldest first, and whether older messages remain.
+
+    Pages inside the room's recent-message buffer are served without a query.
+    """
     if not supabase:
-        return []
+        return [], False
     
     try:
-        result = supabase.table("chat_messages").select("*").eq(
-            "room_number", room_number
-        ).order("created_at", desc=False).limit(limit).execute()
+        buffered = _buffered_chat_messages(room_number)
+        if buffered is not None:
+            messages, complete = buffered
+            if before is not None:
+                position = message_position({"created_at": before[0], "id": before[1]})
+                messages = [m for m in messages if message_position(m) < position]
+            if len(messages) >= limit or complete:
+                return messages[-limit:], len(messages) > limit or not complete
         
-        return result.data or []
+        return _query_chat_page(room_number, limit, before)
     except Exception as e:
         print(f"Error getting chat history: {e}")
-        return []
+        return [], False
+
+def _buffered_chat_messages(room_number: str):
+    """(messages, complete) from the room's buffer, loading it on a miss; None if disabled"""
+    version = get_version(chat_scope(room_number)) if CHAT_BUFFER_ENABLED else None
+    if version is None:
+        return None
+    buffered = chat_buffer.lookup(room_number, version)
+    record_cache_lookup("chat_buffer", buffered is not None)
+    if buffered is None:
+        # Newest messages plus one, to know whether the buffer holds the whole log
+        messages, has_more = _query_chat_page(room_number, CHAT_BUFFER_MESSAGES_PER_ROOM, None)
+        chat_buffer.load(room_number, messages, version, complete=not has_more)
+        buffered = chat_buffer.lookup(room_number, version)
+    return buffered
 
-def cleanup_expired_sessions():
-    """Clean up expired sessions"""
+def _query_chat_page(room_number: str, limit: int, before: tuple) -> tuple:
+    def page_query():
+        return supabase.table("chat_messages").select("*").eq("room_number", room_number)
+
+    rows = []
+    if before is not None:
+        # Messages sharing the cursor's timestamp first, then strictly older ones
+        rows = page_query().eq("created_at", before[0]).lt(
+            "id", before[1]
+        ).order("id", desc=True).limit(limit + 1).execute().data or []
+    if len(rows) <= limit:
+        query = page_query()
+        if before is not None:
+            query = query.lt("created_at", before[0])
+        rows += query.order("created_at", desc=True).order(
+            "id", desc=True
+        ).limit(limit + 1 - len(rows)).execute().data or []
+    return list(reversed(rows[:limit])), len(rows) > limit
+
+def cleanup_expired_sessions(batch_size: int = 500) -> dict:
+    """Delete one bounded batch of expired guest and admin sessions (guest ones are archived)"""
     if not supabase:
-        return
-    
+        return {"guest_sessions": 0, "admin_sessions": 0, "skipped": True}
+
     try:
-        supabase.rpc("cleanup_expired_sessions").execute()
+        # The RPC takes an advisory lock, so concurrent callers on other nodes skip
+        result = supabase.rpc("cleanup_expired_sessions_batch", {"batch_size": batch_size}).execute()
+        row = result.data[0] if result.data else {}
+        return {
+            "guest_sessions": row.get("guest_deleted", 0),
+            "admin_sessions": row.get("admin_deleted", 0),
+            "skipped": bool(row.get("skipped", False))
+        }
     except Exception as e:
         print(f"Error cleaning up sessions: {e}")
+        return {"guest_sessions": 0, "admin_sessions": 0, "skipped": True}
+
+def get_rows_older_than(table: str, time_column: str, cutoff: str, limit: int = 1000) -> list:
+    """Get the oldest rows of a table created before `cutoff`, oldest first (used by archival)"""
+    if not supabase:
+        return []
+
+    try:
+        result = supabase.table(table).select("*").lt(
+            time_column, cutoff
+        ).order(time_column, desc=False).limit(limit).execute()
+        return result.data or []
+    except Exception as e:
+        print(f"Error reading archivable rows from {table}: {e}")
+        return []
+
+def iter_table_columns(table: str, columns: str, order_column: str, since: str = None,
+                       until: str = None, batch_size: int = 1000):
+    """Page through selected columns of a table in `order_column` order (used by analytics)"""
+    if not supabase:
+        raise Exception("Database connection required")
+
+    start = 0
+    while True:
+        query = supabase.table(table).select(columns)
+        if since:
+            query = query.gte(order_column, since)
+        if until:
+            query = query.lte(order_column, until)
+        rows = query.order(order_column, desc=False).order("id", desc=False).range(
+            start, start + batch_size - 1
+        ).execute().data or []
+
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        start += batch_size
+
+def delete_rows_by_id(table: str, ids: list) -> int:
+    """Delete rows by primary key and return how many were removed"""
+    if not supabase or not ids:
+        return 0
+
+    try:
+        result = supabase.table(table).delete().in_("id", ids).execute()
+        return len(result.data or [])
+    except Exception as e:
+        print(f"Error deleting archived rows from {table}: {e}")
+        return 0
 
 # Admin and Staff Management Functions
 
@@ -275,17 +567,56 @@ def get_all_service_requests(status_filter: str = None) -> list:
         print(f"Error getting service requests: {e}")
         return []
 
+def get_dashboard_counts() -> dict:
+    """Request and staff counts for the admin dashboard"""
+    if not supabase:
+        raise Exception("Database connection required")
+    
+    if pg_fast_path.pg_fast_path_enabled():
+        try:
+            return pg_fast_path.fetch_dashboard_counts()
+        except Exception as e:
+            print(f"Postgres fast path failed, using PostgREST: {e}")
+    
+    # Only the columns the counts need, without the staff/admin embeds
+    requests = supabase.table("service_requests").select("status, priority").execute().data or []
+    staff = supabase.table("staff_members").select("is_available").execute().data or []
+    return {
+        "total_requests": len(requests),
+        "pending_requests": len([r for r in requests if r["status"] == "pending"]),
+        "in_progress_requests": len([r for r in requests if r["status"] in ["assigned", "in_progress"]]),
+        "completed_requests": len([r for r in requests if r["status"] == "completed"]),
+        "total_staff": len(staff),
+        "available_staff": len([s for s in staff if s.get("is_available", True) is not False]),
+        "urgent_requests": len([r for r in requests if r["priority"] == "urgent"]),
+        "emergency_requests": len([r for r in requests if r["priority"] == "emergency"])
+    }
+
 def get_staff_members() -> list:
     """Get all staff members"""
     if not supabase:
         raise Exception("Database connection required")
     
+    return staff_cache.get("all", _load_staff_members) or []
+
+def _load_staff_members() -> list:
     try:
         result = supabase.table("staff_members").select("*").order("department", desc=False).execute()
         return result.data or []
     except Exception as e:
         print(f"Error getting staff members: {e}")
-        return []
+        return None
+
+def _resolve_staff_uuid(staff_id: str) -> str:
+    """The staff_members.id for a UUID or staff_id code; None if the code is unknown"""
+    # If staff_id looks like a code (not a UUID), look it up
+    if staff_id.count('-') == 4:  # Simple check for UUID format
+        return staff_id
+    
+    def load():
+        staff_result = supabase.table("staff_members").select("id").eq("staff_id", staff_id).execute()
+        return staff_result.data[0]["id"] if staff_result.data else None
+    return staff_cache.get(f"id:{staff_id}", load)
 
 def assign_request_to_staff(request_id: str, staff_id: str, admin_user_id: str, notes: str = None) -> bool:
     """Assign a service request to a staff member"""
@@ -294,17 +625,12 @@ def assign_request_to_staff(request_id: str, staff_id: str, admin_user_id: str,
     
     try:
         # Check if staff_id is a UUID or staff_id code, and get the actual UUID
-        actual_staff_uuid = staff_id
-        
-        # If staff_id looks like a code (not a UUID), look it up
-        if not staff_id.count('-') == 4:  # Simple check for UUID format
-            staff_result = supabase.table("staff_members").select("id").eq("staff_id", staff_id).execute()
-            if not staff_result.data:
-                print(f"Error: Staff member with staff_id {staff_id} not found")
-                return False
-            actual_staff_uuid = staff_result.data[0]["id"]
+        actual_staff_uuid = _resolve_staff_uuid(staff_id)
+        if not actual_staff_uuid:
+            print(f"Error: Staff member with staff_id {staff_id} not found")
+            return False
         
-        update_data = {
+        payload = {
             "assigned_staff_id": actual_staff_uuid,
             "assigned_by": admin_user_id,
             "assigned_at": datetime.now().isoformat(),
@@ -312,21 +638,17 @@ def assign_request_to_staff(request_id: str, staff_id: str, admin_user_id: str,
         }
         
         if notes:
-            update_data["notes"] = notes
-        
-        result = supabase.table("service_requests").update(update_data).eq("id", request_id).execute()
+            payload["notes"] = notes
         
-        # Create request history entry
-        if result.data:
-            create_request_history_entry(
-                request_id=request_id,
-                action="assigned",
-                details=f"Assigned to staff member {staff_id}",
-                user_type="admin",
-                user_id=admin_user_id
-            )
-        
-        return len(result.data) > 0
+        event = append_request_event(
+            request_id=request_id,
+            action=EVENT_ASSIGNED,
+            details=f"Assigned to staff member {staff_id}",
+            user_type="admin",
+            user_id=admin_user_id,
+            payload=payload
+        )
+        return event is not None
     except Exception as e:
         print(f"Error assigning request: {e}")
         return False
@@ -337,27 +659,20 @@ def update_request_status(request_id: str, status: str, notes: str = None) -> bo
         raise Exception("Database connection required")
     
     try:
-        # Get old status first
-        old_request = supabase.table("service_requests").select("status").eq("id", request_id).execute()
-        old_status = old_request.data[0]["status"] if old_request.data else "unknown"
-        
-        update_data = {"status": status}
+        payload = {"status": status}
         if notes:
-            update_data["notes"] = notes
-        
-        result = supabase.table("service_requests").update(update_data).eq("id", request_id).execute()
+            payload["notes"] = notes
         
-        # Create request history entry
-        if result.data:
-            create_request_history_entry(
-                request_id=request_id,
-                action="status_changed",
-                details=f"Status changed from {old_status} to {status}",
-                user_type="admin",
-                user_id="admin"
-            )
-        
-        return len(result.data) > 0
+        # The projection trigger records the previous status in the event payload
+        event = append_request_event(
+            request_id=request_id,
+            action=EVENT_STATUS_CHANGED,
+            details=f"Status changed to {status}",
+            user_type="admin",
+            user_id="admin",
+            payload=payload
+        )
+        return event is not None
     except Exception as e:
         print(f"Error updating request status: {e}")
         return False
@@ -415,6 +730,12 @@ def get_requests_by_room(room_number: str) -> list:
     if not supabase:
         raise Exception("Database connection required")
     
+    if pg_fast_path.pg_fast_path_enabled():
+        try:
+            return pg_fast_path.fetch_requests_by_room(room_number)
+        except Exception as e:
+            print(f"Postgres fast path failed, using PostgREST: {e}")
+    
     try:
         result = supabase.table("service_requests").select(
             "*, staff_members(staff_id, full_name, department)"
@@ -430,6 +751,12 @@ def get_active_requests_by_room(room_number: str) -> list:
     if not supabase:
         raise Exception("Database connection required")
     
+    if pg_fast_path.pg_fast_path_enabled():
+        try:
+            return pg_fast_path.fetch_active_requests_by_room(room_number)
+        except Exception as e:
+            print(f"Postgres fast path failed, using PostgREST: {e}")
+    
     try:
         # Get requests that can be cancelled (pending, assigned - not completed, cancelled)
         cancellable_statuses = ['pending', 'assigned', 'in_progress']
@@ -449,42 +776,27 @@ def cancel_service_request(request_id: str, reason: str = "Cancelled by guest")
         raise Exception("Database connection required")
     
     try:
-        # Update request status to cancelled
-        result = supabase.table("service_requests").update({
-            "status": "cancelled",
-            "notes": reason
-        }).eq("id", request_id).execute()
-        
-        if result.data:
-            # Update persistent history
-            update_persistent_history_status(request_id, "cancelled", reason)
-            
-            # Create history entry
-            try:
-                supabase.table("request_history").insert({
-                    "request_id": request_id,
-                    "action": "cancelled",
-                    "details": reason,
-                    "user_type": "guest",
-                    "user_id": "guest_chat"
-                }).execute()
-            except Exception as he:
-                print(f"Note: Could not log cancellation history: {he}")
-            
-            return True
-        return False
+        event = append_request_event(
+            request_id=request_id,
+            action=EVENT_CANCELLED,
+            details=reason,
+            user_type="guest",
+            user_id="guest_chat",
+            payload={"status": "cancelled", "notes": reason}
+        )
+        return event is not None
     except Exception as e:
         print(f"Error cancelling request: {e}")
         return False
 
 def delete_cancelled_request(request_id: str) -> bool:
-    """Permanently delete a cancelled service request (admin only) - preserves chat history"""
+    """Permanently delete a cancelled service request (admin only) - preserves chat and event history"""
     if not supabase:
         raise Exception("Database connection required")
     
     try:
         # First verify the request exists and is cancelled
-        request_check = supabase.table("service_requests").select("status").eq("id", request_id).execute()
+        request_check = supabase.table("service_requests").select("status, room_number").eq("id", request_id).execute()
         
         if not request_check.data:
             print(f"Request {request_id} not found")
@@ -494,21 +806,17 @@ def delete_cancelled_request(request_id: str) -> bool:
             print(f"Request {request_id} is not cancelled, cannot delete")
             return False
         
-        # Delete related request history entries (but preserve chat messages)
-        try:
-            supabase.table("request_history").delete().eq("request_id", request_id).execute()
-            print(f"Deleted request history for {request_id}")
-        except Exception as he:
-            print(f"Note: Could not delete request history: {he}")
-        
-        # Mark persistent history as deleted (preserves the data)
-        mark_persistent_history_deleted(request_id)
-        
-        # Delete the request (chat history is preserved in chat_messages table)
-        result = supabase.table("service_requests").delete().eq("id", request_id).execute()
-        print(f"Deleted cancelled request {request_id}, chat history and persistent history preserved")
-        
-        return len(result.data) > 0
+        # The deletion event removes the service_requests row and marks the
+        # persistent customer history as deleted; the event log itself is kept
+        event = append_request_event(
+            request_id=request_id,
+            action=EVENT_DELETED,
+            details="Cancelled request deleted by admin",
+            user_type="admin",
+            user_id="admin",
+            room_number=request_check.data[0]["room_number"]
+        )
+        return event is not None
     except Exception as e:
         print(f"Error deleting cancelled request: {e}")
         return False
@@ -522,6 +830,8 @@ def add_staff_member(staff_data: dict) -> bool:
     
     try:
         result = supabase.table("staff_members").insert(staff_data).execute()
+        staff_cache.clear()
+        bump_versions(SCOPE_STAFF)
         return len(result.data) > 0
     except Exception as e:
         print(f"Error adding staff member: {e}")
@@ -534,19 +844,16 @@ def update_staff_availability(staff_id: str, is_available: bool) -> bool:
     
     try:
         # Check if staff_id is a UUID or staff_id code, and get the actual UUID
-        actual_staff_uuid = staff_id
-        
-        # If staff_id looks like a code (not a UUID), look it up
-        if not staff_id.count('-') == 4:  # Simple check for UUID format
-            staff_result = supabase.table("staff_members").select("id").eq("staff_id", staff_id).execute()
-            if not staff_result.data:
-                print(f"Error: Staff member with staff_id {staff_id} not found")
-                return False
-            actual_staff_uuid = staff_result.data[0]["id"]
+        actual_staff_uuid = _resolve_staff_uuid(staff_id)
+        if not actual_staff_uuid:
+            print(f"Error: Staff member with staff_id {staff_id} not found")
+            return False
         
         result = supabase.table("staff_members").update({
             "is_available": is_available
         }).eq("id", actual_staff_uuid).execute()
+        staff_cache.clear()
+        bump_versions(SCOPE_STAFF)
         return len(result.data) > 0
     except Exception as e:
         print(f"Error updating staff availability: {e}")
@@ -558,25 +865,16 @@ def update_request_priority(request_id: str, priority: str) -> bool:
         raise Exception("Database connection required")
     
     try:
-        # Get old priority first
-        old_request = supabase.table("service_requests").select("priority").eq("id", request_id).execute()
-        old_priority = old_request.data[0]["priority"] if old_request.data else "unknown"
-        
-        result = supabase.table("service_requests").update({
-            "priority": priority
-        }).eq("id", request_id).execute()
-        
-        # Create request history entry
-        if result.data:
-            create_request_history_entry(
-                request_id=request_id,
-                action="priority_changed",
-                details=f"Priority changed from {old_priority} to {priority}",
-                user_type="admin",
-                user_id="admin"
-            )
-        
-        return len(result.data) > 0
+        # The projection trigger records the previous priority in the event payload
+        event = append_request_event(
+            request_id=request_id,
+            action=EVENT_PRIORITY_CHANGED,
+            details=f"Priority changed to {priority}",
+            user_type="admin",
+            user_id="admin",
+            payload={"priority": priority}
+        )
+        return event is not None
     except Exception as e:
         print(f"Error updating request priority: {e}")
         return False
@@ -596,13 +894,18 @@ def get_request_history(request_id: str) -> list:
         print(f"Note: Request history will be available when table is created: {e}")
         return []
 
-def get_all_request_history() -> list:
-    """Get the history of all requests"""
+def get_all_request_history(since: str = None, until: str = None) -> list:
+    """Get the history of all requests, optionally limited to a time range"""
     if not supabase:
         raise Exception("Database connection required")
-    
+
     try:
-        result = supabase.table("request_history").select("*").order("timestamp", desc=True).execute()
+        query = supabase.table("request_history").select("*")
+        if since:
+            query = query.gte("timestamp", since)
+        if until:
+            query = query.lte("timestamp", until)
+        result = query.order("timestamp", desc=True).execute()
         return result.data or []
     except Exception as e:
         print(f"Note: Request history will be available when table is created: {e}")
@@ -615,17 +918,14 @@ def delete_staff_member(staff_id: str) -> bool:
     
     try:
         # Check if staff_id is a UUID or staff_id code, and get the actual UUID
-        actual_staff_uuid = staff_id
-        
-        # If staff_id looks like a code (not a UUID), look it up
-        if not staff_id.count('-') == 4:  # Simple check for UUID format
-            staff_result = supabase.table("staff_members").select("id").eq("staff_id", staff_id).execute()
-            if not staff_result.data:
-                print(f"Error: Staff member with staff_id {staff_id} not found")
-                return False
-            actual_staff_uuid = staff_result.data[0]["id"]
+        actual_staff_uuid = _resolve_staff_uuid(staff_id)
+        if not actual_staff_uuid:
+            print(f"Error: Staff member with staff_id {staff_id} not found")
+            return False
         
         result = supabase.table("staff_members").delete().eq("id", actual_staff_uuid).execute()
+        staff_cache.clear()
+        bump_versions(SCOPE_STAFF)
         return len(result.data) > 0
     except Exception as e:
         print(f"Error deleting staff member: {e}")
@@ -638,39 +938,97 @@ def update_staff_member(staff_id: str, staff_data: dict) -> bool:
     
     try:
         # Check if staff_id is a UUID or staff_id code, and get the actual UUID
-        actual_staff_uuid = staff_id
-        
-        # If staff_id looks like a code (not a UUID), look it up
-        if not staff_id.count('-') == 4:  # Simple check for UUID format
-            staff_result = supabase.table("staff_members").select("id").eq("staff_id", staff_id).execute()
-            if not staff_result.data:
-                print(f"Error: Staff member with staff_id {staff_id} not found")
-                return False
-            actual_staff_uuid = staff_result.data[0]["id"]
+        actual_staff_uuid = _resolve_staff_uuid(staff_id)
+        if not actual_staff_uuid:
+            print(f"Error: Staff member with staff_id {staff_id} not found")
+            return False
         
         result = supabase.table("staff_members").update(staff_data).eq("id", actual_staff_uuid).execute()
+        staff_cache.clear()
+        bump_versions(SCOPE_STAFF)
         return len(result.data) > 0
     except Exception as e:
         print(f"Error updating staff member: {e}")
         return False
 
-def create_request_history_entry(request_id: str, action: str, details: str, user_type: str, user_id: str) -> bool:
-    """Create a request history entry"""
+def append_request_event(request_id: str, action: str, details: str, user_type: str, user_id: str,
+                         payload: dict = None, room_number: str = None) -> dict:
+    """Append one event to the request event log and return the stored row"""
+    if room_number is None:
+        # Looked up before the insert: a deletion event removes the projection row
+        room_result = supabase.table("service_requests").select("room_number").eq("id", request_id).limit(1).execute()
+        room_number = room_result.data[0]["room_number"] if room_result.data else None
+    result = supabase.table("request_history").insert({
+        "request_id": request_id,
+        "action": action,
+        "details": details,
+        "user_type": user_type,
+        "user_id": user_id,
+        "payload": payload or {}
+    }).execute()
+    bump_versions(*([SCOPE_REQUESTS, room_scope(room_number)] if room_number else [SCOPE_REQUESTS]))
+    return result.data[0] if result.data else None
+
+def get_request_events_after(after_seq: int, limit: int = 1000) -> list:
+    """Get request events with a sequence number above `after_seq`, in log order"""
     if not supabase:
-        return True
-    
-    try:
-        supabase.table("request_history").insert({
-            "request_id": request_id,
-            "action": action,
-            "details": details,
-            "user_type": user_type,
-            "user_id": user_id
-        }).execute()
-        return True
-    except Exception as e:
-        print(f"Note: Request history will be tracked when table is created: {e}")
-        return True
+        return []
+
+    result = supabase.table("request_history").select("*").gt(
+        "seq", after_seq
+    ).order("seq", desc=False).limit(limit).execute()
+    return result.data or []
+
+def get_snapshot_checkpoint() -> int:
+    """Highest event sequence number already folded into request snapshots"""
+    if not supabase:
+        return 0
+
+    result = supabase.table("request_snapshots").select("last_seq").order(
+        "last_seq", desc=True
+    ).limit(1).execute()
+    return result.data[0]["last_seq"] if result.data else 0
+
+def get_request_snapshots(request_ids: list) -> list:
+    """Get the latest snapshots for the given requests"""
+    if not supabase or not request_ids:
+        return []
+
+    snapshots = []
+    # Chunked to keep `in.(...)` filters within URL limits
+    for start in range(0, len(request_ids), 200):
+        result = supabase.table("request_snapshots").select("request_id, state, last_seq").in_(
+            "request_id", request_ids[start:start + 200]
+        ).execute()
+        snapshots.extend(result.data or [])
+    return snapshots
+
+def upsert_request_snapshots(snapshots: list):
+    """Insert or replace per-request snapshots"""
+    if not supabase or not snapshots:
+        return
+
+    supabase.table("request_snapshots").upsert(
+        [dict(snapshot, updated_at=datetime.utcnow().isoformat()) for snapshot in snapshots],
+        on_conflict="request_id"
+    ).execute()
+
+def replace_request_projections(service_requests: list, deleted_ids: list, customer_history: list):
+    """Overwrite projection rows with rebuilt state (does not append events)"""
+    if not supabase:
+        return
+
+    for start in range(0, len(service_requests), 500):
+        supabase.table("service_requests").upsert(
+            service_requests[start:start + 500], on_conflict="id"
+        ).execute()
+    for start in range(0, len(deleted_ids), 200):
+        supabase.table("service_requests").delete().in_("id", deleted_ids[start:start + 200]).execute()
+    for start in range(0, len(customer_history), 500):
+        supabase.table("customer_request_history").upsert(
+            customer_history[start:start + 500], on_conflict="original_request_id"
+        ).execute()
+    bump_versions(SCOPE_ALL)
 
 def get_customer_request_history() -> list:
     """Get customer request history with guest details"""
@@ -680,13 +1038,14 @@ def get_customer_request_history() -> list:
     try:
         # Use Supabase query builder to join service_requests with guest_sessions
         requests_result = supabase.table("service_requests").select(
-            "*, guest_sessions!inner(guest_name, checkout_time)"
+            "*, guest_sessions(guest_name, checkout_time)"
         ).order("created_at", desc=True).execute()
         
         # Transform the data to match our expected format
         customer_history = []
         for request in requests_result.data or []:
-            guest_session = request.get('guest_sessions', {})
+            # None once the janitor has removed the expired session
+            guest_session = request.get('guest_sessions') or {}
             customer_history.append({
                 "customer_name": guest_session.get('guest_name') or f"Guest {request['room_number']}",
                 "room_number": request['room_number'],
@@ -742,70 +1101,7 @@ def get_customer_request_history() -> list:
             return []
 
 # Persistent Customer Request History Functions
-
-def create_persistent_history_entry(original_request_id: str, customer_name: str, room_number: str, 
-                                   request_type: str, description: str, priority: str = "normal", 
-                                   status: str = "pending", session_token: str = None):
-    """Create a persistent history entry for a service request"""
-    if not supabase:
-        print(f"Would create persistent history entry for request {original_request_id}")
-        return None
-    
-    try:
-        result = supabase.table("customer_request_history").insert({
-            "original_request_id": original_request_id,
-            "customer_name": customer_name,
-            "room_number": room_number,
-            "request_type": request_type,
-            "description": description,
-            "priority": priority,
-            "status": status,
-            "session_token": session_token
-        }).execute()
-        return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error creating persistent history entry: {e}")
-        return None
-
-def update_persistent_history_status(original_request_id: str, status: str, notes: str = None, 
-                                    assigned_staff_id: str = None, assigned_by: str = None):
-    """Update status of persistent history entry"""
-    if not supabase:
-        print(f"Would update persistent history for request {original_request_id}")
-        return False
-    
-    try:
-        update_data = {"status": status}
-        if notes:
-            update_data["notes"] = notes
-        if assigned_staff_id:
-            update_data["assigned_staff_id"] = assigned_staff_id
-        if assigned_by:
-            update_data["assigned_by"] = assigned_by
-            update_data["assigned_at"] = datetime.utcnow().isoformat()
-        
-        result = supabase.table("customer_request_history").update(update_data).eq(
-            "original_request_id", original_request_id
-        ).execute()
-        return len(result.data) > 0
-    except Exception as e:
-        print(f"Error updating persistent history: {e}")
-        return False
-
-def mark_persistent_history_deleted(original_request_id: str):
-    """Mark persistent history entry as deleted when admin deletes the original request"""
-    if not supabase:
-        print(f"Would mark persistent history as deleted for request {original_request_id}")
-        return False
-    
-    try:
-        result = supabase.table("customer_request_history").update({
-            "deleted_at": datetime.utcnow().isoformat()
-        }).eq("original_request_id", original_request_id).execute()
-        return len(result.data) > 0
-    except Exception as e:
-        print(f"Error marking persistent history as deleted: {e}")
-        return False
+# (rows are written by the request event projection, see request_events.py)
 
 def get_persistent_customer_history():
     """Get all persistent customer request history"""
@@ -824,21 +1120,13 @@ def get_persistent_customer_history():
         
         customer_history = []
         
-        # For each history entry, get the checkout time from guest sessions
+        # Checkout times from the guest sessions (live or archived)
+        checkout_by_token = get_checkout_times([entry.get('session_token') for entry in result.data])
         for entry in result.data:
-            # Get guest session info for checkout time
-            guest_session = None
-            if entry.get('session_token'):
-                session_result = supabase.table("guest_sessions").select("*").eq(
-                    "session_token", entry['session_token']
-                ).execute()
-                if session_result.data:
-                    guest_session = session_result.data[0]
-            
             customer_history.append({
                 "customer_name": entry['customer_name'],
                 "room_number": entry['room_number'],
-                "checkout_time": guest_session.get('checkout_time') if guest_session else None,
+                "checkout_time": checkout_by_token.get(entry.get('session_token')),
                 "request_date": entry['created_at'],
                 "request_type": entry['request_type'],
                 "description": entry['description'],
@@ -852,4 +1140,74 @@ def get_persistent_customer_history():
         return customer_history
     except Exception as e:
         print(f"Error getting persistent customer history: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def get_checkout_times(tokens: list) -> dict:
+    """Checkout time per session token, from live sessions or the expired ones the janitor archived"""
+    remaining = list({token for token in tokens if token})
+    checkout_by_token = {}
+    for table in ("guest_sessions", "guest_sessions_archive"):
+        for start in range(0, len(remaining), IN_FILTER_CHUNK_SIZE):
+            sessions = supabase.table(table).select(
+                "session_token, checkout_time"
+            ).in_("session_token", remaining[start:start + IN_FILTER_CHUNK_SIZE]).execute()
+            checkout_by_token.update((s["session_token"], s.get("checkout_time")) for s in sessions.data or [])
+        remaining = [token for token in remaining if token not in checkout_by_token]
+    return checkout_by_token
+
+def iter_persistent_customer_history(batch_size: int = 1000):
+    """Iterate persistent customer history oldest-first, one keyset page at a time"""
+    if not supabase:
+        raise Exception("Database connection required")
+
+    # Fail here rather than mid-stream; pages are only fetched while iterating
+    return _iter_customer_history_pages(batch_size)
+
+def _iter_customer_history_pages(batch_size: int):
+    def page_query():
+        return supabase.table("customer_request_history").select("*")
+
+    last_created_at, last_id = None, None
+    while True:
+        rows = []
+        if last_created_at is not None:
+            # Drain rows sharing the previous page's timestamp before moving past it
+            rows = page_query().eq("created_at", last_created_at).gt(
+                "id", last_id
+            ).order("id", desc=False).limit(batch_size).execute().data or []
+
+        if not rows:
+            query = page_query()
+            if last_created_at is not None:
+                query = query.gt("created_at", last_created_at)
+            rows = query.order("created_at", desc=False).order(
+                "id", desc=False
+            ).limit(batch_size).execute().data or []
+
+        if not rows:
+            return
+
+        # Checkout times in a few chunked lookups per page instead of one per row
+        checkout_by_token = get_checkout_times([row.get("session_token") for row in rows])
+
+        for entry in rows:
+            yield {
+                "customer_name": entry['customer_name'],
+                "room_number": entry['room_number'],
+                "checkout_time": checkout_by_token.get(entry.get('session_token')),
+                "request_date": entry['created_at'],
+                "request_type": entry['request_type'],
+                "description": entry['description'],
+                "status": entry['status'],
+                "priority": entry['priority'],
+                "request_id": entry['original_request_id'],
+                "deleted_at": entry.get('deleted_at'),
+                "notes": entry.get('notes')
+            }
+
+        last_created_at, last_id = rows[-1]["created_at"], rows[-1]["id"]
+
+# Per-function call counts and latencies for /metrics, and a span per call in request traces
+# (not the client accessors, which run on every query)
+instrument_module_functions(globals(), __name__, exclude=("get_supabase", "database_configured"))
+trace_module_functions(globals(), __name__, prefix="db.", exclude=("get_supabase", "database_configured"))
@@ -0,0 +1,175 @@
+import os
+import re
+import json
+import math
+import time
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.services.metrics import counter, histogram
+
+# FAQ knowledge base for answering common guest questions without the LLM.
+# Every example question in FAQ_PATH is indexed as a TF-IDF vector over character
+# n-grams (robust to typos and word order) plus whole words, in one L2-normalized
+# NumPy matrix. A guest message is vectorized the same way and scored against the
+# columns it touches; the best entry answers when its cosine similarity reaches the
+# file's min_score (FAQ_MIN_SCORE overrides). The file is re-read when it changes.
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FAQ_ENABLED = os.getenv("FAQ_ENABLED", "true").lower() in ("1", "true", "yes")
+FAQ_PATH = os.getenv("FAQ_PATH", os.path.join(backend_dir, "data", "faq.json"))
+FAQ_MIN_SCORE = os.getenv("FAQ_MIN_SCORE")
+# How often a lookup checks the file's modification time
+FAQ_RELOAD_CHECK_SECONDS = float(os.getenv("FAQ_RELOAD_CHECK_SECONDS", "2"))
+FAQ_DEFAULT_MIN_SCORE = 0.6
+NGRAM_SIZES = (3, 4, 5)
+
+faq_lookups = counter("faq_lookups_total", "FAQ lookups by result (answered, below_threshold, unavailable)", ("result",))
+faq_lookup_duration = histogram("faq_lookup_duration_seconds", "FAQ retrieval latency",
+                                buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01))
+
+# Function words carry no meaning for matching ("do you have a gym" vs "do you have a spa")
+STOPWORDS = frozenset("""
+a an the is are was be do does did can could would will shall should may i me my we our you your
+it its to of for on at by with from there this that what when where how which who please hi hello
+have has get any some much many tell about s
+""".split())
+# Spellings folded together before matching
+SYNONYMS = [(re.compile(r"\bcheck out\b"), "checkout"), (re.compile(r"\bcheck in\b"), "checkin"),
+            (re.compile(r"\bwi fi\b"), "wifi")]
+
+def _normalize(text: str) -> str:
+    normalized = " ".join(re.sub(r"[^a-z0-9\s]", " ", text.lower().replace("-", "")).split())
+    for pattern, replacement in SYNONYMS:
+        normalized = pattern.sub(replacement, normalized)
+    return normalized
+
+def extract_features(text: str) -> Counter:
+    """Character n-grams within word boundaries, plus whole words (stopwords dropped)"""
+    normalized = _normalize(text)
+    features = Counter()
+    for word in normalized.split():
+        if word in STOPWORDS:
+            continue
+        features["w:" + word] += 1
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            for i in range(len(padded) - size + 1):
+                features[padded[i:i + size]] += 1
+    return features
+
+class FaqIndex:
+    """TF-IDF matrix over the example questions of every FAQ entry"""
+
+    def __init__(self, entries: List[dict], min_score: float):
+        self.entries = entries
+        self.min_score = min_score
+        questions, self.row_entry = [], []
+        for entry_index, entry in enumerate(entries):
+            for question in entry["questions"]:
+                questions.append(extract_features(question))
+                self.row_entry.append(entry_index)
+        self.row_entry = np.array(self.row_entry, dtype=np.int32)
+
+        document_frequency = Counter()
+        for features in questions:
+            document_frequency.update(features.keys())
+        self.vocabulary: Dict[str, int] = {feature: i for i, feature in enumerate(document_frequency)}
+        rows = len(questions)
+        self.idf = np.array([math.log((1 + rows) / (1 + document_frequency[f])) + 1 for f in self.vocabulary])
+        # A feature the index has never seen counts against the match like a rare one
+        self.unseen_idf = math.log((1 + rows) / 2) + 1
+
+        matrix = np.zeros((rows, len(self.vocabulary)), dtype=np.float32)
+        for row, features in enumerate(questions):
+            for feature, count in features.items():
+                column = self.vocabulary[feature]
+                matrix[row, column] = (1 + math.log(count)) * self.idf[column]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.maximum(norms, 1e-12)
+
+    def search(self, text: str, top_k: int = 3) -> List[Tuple[dict, float]]:
+        """The top_k entries by cosine similarity to text (best first)"""
+        features = extract_features(text)
+        if not features:
+            return []
+        columns, weights, unseen_sq = [], [], 0.0
+        for feature, count in features.items():
+            weight = 1 + math.log(count)
+            column = self.vocabulary.get(feature)
+            if column is None:
+                unseen_sq += (weight * self.unseen_idf) ** 2
+            else:
+                columns.append(column)
+                weights.append(weight * self.idf[column])
+        if not columns:
+            return []
+        weights = np.array(weights, dtype=np.float32)
+        norm = math.sqrt(float(weights @ weights) + unseen_sq)
+        # Only the columns the message touches: a few hundred multiply-adds per row
+        scores = self.matrix[:, columns] @ (weights / norm)
+
+        # Best row per entry, then the top_k entries
+        best: Dict[int, float] = {}
+        candidates = np.argsort(scores)[::-1][:top_k * 4]
+        for row in candidates:
+            entry_index = int(self.row_entry[row])
+            if entry_index not in best:
+                best[entry_index] = float(scores[row])
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(self.entries[entry_index], score) for entry_index, score in ranked]
+
+_index: Optional[FaqIndex] = None
+_index_mtime: Optional[float] = None
+_last_check = 0.0
+_reload_lock = threading.Lock()
+
+def load_faq_index(path: str = FAQ_PATH) -> FaqIndex:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    entries = [entry for entry in data.get("entries", []) if entry.get("questions") and entry.get("answer")]
+    min_score = float(FAQ_MIN_SCORE) if FAQ_MIN_SCORE else float(data.get("min_score", FAQ_DEFAULT_MIN_SCORE))
+    return FaqIndex(entries, min_score)
+
+def get_faq_index() -> Optional[FaqIndex]:
+    """The current index, rebuilt when FAQ_PATH has changed (checked every few seconds)"""
+    global _index, _index_mtime, _last_check
+    now = time.monotonic()
+    if _index is not None and now - _last_check < FAQ_RELOAD_CHECK_SECONDS:
+        return _index
+    with _reload_lock:
+        if _index is not None and now - _last_check < FAQ_RELOAD_CHECK_SECONDS:
+            return _index
+        _last_check = now
+        try:
+            mtime = os.path.getmtime(FAQ_PATH)
+            if mtime != _index_mtime:
+                # Recorded first, so a broken file is reported once rather than on every check
+                _index_mtime = mtime
+                _index = load_faq_index(FAQ_PATH)
+                print(f"Loaded FAQ knowledge base: {len(_index.entries)} entries from {FAQ_PATH}")
+        except Exception as e:
+            # Keep serving the last good index when the file is missing or invalid
+            print(f"Error loading FAQ knowledge base: {e}")
+    return _index
+
+def answer_faq(text: str, values: dict = None) -> Optional[str]:
+    """The FAQ answer for a confident match, with {placeholders} filled from values"""
+    if not FAQ_ENABLED:
+        return None
+    started = time.perf_counter()
+    index = get_faq_index()
+    if index is None:
+        faq_lookups.inc("unavailable")
+        return None
+    results = index.search(text, top_k=1)
+    faq_lookup_duration.observe(time.perf_counter() - started)
+    if not results or results[0][1] < index.min_score:
+        faq_lookups.inc("below_threshold")
+        return None
+    faq_lookups.inc("answered")
+    answer = results[0][0]["answer"]
+    try:
+        return answer.format_map(values or {})
+    except (KeyError, ValueError):
+        return answer
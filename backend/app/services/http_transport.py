@@ -0,0 +1,139 @@
+import os
+import time
+import threading
+from typing import Optional
+import httpx
+from app.services.metrics import counter, gauge, histogram
+
+# Shared HTTP transport for the Supabase client.
+# Every db_services call is a PostgREST HTTP request; by default supabase-py builds
+# its own client with library defaults. Instead each worker process owns one
+# explicitly configured, thread-safe httpx.Client (pool limits, keep-alive,
+# timeouts) that all requests in the process share, with pool saturation metrics.
+SUPABASE_HTTP_MAX_CONNECTIONS = int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "20"))
+SUPABASE_HTTP_MAX_KEEPALIVE = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "10"))
+SUPABASE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_HTTP_KEEPALIVE_EXPIRY", "30"))
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() in ("1", "true", "yes")
+SUPABASE_HTTP_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_HTTP_CONNECT_TIMEOUT", "5"))
+SUPABASE_HTTP_READ_TIMEOUT = float(os.getenv("SUPABASE_HTTP_READ_TIMEOUT", "15"))
+SUPABASE_HTTP_WRITE_TIMEOUT = float(os.getenv("SUPABASE_HTTP_WRITE_TIMEOUT", "15"))
+# How long a call waits for a free pooled connection before failing with PoolTimeout
+SUPABASE_HTTP_POOL_TIMEOUT = float(os.getenv("SUPABASE_HTTP_POOL_TIMEOUT", "5"))
+
+http_client_requests = counter("supabase_http_requests_total", "PostgREST HTTP requests by outcome", ("outcome",))
+http_client_duration = histogram("supabase_http_request_duration_seconds", "PostgREST HTTP request latency")
+
+class InstrumentedTransport(httpx.HTTPTransport):
+    """HTTPTransport that tracks in-flight requests and pool timeouts"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            response = super().handle_request(request)
+            if response.status_code >= 500:
+                outcome = "server_error"
+            return response
+        except httpx.PoolTimeout:
+            # Every connection was busy for SUPABASE_HTTP_POOL_TIMEOUT: the pool is saturated
+            outcome = "pool_timeout"
+            raise
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            raise
+        except httpx.TransportError:
+            outcome = "transport_error"
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            http_client_requests.inc(outcome)
+            http_client_duration.observe(time.perf_counter() - started)
+
+    def pool_connections(self) -> dict:
+        """Open connections by state, read from the underlying httpcore pool"""
+        states = {"active": 0, "idle": 0}
+        for connection in list(getattr(self._pool, "connections", [])):
+            if connection.is_closed():
+                continue
+            states["idle" if connection.is_idle() else "active"] += 1
+        return states
+
+_http_client: Optional[httpx.Client] = None
+_transport: Optional[InstrumentedTransport] = None
+_client_lock = threading.Lock()
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def get_http_client() -> httpx.Client:
+    """The process-wide pooled client (created on first use)"""
+    global _http_client, _transport
+    with _client_lock:
+        if _http_client is None:
+            limits = httpx.Limits(
+                max_connections=SUPABASE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=SUPABASE_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=SUPABASE_HTTP_KEEPALIVE_EXPIRY
+            )
+            _transport = InstrumentedTransport(
+                limits=limits, http2=SUPABASE_HTTP2 and _http2_available(), retries=1
+            )
+            _http_client = httpx.Client(
+                transport=_transport,
+                timeout=httpx.Timeout(
+                    connect=SUPABASE_HTTP_CONNECT_TIMEOUT,
+                    read=SUPABASE_HTTP_READ_TIMEOUT,
+                    write=SUPABASE_HTTP_WRITE_TIMEOUT,
+                    pool=SUPABASE_HTTP_POOL_TIMEOUT
+                ),
+                follow_redirects=True
+            )
+        return _http_client
+
+def close_http_client():
+    """Close pooled connections (call from a shutdown hook)"""
+    global _http_client, _transport
+    with _client_lock:
+        if _http_client is not None:
+            _http_client.close()
+        _http_client, _transport = None, None
+
+def get_pool_stats() -> dict:
+    if _transport is None:
+        return {"configured": False}
+    return dict(
+        configured=True,
+        in_flight=_transport.in_flight,
+        peak_in_flight=_transport.peak_in_flight,
+        max_connections=SUPABASE_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=SUPABASE_HTTP_MAX_KEEPALIVE,
+        connections=_transport.pool_connections()
+    )
+
+def _pool_gauge() -> dict:
+    stats = get_pool_stats()
+    if not stats["configured"]:
+        return {}
+    return {
+        ("in_flight",): stats["in_flight"],
+        ("max_connections",): stats["max_connections"],
+        ("active_connections",): stats["connections"]["active"],
+        ("idle_connections",): stats["connections"]["idle"],
+        ("utilization",): stats["in_flight"] / stats["max_connections"] if stats["max_connections"] else 0.0
+    }
+
+gauge("supabase_http_pool", "Supabase HTTP connection pool state for this worker", ("stat",), _pool_gauge)
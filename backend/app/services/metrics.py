@@ -0,0 +1,217 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Prometheus-style metrics, rendered in the text exposition format at /metrics.
+# Each metric keeps one small lock held only for a dict/list update, so recording
+# costs a few hundred nanoseconds and can stay on in production. Values are per
+# worker process and nothing aggregates them: workers sharing one port (uvicorn
+# --workers N, gunicorn) answer each scrape at random, so every worker needs its
+# own scrape target (one port per worker) for sum() across workers to be right.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Seconds; covers sub-millisecond DB calls up to slow LLM turns
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonically increasing value per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name, self.documentation, self.labels = name, documentation, labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, values)} {_format_value(v)}" for values, v in items]
+
+class Gauge:
+    """A value read at scrape time from a callback returning {label values: value}"""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 callback: Callable[[], Dict[LabelValues, float]] = None, kind: str = "gauge"):
+        self.name, self.documentation, self.labels = name, documentation, labels
+        self._callback = callback
+        # "counter" for cumulative totals kept elsewhere (e.g. scheduler job stats)
+        self.kind = kind
+
+    def samples(self) -> List[str]:
+        try:
+            values = self._callback() if self._callback else {}
+        except Exception:
+            # A broken gauge must not break the whole scrape
+            return []
+        return [f"{self.name}{_format_labels(self.labels, labels)} {_format_value(v)}" for labels, v in values.items()]
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name, self.documentation, self.labels = name, documentation, labels
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(values, list(series[0]), series[1], series[2]) for values, series in self._series.items()]
+
+        lines = []
+        for values, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {count}")
+        return lines
+
+_registry: List = []
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+def counter(name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+    return _register(Counter(name, documentation, labels))
+
+def histogram(name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, documentation, labels, buckets))
+
+def gauge(name: str, documentation: str, labels: Tuple[str, ...] = (),
+          callback: Callable[[], Dict[LabelValues, float]] = None, kind: str = "gauge") -> Gauge:
+    return _register(Gauge(name, documentation, labels, callback, kind))
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text exposition format (0.0.4)"""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+# HTTP routes
+http_requests = counter("http_requests_total", "HTTP requests by route template, method and status",
+                        ("route", "method", "status"))
+http_request_duration = histogram("http_request_duration_seconds", "HTTP request latency by route template",
+                                  ("route", "method"))
+
+# db_services
+db_calls = counter("db_calls_total", "db_services function calls by function and outcome", ("function", "outcome"))
+db_call_duration = histogram("db_call_duration_seconds", "db_services function latency", ("function",))
+
+# LLM
+llm_requests = counter("llm_requests_total", "LLM generate calls by model and outcome", ("model", "outcome"))
+llm_request_duration = histogram("llm_request_duration_seconds", "LLM generate latency", ("model",))
+llm_tokens = counter("llm_tokens_total", "LLM tokens by model and kind (prompt, completion)", ("model", "kind"))
+
+# Caches
+cache_lookups = counter("cache_lookups_total", "Cache lookups by cache and result (hit, miss)", ("cache", "result"))
+
+def _cache_hit_ratios() -> Dict[LabelValues, float]:
+    caches = {values[0] for values in list(cache_lookups._values)}
+    ratios = {}
+    for cache in caches:
+        hits, misses = cache_lookups.value(cache, "hit"), cache_lookups.value(cache, "miss")
+        ratios[(cache,)] = hits / (hits + misses) if hits + misses else 0.0
+    return ratios
+
+cache_hit_ratio = gauge("cache_hit_ratio", "Cache hit ratio since worker start", ("cache",), _cache_hit_ratios)
+
+def record_cache_lookup(cache: str, hit: bool):
+    if METRICS_ENABLED:
+        cache_lookups.inc(cache, "hit" if hit else "miss")
+
+def observe_http_request(route: str, method: str, status: int, seconds: float):
+    if METRICS_ENABLED:
+        http_requests.inc(route, method, str(status))
+        http_request_duration.observe(seconds, route, method)
+
+def observe_llm_call(model: str, seconds: float, outcome: str, usage=None):
+    """Record one LLM call; `usage` is the SDK's usage_metadata when the call succeeded"""
+    if not METRICS_ENABLED:
+        return
+    llm_requests.inc(model, outcome)
+    llm_request_duration.observe(seconds, model)
+    if usage is not None:
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        completion_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        if prompt_tokens:
+            llm_tokens.inc(model, "prompt", amount=prompt_tokens)
+        if completion_tokens:
+            llm_tokens.inc(model, "completion", amount=completion_tokens)
+
+def timed_db_call(func: Callable) -> Callable:
+    """Count and time a db_services function (generators are timed until they are returned)"""
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            db_calls.inc(name, outcome)
+            db_call_duration.observe(time.perf_counter() - started, name)
+    return wrapper
+
+def instrument_module_functions(namespace: dict, module_name: str, exclude: Iterable[str] = ()) -> Optional[int]:
+    """Wrap every public function defined in a module with timed_db_call"""
+    if not METRICS_ENABLED:
+        return None
+    skipped = set(exclude)
+    instrumented = 0
+    for name, value in list(namespace.items()):
+        if (callable(value) and getattr(value, "__module__", None) == module_name
+                and not name.startswith("_") and name not in skipped and not isinstance(value, type)):
+            namespace[name] = timed_db_call(value)
+            instrumented += 1
+    return instrumented
@@ -0,0 +1,115 @@
+import os
+import re
+import asyncio
+import hashlib
+from typing import List, Optional
+
+try:
+    import asyncpg
+except ImportError:  # optional: without it migrations are applied by hand in the SQL editor
+    asyncpg = None
+
+# Versioned Postgres schema migrations.
+# Each change to the Supabase schema is a file in backend/migrations named
+# NNNN_description.sql, applied once, in version order, each in its own transaction.
+# Applied versions are recorded in schema_migrations with a checksum of the file,
+# so editing a migration after it ran is reported instead of silently ignored: add
+# a new file instead. A session advisory lock keeps two deploys from migrating at
+# once. Needs DATABASE_URL (a direct connection; the PostgREST API cannot run DDL).
+# Files run by hand in the SQL editor are not recorded and run again the first time
+# the runner is used, so every migration is written to be idempotent.
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MIGRATIONS_DIR = os.getenv("MIGRATIONS_DIR", os.path.join(backend_dir, "migrations"))
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+_FILE_PATTERN = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+SCHEMA_MIGRATIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        checksum TEXT NOT NULL,
+        applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    )
+"""
+
+class Migration:
+    __slots__ = ("version", "name", "path", "sql", "checksum")
+
+    def __init__(self, version: int, name: str, path: str, sql: str):
+        self.version = version
+        self.name = name
+        self.path = path
+        self.sql = sql
+        self.checksum = hashlib.sha256(sql.encode()).hexdigest()
+
+    def __repr__(self) -> str:
+        return f"Migration({self.version:04d}_{self.name})"
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Migration files in version order; fails on a duplicated version number"""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = _FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise Exception(f"Duplicate migration version {version:04d}: {migrations[version].path} and {filename}")
+        path = os.path.join(directory, filename)
+        with open(path, encoding="utf-8") as f:
+            migrations[version] = Migration(version, match.group(2), path, f.read())
+    return [migrations[version] for version in sorted(migrations)]
+
+def migrations_enabled(database_url: Optional[str] = None) -> bool:
+    return bool(database_url or DATABASE_URL) and asyncpg is not None
+
+async def _applied_versions(connection) -> dict:
+    await connection.execute(SCHEMA_MIGRATIONS_SQL)
+    rows = await connection.fetch("SELECT version, checksum FROM schema_migrations")
+    return {row["version"]: row["checksum"] for row in rows}
+
+def _check_applied(migrations: List[Migration], applied: dict):
+    for migration in migrations:
+        checksum = applied.get(migration.version)
+        if checksum is not None and checksum != migration.checksum:
+            raise Exception(
+                f"{migration!r} was changed after it was applied; put schema changes in a new migration"
+            )
+
+async def _migrate(database_url: str, migrations: List[Migration], dry_run: bool) -> List[Migration]:
+    connection = await asyncpg.connect(database_url)
+    try:
+        # Held for the whole run: a second runner waits, then finds nothing pending
+        await connection.execute("SELECT pg_advisory_lock(hashtext('schema_migrations'))")
+        try:
+            applied = await _applied_versions(connection)
+            _check_applied(migrations, applied)
+            pending = [migration for migration in migrations if migration.version not in applied]
+            if dry_run:
+                return pending
+            for migration in pending:
+                async with connection.transaction():
+                    await connection.execute(migration.sql)
+                    await connection.execute(
+                        "INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3)",
+                        migration.version, migration.name, migration.checksum
+                    )
+                print(f"   ✅ Applied {migration.version:04d}_{migration.name}")
+            return pending
+        finally:
+            await connection.execute("SELECT pg_advisory_unlock(hashtext('schema_migrations'))")
+    finally:
+        await connection.close()
+
+def apply_migrations(database_url: Optional[str] = None, migrations: List[Migration] = None) -> List[Migration]:
+    """Apply every pending migration in version order; returns the ones applied"""
+    if asyncpg is None:
+        raise Exception("asyncpg is required to apply migrations (pip install asyncpg)")
+    return asyncio.run(_migrate(database_url or DATABASE_URL, migrations or load_migrations(), dry_run=False))
+
+def pending_migrations(database_url: Optional[str] = None, migrations: List[Migration] = None) -> List[Migration]:
+    """Migrations not yet recorded in schema_migrations (nothing is applied)"""
+    if asyncpg is None:
+        raise Exception("asyncpg is required to read the migration status (pip install asyncpg)")
+    return asyncio.run(_migrate(database_url or DATABASE_URL, migrations or load_migrations(), dry_run=True))
@@ -0,0 +1,132 @@
+import os
+import time
+import math
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+from app.services.metrics import counter
+
+try:
+    import redis
+except ImportError:  # optional: without it buckets are per worker process
+    redis = None
+
+# Token-bucket rate limiting for /chat.
+# Each bucket holds up to `burst` tokens and refills at `per_minute` tokens a minute;
+# a request takes one token or is rejected with the seconds until one is available.
+# With REDIS_URL set the buckets live in Redis (one atomic script per check), so
+# all workers and nodes share them; otherwise each worker keeps its own.
+CHAT_RATE_LIMIT_ENABLED = os.getenv("CHAT_RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+CHAT_SESSION_RATE_PER_MINUTE = float(os.getenv("CHAT_SESSION_RATE_PER_MINUTE", "10"))
+CHAT_SESSION_BURST = int(os.getenv("CHAT_SESSION_BURST", "5"))
+CHAT_ROOM_RATE_PER_MINUTE = float(os.getenv("CHAT_ROOM_RATE_PER_MINUTE", "20"))
+CHAT_ROOM_BURST = int(os.getenv("CHAT_ROOM_BURST", "10"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+rate_limited_requests = counter("rate_limited_requests_total", "Requests rejected by rate limiting", ("scope",))
+
+# KEYS[1] bucket; ARGV: burst, refill per second, now (seconds), cost
+_TOKEN_BUCKET_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {allowed, tostring(retry_after)}
+"""
+
+class MemoryBucketStore:
+    """Buckets in this process (per worker)"""
+
+    def __init__(self, max_keys: int = 100000):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def take(self, key: str, burst: int, rate_per_second: float, cost: float = 1) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate_per_second)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (cost - tokens) / rate_per_second
+            if len(self._buckets) > self._max_keys:
+                self._evict_full(now, burst, rate_per_second)
+        return allowed, retry_after
+
+    def _evict_full(self, now: float, burst: int, rate_per_second: float):
+        # A bucket that has refilled completely is the same as no bucket
+        full_after = burst / rate_per_second
+        for key, (_, updated) in list(self._buckets.items()):
+            if now - updated >= full_after:
+                del self._buckets[key]
+
+class RedisBucketStore:
+    """Buckets shared by every worker through Redis"""
+
+    def __init__(self, url: str):
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._script = self._client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    def take(self, key: str, burst: int, rate_per_second: float, cost: float = 1) -> Tuple[bool, float]:
+        allowed, retry_after = self._script(keys=[f"ratelimit:{key}"], args=[burst, rate_per_second, time.time(), cost])
+        return bool(int(allowed)), float(retry_after)
+
+_store = None
+_store_lock = threading.Lock()
+
+def _get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            if REDIS_URL and redis is not None:
+                _store = RedisBucketStore(REDIS_URL)
+            else:
+                if REDIS_URL:
+                    print("Warning: REDIS_URL is set but the redis package is missing; rate limits are per worker")
+                _store = MemoryBucketStore()
+        return _store
+
+def _hash_key(value: str) -> str:
+    # Session tokens are credentials: never use them verbatim as store keys
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+def _check(scope: str, key: str, per_minute: float, burst: int) -> Optional[int]:
+    """Take a token; returns None when allowed, else whole seconds to wait"""
+    if not CHAT_RATE_LIMIT_ENABLED or per_minute <= 0:
+        return None
+    try:
+        allowed, retry_after = _get_store().take(f"{scope}:{key}", burst, per_minute / 60)
+    except Exception as e:
+        # Fail open: a broken limiter store must not take the chat down
+        print(f"Rate limiter error ({scope}): {e}")
+        return None
+    if allowed:
+        return None
+    rate_limited_requests.inc(scope)
+    return max(1, math.ceil(retry_after))
+
+def check_session_rate_limit(session_token: str) -> Optional[int]:
+    """Per-session chat limit; runs before the token is verified, so it costs no DB call"""
+    return _check("chat_session", _hash_key(session_token), CHAT_SESSION_RATE_PER_MINUTE, CHAT_SESSION_BURST)
+
+def check_room_rate_limit(room_number: str) -> Optional[int]:
+    """Per-room chat limit, shared by every session for the room"""
+    return _check("chat_room", room_number, CHAT_ROOM_RATE_PER_MINUTE, CHAT_ROOM_BURST)
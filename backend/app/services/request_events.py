@@ -0,0 +1,104 @@
+from typing import Dict, List, Optional
+
+# request_history is the append-only event log for service requests.
+# Every change is one event row; service_requests and customer_request_history are
+# projections of that log. In Postgres the apply_request_event() trigger keeps them
+# up to date in the same transaction as the insert; apply_event() below is the same
+# reducer in Python, used for snapshots and projection rebuilds.
+
+# Event types written by db_services
+EVENT_CREATED = "created"
+EVENT_ASSIGNED = "assigned"
+EVENT_STATUS_CHANGED = "status_changed"
+EVENT_PRIORITY_CHANGED = "priority_changed"
+EVENT_CANCELLED = "cancelled"
+EVENT_DELETED = "deleted"
+# A repeat of an open request inside the dedup window; may bump its priority
+EVENT_MERGED = "merged"
+# Full-state event backfilled for requests that predate the event log;
+# the trigger ignores it because the projections already hold that state
+EVENT_IMPORTED = "imported"
+
+# Lowest to highest, as the service_requests.priority CHECK allows; a merged repeat
+# only ever raises priority
+PRIORITY_ORDER = ("normal", "urgent", "emergency")
+# Other words the model's free-text priority drifts to
+PRIORITY_ALIASES = {"low": "normal", "medium": "normal", "high": "urgent", "critical": "emergency"}
+
+# Requests still waiting on staff
+OPEN_STATUSES = ("pending", "acknowledged", "assigned", "in_progress")
+
+# Columns a non-creation event may patch
+PATCH_FIELDS = ("status", "priority", "description", "notes", "assigned_staff_id", "assigned_by", "assigned_at")
+
+SERVICE_REQUEST_COLUMNS = (
+    "id", "room_number", "request_type", "description", "priority", "status", "assigned_staff_id",
+    "assigned_by", "assigned_at", "notes", "created_at", "updated_at", "session_token"
+)
+
+CUSTOMER_HISTORY_COLUMNS = (
+    "customer_name", "room_number", "request_type", "description", "priority", "status", "notes",
+    "assigned_staff_id", "assigned_by", "assigned_at", "session_token", "created_at", "deleted_at"
+)
+
+def normalize_priority(priority: Optional[str]) -> str:
+    """A priority the schema accepts: aliases are mapped, anything unknown becomes normal"""
+    priority = (priority or "").strip().lower()
+    priority = PRIORITY_ALIASES.get(priority, priority)
+    return priority if priority in PRIORITY_ORDER else "normal"
+
+def apply_event(state: Optional[dict], event: dict) -> Optional[dict]:
+    """Fold one event into a request's state (None for a request not yet created)"""
+    payload = event.get("payload") or {}
+    action = event.get("action")
+
+    if action in (EVENT_CREATED, EVENT_IMPORTED):
+        state = {column: None for column in SERVICE_REQUEST_COLUMNS}
+        state.update({
+            "id": event["request_id"],
+            "room_number": payload.get("room_number"),
+            "request_type": payload.get("request_type"),
+            "description": payload.get("description"),
+            "priority": payload.get("priority") or "normal",
+            "status": payload.get("status") or "pending",
+            "session_token": payload.get("session_token"),
+            "customer_name": payload.get("customer_name") or "Unknown Guest",
+            "created_at": payload.get("created_at") or event.get("timestamp"),
+            "deleted_at": None
+        })
+        if action == EVENT_IMPORTED:
+            for field in PATCH_FIELDS:
+                state[field] = payload.get(field, state[field])
+    elif state is None:
+        # Events whose creation was never seen (e.g. legacy rows) are skipped
+        return None
+    else:
+        state = dict(state)
+        for field in PATCH_FIELDS:
+            if payload.get(field) is not None:
+                state[field] = payload[field]
+        if action == EVENT_DELETED:
+            state["deleted_at"] = event.get("timestamp")
+
+    state["updated_at"] = event.get("timestamp")
+    state["last_seq"] = event.get("seq")
+    return state
+
+def replay(events: List[dict], states: Dict[str, dict] = None) -> Dict[str, dict]:
+    """Apply events (in seq order) on top of known states, keyed by request id"""
+    states = dict(states or {})
+    for event in sorted(events, key=lambda e: e.get("seq") or 0):
+        new_state = apply_event(states.get(event["request_id"]), event)
+        if new_state is not None:
+            states[event["request_id"]] = new_state
+    return states
+
+def service_request_row(state: dict) -> dict:
+    """The service_requests projection of a request state"""
+    return {column: state.get(column) for column in SERVICE_REQUEST_COLUMNS}
+
+def customer_history_row(state: dict) -> dict:
+    """The customer_request_history projection of a request state"""
+    row = {column: state.get(column) for column in CUSTOMER_HISTORY_COLUMNS}
+    row["original_request_id"] = state["id"]
+    return row
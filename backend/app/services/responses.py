@@ -0,0 +1,27 @@
+import os
+import json
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: without it FastJSONResponse uses the standard library
+    orjson = None
+
+# JSON response class for large list endpoints.
+# Routes that return FastJSONResponse(...) directly skip FastAPI's jsonable_encoder
+# walk and response-model validation of every row: the rows from db_services are
+# already plain dicts of JSON types, so they are serialized once, by orjson when it
+# is installed (datetimes as RFC 3339, anything unknown via str()).
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_ENABLED", "true").lower() in ("1", "true", "yes")
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None and FAST_JSON_ENABLED:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (compact, UTF-8)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
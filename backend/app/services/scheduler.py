@@ -0,0 +1,148 @@
+import os
+import asyncio
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from app.services.metrics import gauge
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every worker assumes leadership
+    fcntl = None
+
+# In-process periodic job runner.
+# With `uvicorn --workers N` every worker starts the scheduler, but only the worker
+# holding the host-wide lock file actually runs jobs. Jobs that must also be unique
+# across nodes coordinate in the database (see cleanup_expired_sessions_batch).
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+SCHEDULER_LOCK_PATH = os.getenv(
+    "SCHEDULER_LOCK_PATH",
+    os.path.join(tempfile.gettempdir(), "hotel-service-scheduler.lock")
+)
+
+class PeriodicJob:
+    """A function run every `interval_seconds` by the scheduler leader"""
+
+    def __init__(self, name: str, interval_seconds: float, func: Callable[[], Optional[dict]]):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self.stats = {
+            "runs": 0,
+            "errors": 0,
+            "last_run_at": None,
+            "last_duration_ms": None,
+            "last_result": None,
+            "last_error": None,
+            "running": False
+        }
+
+_jobs: Dict[str, PeriodicJob] = {}
+_tasks: Dict[str, asyncio.Task] = {}
+_lock_file = None
+
+gauge("scheduler_job_running", "Whether a background job is running in this worker", ("job",),
+      lambda: {(name,): int(job.stats["running"]) for name, job in _jobs.items()})
+gauge("scheduler_job_runs_total", "Background job runs by job and outcome", ("job", "outcome"),
+      lambda: {key: value for name, job in _jobs.items() for key, value in (
+          ((name, "ok"), job.stats["runs"] - job.stats["errors"]), ((name, "error"), job.stats["errors"]))},
+      kind="counter")
+gauge("scheduler_is_leader", "Whether this worker holds the scheduler lock", (),
+      lambda: {(): int(_lock_file is not None)})
+
+def register_job(name: str, interval_seconds: float, func: Callable[[], Optional[dict]]) -> Optional[PeriodicJob]:
+    """Register a periodic job; an interval of 0 or less disables it"""
+    if interval_seconds <= 0:
+        print(f"Scheduler: job '{name}' disabled (interval {interval_seconds})")
+        return None
+    job = PeriodicJob(name, interval_seconds, func)
+    _jobs[name] = job
+    return job
+
+def get_job_stats() -> dict:
+    """Return run statistics for every registered job"""
+    return {
+        "is_leader": _lock_file is not None,
+        "jobs": {name: dict(job.stats, interval_seconds=job.interval_seconds) for name, job in _jobs.items()}
+    }
+
+def _try_become_leader() -> bool:
+    """Take the host-wide scheduler lock without blocking; keep it once held"""
+    global _lock_file
+    if _lock_file is not None:
+        return True
+    if fcntl is None:
+        _lock_file = True
+        return True
+
+    lock_file = open(SCHEDULER_LOCK_PATH, "a")
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+
+    _lock_file = lock_file
+    print(f"Scheduler: worker {os.getpid()} is the scheduler leader")
+    return True
+
+def _release_leadership():
+    global _lock_file
+    if _lock_file is not None and _lock_file is not True:
+        try:
+            fcntl.flock(_lock_file.fileno(), fcntl.LOCK_UN)
+        finally:
+            _lock_file.close()
+    _lock_file = None
+
+def run_job_now(job: PeriodicJob) -> Optional[dict]:
+    """Run a job synchronously and record its statistics"""
+    started = time.perf_counter()
+    job.stats["last_run_at"] = datetime.utcnow().isoformat()
+    job.stats["running"] = True
+    try:
+        result = job.func()
+        job.stats["last_result"] = result
+        job.stats["last_error"] = None
+        return result
+    except Exception as e:
+        job.stats["errors"] += 1
+        job.stats["last_error"] = str(e)
+        print(f"Scheduler: job '{job.name}' failed: {e}")
+        return None
+    finally:
+        job.stats["runs"] += 1
+        job.stats["running"] = False
+        job.stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+async def _job_loop(job: PeriodicJob):
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(job.interval_seconds)
+        if not _try_become_leader():
+            continue
+        # db_services is synchronous; keep it off the event loop
+        await loop.run_in_executor(None, run_job_now, job)
+
+def start_scheduler():
+    """Start a background task per registered job (call from a startup hook)"""
+    if not SCHEDULER_ENABLED:
+        print("Scheduler: disabled via SCHEDULER_ENABLED")
+        return
+
+    for name, job in _jobs.items():
+        if name not in _tasks:
+            _tasks[name] = asyncio.get_running_loop().create_task(_job_loop(job))
+
+async def stop_scheduler():
+    """Cancel job tasks and hand the leader lock to another worker"""
+    for task in _tasks.values():
+        task.cancel()
+    for task in _tasks.values():
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _tasks.clear()
+    _release_leadership()
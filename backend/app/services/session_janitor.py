@@ -0,0 +1,75 @@
+import os
+from app.services.db_services import cleanup_expired_sessions
+from app.services.scheduler import register_job
+from app.services.cache import get_shared_store
+from app.services.metrics import gauge
+
+# Expired guest/admin session cleanup, run by the scheduler leader
+SESSION_CLEANUP_INTERVAL_SECONDS = float(os.getenv("SESSION_CLEANUP_INTERVAL_SECONDS", "900"))
+SESSION_CLEANUP_BATCH_SIZE = int(os.getenv("SESSION_CLEANUP_BATCH_SIZE", "500"))
+SESSION_CLEANUP_MAX_BATCHES = int(os.getenv("SESSION_CLEANUP_MAX_BATCHES", "20"))
+
+# Cumulative rows-deleted metrics for this worker
+janitor_stats = {
+    "guest_sessions_deleted_total": 0,
+    "admin_sessions_deleted_total": 0,
+    "batches_total": 0,
+    "skipped_runs": 0
+}
+
+def _deleted_totals() -> dict:
+    """Deletions by whichever worker ran the job, from the shared store (Redis when configured);
+    without Redis only the leader's own process counts them"""
+    totals = {}
+    for table in ("guest_sessions", "admin_sessions"):
+        try:
+            totals[(table,)] = get_shared_store().get_counter(f"janitor:{table}_deleted")
+        except Exception:
+            totals[(table,)] = janitor_stats[f"{table}_deleted_total"]
+    return totals
+
+# Every worker reports the same shared total: aggregate with max(), not sum()
+gauge("session_janitor_deleted_total", "Expired sessions deleted by the session janitor (all workers)",
+      ("table",), _deleted_totals, kind="counter")
+
+def _publish_deleted(deleted: dict):
+    for table in ("guest_sessions", "admin_sessions"):
+        if deleted[table]:
+            try:
+                get_shared_store().incr(f"janitor:{table}_deleted", deleted[table])
+            except Exception as e:
+                print(f"Error publishing session janitor stats: {e}")
+
+def get_janitor_stats() -> dict:
+    """This worker's run counts, plus the deletions made by every worker"""
+    shared = {f"{table}_deleted_all_workers": value for (table,), value in _deleted_totals().items()}
+    return dict(janitor_stats, **shared)
+
+def run_session_cleanup() -> dict:
+    """Delete expired sessions in bounded batches until a batch comes back short
+    (expired guest sessions are archived, see cleanup_expired_sessions_batch)"""
+    deleted = {"guest_sessions": 0, "admin_sessions": 0, "batches": 0}
+
+    for _ in range(SESSION_CLEANUP_MAX_BATCHES):
+        batch = cleanup_expired_sessions(batch_size=SESSION_CLEANUP_BATCH_SIZE)
+        if batch.get("skipped"):
+            # Another node holds the cleanup lock (or the DB is not configured)
+            janitor_stats["skipped_runs"] += 1
+            break
+
+        deleted["batches"] += 1
+        deleted["guest_sessions"] += batch["guest_sessions"]
+        deleted["admin_sessions"] += batch["admin_sessions"]
+
+        if max(batch["guest_sessions"], batch["admin_sessions"]) < SESSION_CLEANUP_BATCH_SIZE:
+            break
+
+    janitor_stats["guest_sessions_deleted_total"] += deleted["guest_sessions"]
+    janitor_stats["admin_sessions_deleted_total"] += deleted["admin_sessions"]
+    janitor_stats["batches_total"] += deleted["batches"]
+    _publish_deleted(deleted)
+    return deleted
+
+def register_session_janitor():
+    """Schedule the cleanup job with the configured interval"""
+    return register_job("session_cleanup", SESSION_CLEANUP_INTERVAL_SECONDS, run_session_cleanup)
@@ -0,0 +1,70 @@
+import os
+from app.services.db_services import (
+    iter_table_columns,
+    get_request_events_after,
+    get_request_snapshots,
+    upsert_request_snapshots,
+    get_snapshot_checkpoint,
+    replace_request_projections
+)
+from app.services.request_events import replay, service_request_row, customer_history_row
+from app.services.scheduler import register_job
+
+# Periodic per-request snapshots of the request event log, so projections can be
+# rebuilt from the latest snapshot plus a short tail of events instead of a full replay
+SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("SNAPSHOT_INTERVAL_SECONDS", "3600"))
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "1000"))
+SNAPSHOT_MAX_BATCHES = int(os.getenv("SNAPSHOT_MAX_BATCHES", "50"))
+
+def take_snapshots() -> dict:
+    """Fold events newer than the snapshot checkpoint into per-request snapshots"""
+    checkpoint = get_snapshot_checkpoint()
+    snapshotted = 0
+
+    for _ in range(SNAPSHOT_MAX_BATCHES):
+        events = get_request_events_after(checkpoint, limit=SNAPSHOT_BATCH_SIZE)
+        if not events:
+            break
+
+        request_ids = list({event["request_id"] for event in events})
+        states = {row["request_id"]: row["state"] for row in get_request_snapshots(request_ids)}
+        states = replay(events, states)
+
+        upsert_request_snapshots([
+            {"request_id": request_id, "state": states[request_id], "last_seq": states[request_id]["last_seq"]}
+            for request_id in request_ids if request_id in states
+        ])
+        snapshotted += len(request_ids)
+        checkpoint = events[-1]["seq"]
+
+        if len(events) < SNAPSHOT_BATCH_SIZE:
+            break
+
+    return {"requests_snapshotted": snapshotted, "checkpoint": checkpoint}
+
+def rebuild_projections() -> dict:
+    """Rebuild service_requests and customer_request_history from snapshots plus newer events"""
+    take_snapshots()
+    states = {
+        row["request_id"]: row["state"]
+        for row in iter_table_columns("request_snapshots", "request_id, state, last_seq", "last_seq")
+    }
+
+    # Only the tail written since the last snapshot pass needs replaying
+    checkpoint = get_snapshot_checkpoint()
+    while True:
+        events = get_request_events_after(checkpoint, limit=SNAPSHOT_BATCH_SIZE)
+        states = replay(events, states)
+        if len(events) < SNAPSHOT_BATCH_SIZE:
+            break
+        checkpoint = events[-1]["seq"]
+
+    live = [service_request_row(state) for state in states.values() if not state.get("deleted_at")]
+    deleted_ids = [state["id"] for state in states.values() if state.get("deleted_at")]
+    history = [customer_history_row(state) for state in states.values()]
+    replace_request_projections(live, deleted_ids, history)
+    return {"service_requests": len(live), "deleted": len(deleted_ids), "customer_request_history": len(history)}
+
+def register_snapshot_job():
+    """Schedule periodic snapshots with the configured interval"""
+    return register_job("request_snapshots", SNAPSHOT_INTERVAL_SECONDS, take_snapshots)
@@ -0,0 +1,25 @@
+from app.services.storage.local_client import LocalClient
+from app.services.storage.memory_store import MemoryStore
+from app.services.storage.sqlite_store import SQLiteStore
+from app.services.storage.schema import normalize_guest_name
+from app.services.storage.seed import backfill_guest_roster, seed_demo_data
+
+LOCAL_BACKENDS = ("sqlite", "memory")
+
+def create_local_client(backend: str, sqlite_path: str = None, seed_demo: bool = True) -> LocalClient:
+    """Build a Supabase-compatible client backed by SQLite or process memory"""
+    if backend == "sqlite":
+        store = SQLiteStore(sqlite_path)
+    elif backend == "memory":
+        store = MemoryStore()
+    else:
+        raise ValueError(f"Unknown local storage backend: {backend}")
+
+    client = LocalClient(store, backend)
+    if seed_demo:
+        seed_demo_data(client)
+    backfill_guest_roster(client)
+    return client
+
+__all__ = ["LOCAL_BACKENDS", "LocalClient", "MemoryStore", "SQLiteStore", "backfill_guest_roster", "create_local_client",
+           "normalize_guest_name", "seed_demo_data"]
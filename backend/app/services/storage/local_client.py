@@ -0,0 +1,404 @@
+import re
+from typing import List, Optional, Tuple
+from app.services.request_events import (
+    EVENT_CREATED,
+    EVENT_DELETED,
+    EVENT_IMPORTED,
+    PATCH_FIELDS,
+    apply_event,
+    service_request_row,
+    customer_history_row
+)
+from app.services.storage.schema import (
+    TABLES,
+    FOREIGN_KEYS,
+    TOUCH_ON_UPDATE,
+    apply_defaults,
+    apply_generated,
+    now_iso
+)
+
+# A local stand-in for the Supabase client.
+# db_services talks to storage through the PostgREST query-builder interface
+# (`client.table(...).select(...).eq(...).execute()` and `client.rpc(...)`);
+# LocalClient implements the subset of that interface db_services uses on top of a
+# row store (SQLiteStore or MemoryStore), including embedded resources such as
+# "*, staff_members(full_name)", the request event projection trigger and the RPCs.
+
+# A filter is (column, operator, value, negated)
+Filter = Tuple[str, str, object, bool]
+
+class LocalResponse:
+    """Mimics the postgrest APIResponse shape"""
+
+    def __init__(self, data: list):
+        self.data = data
+        self.count = None
+
+def _split_top_level(columns: str) -> List[str]:
+    """Split a select string on commas that are not inside parentheses"""
+    parts, depth, current = [], 0, ""
+    for char in columns:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+def parse_select(columns: str):
+    """Parse a PostgREST select into (base columns or None for *, [(table, inner, sub columns)])"""
+    base, embeds = [], []
+    for part in _split_top_level(columns or "*"):
+        match = re.match(r"^(\w+)(!inner)?\((.*)\)$", part, re.S)
+        if match:
+            embeds.append((match.group(1), bool(match.group(2)), parse_select(match.group(3))[0]))
+        elif part == "*":
+            base = None
+        elif base is not None:
+            base.append(part)
+    return base, embeds
+
+def _ilike_regex(pattern: str):
+    escaped = re.escape(str(pattern)).replace("%", ".*").replace(r"\*", ".*").replace("_", ".")
+    return re.compile(f"^{escaped}$", re.I | re.S)
+
+def row_matches(row: dict, filters: List[Filter]) -> bool:
+    """Evaluate filters against a row in Python (SQL NULL semantics)"""
+    for column, op, value, negated in filters:
+        current = row.get(column)
+        if op == "is":
+            result = current is value if value is None else current == value
+        elif op == "in":
+            result = current is not None and current in value
+        elif current is None:
+            result = False
+        elif op == "eq":
+            result = current == value
+        elif op == "neq":
+            result = current != value
+        elif op == "gt":
+            result = current > value
+        elif op == "gte":
+            result = current >= value
+        elif op == "lt":
+            result = current < value
+        elif op == "lte":
+            result = current <= value
+        elif op in ("like", "ilike"):
+            result = bool(_ilike_regex(value).match(str(current))) if op == "ilike" else \
+                bool(re.match("^" + re.escape(str(value)).replace("%", ".*") + "$", str(current), re.S))
+        else:
+            raise Exception(f"Unsupported filter operator: {op}")
+        if result == negated:
+            return False
+    return True
+
+def _is_value(value):
+    if value is None or str(value).lower() == "null":
+        return None
+    if str(value).lower() in ("true", "false"):
+        return str(value).lower() == "true"
+    return value
+
+class LocalQuery:
+    """Chainable query builder with the postgrest-py method names db_services uses"""
+
+    def __init__(self, client: "LocalClient", table: str):
+        if table not in TABLES:
+            raise Exception(f"Could not find the table '{table}' in the schema cache")
+        self._client = client
+        self.table = table
+        self.action = "select"
+        self.columns = "*"
+        self.values = None
+        self.on_conflict = None
+        self.filters: List[Filter] = []
+        self.embedded_filters: List[Filter] = []
+        self.orders: List[Tuple[str, bool]] = []
+        self.limit_count: Optional[int] = None
+        self.offset = 0
+        self._negate_next = False
+
+    # Actions
+    def select(self, columns: str = "*", count=None):
+        self.action, self.columns = "select", columns
+        return self
+
+    def insert(self, values, **kwargs):
+        self.action, self.values = "insert", values
+        return self
+
+    def upsert(self, values, on_conflict: str = "", **kwargs):
+        self.action, self.values, self.on_conflict = "upsert", values, on_conflict or "id"
+        return self
+
+    def update(self, values: dict, **kwargs):
+        self.action, self.values = "update", values
+        return self
+
+    def delete(self, **kwargs):
+        self.action = "delete"
+        return self
+
+    # Filters
+    @property
+    def not_(self):
+        self._negate_next = True
+        return self
+
+    def _filter(self, column: str, op: str, value):
+        negated, self._negate_next = self._negate_next, False
+        target = self.embedded_filters if "." in column else self.filters
+        target.append((column, op, value, negated))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def like(self, column, pattern):
+        return self._filter(column, "like", pattern)
+
+    def ilike(self, column, pattern):
+        return self._filter(column, "ilike", pattern)
+
+    def is_(self, column, value):
+        return self._filter(column, "is", _is_value(value))
+
+    def in_(self, column, values):
+        return self._filter(column, "in", list(values))
+
+    # Modifiers
+    def order(self, column: str, desc: bool = False, **kwargs):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self.limit_count = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs):
+        self.offset, self.limit_count = start, end - start + 1
+        return self
+
+    def execute(self) -> LocalResponse:
+        return LocalResponse(self._client.execute_query(self))
+
+class LocalRpc:
+    def __init__(self, client: "LocalClient", name: str, params: dict):
+        self._client, self._name, self._params = client, name, params or {}
+
+    def execute(self) -> LocalResponse:
+        function = LOCAL_FUNCTIONS.get(self._name)
+        if function is None:
+            raise Exception(f"Could not find the function {self._name} in the schema cache")
+        return LocalResponse(function(self._client, **self._params))
+
+class LocalClient:
+    """Supabase-compatible client over a local row store"""
+
+    def __init__(self, store, backend: str):
+        self.store = store
+        self.backend = backend
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self, name)
+
+    def from_(self, name: str) -> LocalQuery:
+        return self.table(name)
+
+    def rpc(self, name: str, params: dict = None) -> LocalRpc:
+        return LocalRpc(self, name, params)
+
+    # Query execution
+    def execute_query(self, query: LocalQuery) -> list:
+        if query.action == "select":
+            return self._select(query)
+        if query.action == "insert":
+            return self._insert(query.table, query.values)
+        if query.action == "upsert":
+            return self._upsert(query.table, query.values, query.on_conflict)
+        if query.action == "update":
+            return self._update(query.table, query.filters, query.values)
+        if query.action == "delete":
+            return self.store.delete(query.table, query.filters)
+        raise Exception(f"Unsupported action: {query.action}")
+
+    def _select(self, query: LocalQuery) -> list:
+        base_columns, embeds = parse_select(query.columns)
+        inner = any(is_inner for _, is_inner, _ in embeds)
+
+        # Inner embeds filter parents, so they must be applied before limit/offset
+        if inner:
+            rows = self.store.select(query.table, query.filters, query.orders)
+        else:
+            rows = self.store.select(query.table, query.filters, query.orders, query.limit_count, query.offset)
+
+        for related, is_inner, sub_columns in embeds:
+            rows = self._embed(query.table, rows, related, is_inner, sub_columns, query.embedded_filters)
+
+        if inner:
+            end = None if query.limit_count is None else query.offset + query.limit_count
+            rows = rows[query.offset:end]
+
+        if base_columns is not None:
+            keep = set(base_columns) | {related for related, _, _ in embeds}
+            rows = [{k: v for k, v in row.items() if k in keep} for row in rows]
+        return rows
+
+    def _embed(self, table: str, rows: list, related: str, is_inner: bool, sub_columns, embedded_filters) -> list:
+        key = FOREIGN_KEYS.get((table, related))
+        if key is None:
+            raise Exception(f"Could not find a relationship between '{table}' and '{related}'")
+        local_column, remote_column = key
+
+        values = list({row[local_column] for row in rows if row.get(local_column) is not None})
+        filters = [(remote_column, "in", values, False)] + [
+            (column.split(".", 1)[1], op, value, negated)
+            for column, op, value, negated in embedded_filters if column.split(".", 1)[0] == related
+        ]
+        related_rows = {r[remote_column]: r for r in self.store.select(related, filters)} if values else {}
+
+        embedded = []
+        for row in rows:
+            match = related_rows.get(row.get(local_column))
+            if match is None and is_inner:
+                continue
+            if match is not None and sub_columns is not None:
+                match = {k: v for k, v in match.items() if k in sub_columns}
+            embedded.append(dict(row, **{related: match}))
+        return embedded
+
+    def _insert(self, table: str, values) -> list:
+        rows = values if isinstance(values, list) else [values]
+        with self.store.transaction():
+            full_rows = [apply_defaults(table, row) for row in rows]
+            if table == "request_history":
+                next_seq = (self.store.max_value(table, "seq") or 0) + 1
+                for offset, row in enumerate(full_rows):
+                    row["seq"] = next_seq + offset
+                    self._apply_request_event(row)
+            return self.store.insert(table, full_rows)
+
+    def _update(self, table: str, filters: List[Filter], values: dict) -> list:
+        for column in values:
+            if column not in TABLES[table]:
+                raise Exception(f"Could not find the '{column}' column of '{table}'")
+        values = apply_generated(table, values)
+        if table in TOUCH_ON_UPDATE:
+            values = dict(values, updated_at=now_iso())
+        return self.store.update(table, filters, values)
+
+    def _upsert(self, table: str, values, on_conflict: str) -> list:
+        rows = values if isinstance(values, list) else [values]
+        keys = [key.strip() for key in on_conflict.split(",")]
+        result = []
+        with self.store.transaction():
+            for row in rows:
+                existing = self.store.select(table, [(key, "eq", row.get(key), False) for key in keys], limit=1)
+                if existing:
+                    changes = {k: v for k, v in row.items() if k != "id"}
+                    result.extend(self._update(table, [("id", "eq", existing[0]["id"], False)], changes))
+                else:
+                    result.extend(self._insert(table, row))
+        return result
+
+    def _apply_request_event(self, event: dict):
+        """Python version of the apply_request_event() Postgres trigger"""
+        action, request_id = event["action"], event["request_id"]
+        payload = event.get("payload") or {}
+        if action == EVENT_IMPORTED:
+            return
+
+        if action == EVENT_CREATED:
+            state = apply_event(None, event)
+            self.store.insert("service_requests", [apply_defaults("service_requests", service_request_row(state))])
+            history = customer_history_row(state)
+            history.pop("deleted_at", None)
+            self.store.insert("customer_request_history", [apply_defaults("customer_request_history", history)])
+            return
+
+        by_request = [("id", "eq", request_id, False)]
+        previous = self.store.select("service_requests", by_request, limit=1)
+        if not previous:
+            raise Exception(f"Service request {request_id} not found")
+        event["payload"] = dict(
+            payload, previous_status=previous[0]["status"], previous_priority=previous[0]["priority"]
+        )
+
+        by_original = [("original_request_id", "eq", request_id, False)]
+        if action == EVENT_DELETED:
+            self.store.delete("service_requests", by_request)
+            self.store.update("customer_request_history", by_original, {"deleted_at": event["timestamp"]})
+            return
+
+        # Every event touches updated_at, as the UPDATE in the Postgres trigger does
+        patch = {field: payload[field] for field in PATCH_FIELDS if payload.get(field) is not None}
+        self.store.update("service_requests", by_request, dict(patch, updated_at=event["timestamp"]))
+        if patch:
+            self.store.update("customer_request_history", by_original, patch)
+
+# Local implementations of the Postgres functions called through rpc()
+
+def _cleanup_expired_sessions(client: LocalClient) -> list:
+    now = now_iso()
+    for table in ("guest_sessions", "admin_sessions"):
+        client.store.update(
+            table, [("expires_at", "lt", now, False), ("is_active", "eq", True, False)], {"is_active": False}
+        )
+    return []
+
+def _cleanup_expired_sessions_batch(client: LocalClient, batch_size: int = 500) -> list:
+    store, now = client.store, now_iso()
+    with store.transaction():
+        expired_admin = store.select("admin_sessions", [("expires_at", "lt", now, False)], limit=batch_size)
+        admin_deleted = len(store.delete(
+            "admin_sessions", [("id", "in", [row["id"] for row in expired_admin], False)]
+        )) if expired_admin else 0
+
+        expired_guest = store.select(
+            "guest_sessions", [("expires_at", "lt", now, False)], [("created_at", False)], limit=batch_size
+        )
+        guest_deleted = 0
+        if expired_guest:
+            # Occupancy lives in guest_roster: expired sessions move to the archive and
+            # their references are nulled (the ON DELETE SET NULL foreign keys)
+            tokens = [row["session_token"] for row in expired_guest]
+            store.insert("guest_sessions_archive", [
+                apply_defaults("guest_sessions_archive", {
+                    column: row[column] for column in TABLES["guest_sessions_archive"] if column in row
+                }) for row in expired_guest
+            ])
+            for table in ("chat_messages", "service_requests"):
+                store.update(table, [("session_token", "in", tokens, False)], {"session_token": None})
+            guest_deleted = len(store.delete(
+                "guest_sessions", [("id", "in", [row["id"] for row in expired_guest], False)]
+            ))
+
+    return [{"guest_deleted": guest_deleted, "admin_deleted": admin_deleted, "skipped": False}]
+
+LOCAL_FUNCTIONS = {
+    "cleanup_expired_sessions": _cleanup_expired_sessions,
+    "cleanup_expired_sessions_batch": _cleanup_expired_sessions_batch
+}
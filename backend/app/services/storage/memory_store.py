@@ -0,0 +1,64 @@
+import copy
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from app.services.storage.schema import TABLES
+from app.services.storage.local_client import Filter, row_matches
+
+def sort_rows(rows: List[dict], orders: List[Tuple[str, bool]]) -> List[dict]:
+    """Order rows like Postgres: NULLS LAST ascending, NULLS FIRST descending"""
+    for column, desc in reversed(orders or []):
+        rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+    return rows
+
+class MemoryStore:
+    """Process-local row store; data lives only as long as the process"""
+
+    def __init__(self):
+        self._tables: Dict[str, Dict[str, dict]] = {table: {} for table in TABLES}
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def transaction(self):
+        # Writers are serialized; there is no rollback, so callers validate
+        # before writing (as the request event trigger does)
+        with self._lock:
+            yield
+
+    def select(self, table: str, filters: List[Filter], orders: List[Tuple[str, bool]] = None,
+               limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+        with self._lock:
+            rows = [copy.deepcopy(row) for row in self._tables[table].values() if row_matches(row, filters)]
+        rows = sort_rows(rows, orders)
+        end = None if limit is None else offset + limit
+        return rows[offset:end]
+
+    def max_value(self, table: str, column: str):
+        with self._lock:
+            values = [row[column] for row in self._tables[table].values() if row.get(column) is not None]
+        return max(values) if values else None
+
+    def insert(self, table: str, rows: List[dict]) -> List[dict]:
+        with self._lock:
+            for row in rows:
+                if row["id"] in self._tables[table]:
+                    raise Exception(f'duplicate key value violates unique constraint "{table}_pkey"')
+            for row in rows:
+                self._tables[table][row["id"]] = copy.deepcopy(row)
+        return [copy.deepcopy(row) for row in rows]
+
+    def update(self, table: str, filters: List[Filter], values: dict) -> List[dict]:
+        with self._lock:
+            updated = []
+            for row in self._tables[table].values():
+                if row_matches(row, filters):
+                    row.update(copy.deepcopy(values))
+                    updated.append(copy.deepcopy(row))
+        return updated
+
+    def delete(self, table: str, filters: List[Filter]) -> List[dict]:
+        with self._lock:
+            doomed = [row for row in self._tables[table].values() if row_matches(row, filters)]
+            for row in doomed:
+                del self._tables[table][row["id"]]
+        return doomed
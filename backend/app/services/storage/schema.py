@@ -0,0 +1,158 @@
+import uuid
+from datetime import datetime, timedelta
+
+# Table layout for the local (SQLite / in-memory) storage backends.
+# Mirrors the Supabase schema in setup_supabase.py closely enough for db_services.
+
+TEXT, BOOL, INT, JSON, TIMESTAMP = "text", "bool", "int", "json", "timestamp"
+
+TABLES = {
+    "guest_sessions": {
+        "id": TEXT, "room_number": TEXT, "guest_name": TEXT, "session_token": TEXT,
+        "created_at": TIMESTAMP, "expires_at": TIMESTAMP, "is_active": BOOL, "checkout_time": TIMESTAMP,
+        "guest_name_normalized": TEXT
+    },
+    "guest_sessions_archive": {
+        "id": TEXT, "room_number": TEXT, "guest_name": TEXT, "session_token": TEXT,
+        "created_at": TIMESTAMP, "expires_at": TIMESTAMP, "checkout_time": TIMESTAMP, "archived_at": TIMESTAMP
+    },
+    "guest_roster": {
+        "id": TEXT, "room_number": TEXT, "guest_name": TEXT, "guest_name_normalized": TEXT,
+        "checked_in_at": TIMESTAMP, "checkout_time": TIMESTAMP, "created_at": TIMESTAMP
+    },
+    "admin_users": {
+        "id": TEXT, "username": TEXT, "password_hash": TEXT, "full_name": TEXT, "role": TEXT,
+        "created_at": TIMESTAMP, "is_active": BOOL
+    },
+    "staff_members": {
+        "id": TEXT, "staff_id": TEXT, "full_name": TEXT, "department": TEXT, "role": TEXT, "phone": TEXT,
+        "email": TEXT, "shift_start": TEXT, "shift_end": TEXT, "is_available": BOOL,
+        "created_at": TIMESTAMP, "updated_at": TIMESTAMP
+    },
+    "admin_sessions": {
+        "id": TEXT, "admin_user_id": TEXT, "session_token": TEXT, "created_at": TIMESTAMP,
+        "expires_at": TIMESTAMP, "is_active": BOOL
+    },
+    "chat_messages": {
+        "id": TEXT, "room_number": TEXT, "message_text": TEXT, "sender_type": TEXT,
+        "created_at": TIMESTAMP, "session_token": TEXT
+    },
+    "service_requests": {
+        "id": TEXT, "room_number": TEXT, "request_type": TEXT, "description": TEXT, "priority": TEXT,
+        "status": TEXT, "assigned_staff_id": TEXT, "assigned_by": TEXT, "assigned_at": TIMESTAMP,
+        "notes": TEXT, "created_at": TIMESTAMP, "updated_at": TIMESTAMP, "session_token": TEXT
+    },
+    "request_history": {
+        "id": TEXT, "request_id": TEXT, "action": TEXT, "details": TEXT, "user_type": TEXT,
+        "user_id": TEXT, "timestamp": TIMESTAMP, "payload": JSON, "seq": INT
+    },
+    "customer_request_history": {
+        "id": TEXT, "original_request_id": TEXT, "customer_name": TEXT, "room_number": TEXT,
+        "request_type": TEXT, "description": TEXT, "priority": TEXT, "status": TEXT, "notes": TEXT,
+        "assigned_staff_id": TEXT, "assigned_by": TEXT, "assigned_at": TIMESTAMP, "session_token": TEXT,
+        "created_at": TIMESTAMP, "deleted_at": TIMESTAMP
+    },
+    "request_snapshots": {
+        "id": TEXT, "request_id": TEXT, "state": JSON, "last_seq": INT, "updated_at": TIMESTAMP
+    }
+}
+
+# Single-column unique keys (besides id), used for upserts and the SQLite DDL
+UNIQUE_COLUMNS = {
+    "guest_sessions": ["session_token"],
+    "guest_sessions_archive": ["session_token"],
+    "admin_users": ["username"],
+    "staff_members": ["staff_id"],
+    "admin_sessions": ["session_token"],
+    "request_history": ["seq"],
+    "customer_request_history": ["original_request_id"],
+    "request_snapshots": ["request_id"]
+}
+
+# Secondary indexes for the hot queries in db_services (migrations/ holds the Postgres ones;
+# benchmarks/index_check.py checks every query uses one)
+INDEXES = {
+    "guest_sessions": [("room_number", "guest_name_normalized"), ("expires_at",)],
+    "guest_roster": [("room_number", "guest_name_normalized")],
+    "admin_sessions": [("expires_at",)],
+    "staff_members": [("department",)],
+    "chat_messages": [("room_number", "created_at"), ("session_token",), ("created_at",)],
+    "service_requests": [("room_number", "created_at"), ("status", "created_at"), ("created_at",),
+                         ("assigned_staff_id",), ("session_token",)],
+    "request_history": [("request_id", "timestamp"), ("timestamp",)],
+    "customer_request_history": [("created_at",), ("session_token",)],
+    "request_snapshots": [("last_seq",)]
+}
+
+# Embedded resources: (table, related table) -> (local column, related column)
+FOREIGN_KEYS = {
+    ("service_requests", "staff_members"): ("assigned_staff_id", "id"),
+    ("service_requests", "admin_users"): ("assigned_by", "id"),
+    ("service_requests", "guest_sessions"): ("session_token", "session_token"),
+    ("admin_sessions", "admin_users"): ("admin_user_id", "id"),
+    ("chat_messages", "guest_sessions"): ("session_token", "session_token"),
+    ("customer_request_history", "guest_sessions"): ("session_token", "session_token")
+}
+
+# Tables whose updated_at is refreshed on every update (update_updated_at_column trigger)
+TOUCH_ON_UPDATE = {"service_requests", "staff_members"}
+
+def normalize_guest_name(name: str) -> str:
+    """Case- and whitespace-insensitive form of a guest name used for login lookups"""
+    return " ".join((name or "").split()).lower()
+
+# Generated columns (GENERATED ALWAYS AS ... STORED): column -> (source column, function)
+GENERATED = {
+    "guest_sessions": {"guest_name_normalized": ("guest_name", normalize_guest_name)},
+    "guest_roster": {"guest_name_normalized": ("guest_name", normalize_guest_name)}
+}
+
+def now_iso() -> str:
+    return datetime.utcnow().isoformat() + "+00:00"
+
+def _in_hours(hours: int):
+    return lambda: (datetime.utcnow() + timedelta(hours=hours)).isoformat() + "+00:00"
+
+_COMMON_DEFAULTS = {"id": lambda: str(uuid.uuid4()), "created_at": now_iso}
+
+# Column defaults applied on insert, as in the Postgres DDL
+DEFAULTS = {
+    "guest_sessions": {"expires_at": _in_hours(24), "is_active": lambda: True},
+    "guest_sessions_archive": {"archived_at": now_iso},
+    "guest_roster": {"checked_in_at": now_iso},
+    "admin_users": {"role": lambda: "admin", "is_active": lambda: True},
+    "staff_members": {"is_available": lambda: True, "updated_at": now_iso},
+    "admin_sessions": {"expires_at": _in_hours(8), "is_active": lambda: True},
+    "chat_messages": {},
+    "service_requests": {"priority": lambda: "normal", "status": lambda: "pending", "updated_at": now_iso},
+    "request_history": {"timestamp": now_iso, "payload": lambda: {}},
+    "customer_request_history": {"priority": lambda: "normal", "status": lambda: "pending"},
+    "request_snapshots": {"updated_at": now_iso}
+}
+
+def apply_defaults(table: str, row: dict) -> dict:
+    """Build a full row: explicit values (even None) win over column defaults"""
+    columns = TABLES[table]
+    row = apply_generated(table, row)
+    full = {column: None for column in columns}
+    for column, default in list(_COMMON_DEFAULTS.items()) + list(DEFAULTS[table].items()):
+        if column in columns and column not in row:
+            full[column] = default()
+
+    for column, value in row.items():
+        if column not in columns:
+            # Same failure PostgREST reports for unknown columns
+            raise Exception(f"Could not find the '{column}' column of '{table}'")
+        full[column] = value
+    return full
+
+def apply_generated(table: str, values: dict) -> dict:
+    """values plus the generated columns computed from them; generated columns cannot be written"""
+    generated = GENERATED.get(table, {})
+    for column in values:
+        if column in generated:
+            # Same failure Postgres reports for GENERATED ALWAYS columns
+            raise Exception(f'cannot insert a non-DEFAULT value into column "{column}"')
+    return dict(values, **{
+        column: function(values[source]) for column, (source, function) in generated.items() if source in values
+    })
@@ -0,0 +1,57 @@
+import hashlib
+from app.services.storage.schema import normalize_guest_name
+
+# Demo data for a fresh local database; the same rows setup_supabase.py inserts
+
+DEMO_GUESTS = [
+    {"room_number": "101", "guest_name": "John Smith", "session_token": "demo_token_john_smith_101"},
+    {"room_number": "102", "guest_name": "Jane Doe", "session_token": "demo_token_jane_doe_102"}
+]
+
+DEMO_ADMINS = [
+    {"username": "admin", "password_hash": hashlib.sha256("admin123".encode()).hexdigest(),
+     "full_name": "Hotel Administrator", "role": "admin"},
+    {"username": "manager", "password_hash": hashlib.sha256("manager456".encode()).hexdigest(),
+     "full_name": "Hotel Manager", "role": "manager"}
+]
+
+DEMO_STAFF = [
+    {"staff_id": "HK001", "full_name": "Maria Garcia", "department": "Housekeeping", "role": "Housekeeper",
+     "phone": "555-0101", "email": "maria@hotel.com", "shift_start": "08:00:00", "shift_end": "16:00:00"},
+    {"staff_id": "RS001", "full_name": "James Wilson", "department": "Room Service", "role": "Server",
+     "phone": "555-0102", "email": "james@hotel.com", "shift_start": "06:00:00", "shift_end": "14:00:00"},
+    {"staff_id": "MT001", "full_name": "Robert Johnson", "department": "Maintenance", "role": "Technician",
+     "phone": "555-0103", "email": "robert@hotel.com", "shift_start": "07:00:00", "shift_end": "15:00:00"},
+    {"staff_id": "CS001", "full_name": "Sarah Davis", "department": "Concierge", "role": "Concierge",
+     "phone": "555-0104", "email": "sarah@hotel.com", "shift_start": "09:00:00", "shift_end": "17:00:00"}
+]
+
+def seed_demo_data(client) -> bool:
+    """Insert demo guests, admins and staff into an empty database"""
+    if client.table("admin_users").select("id").limit(1).execute().data:
+        return False
+
+    client.table("guest_sessions").insert(DEMO_GUESTS).execute()
+    client.table("guest_roster").insert(
+        [{"room_number": guest["room_number"], "guest_name": guest["guest_name"]} for guest in DEMO_GUESTS]
+    ).execute()
+    client.table("admin_users").insert(DEMO_ADMINS).execute()
+    client.table("staff_members").insert(DEMO_STAFF).execute()
+    return True
+
+def backfill_guest_roster(client) -> int:
+    """Fill an empty guest_roster from the sessions of checked-in guests (databases created before the roster)"""
+    if client.table("guest_roster").select("id").limit(1).execute().data:
+        return 0
+
+    sessions = client.table("guest_sessions").select("room_number, guest_name, created_at").is_(
+        "checkout_time", "null"
+    ).order("created_at").execute().data or []
+    guests = {}
+    for session in sessions:
+        key = (session["room_number"], normalize_guest_name(session["guest_name"]))
+        guests.setdefault(key, {"room_number": session["room_number"], "guest_name": session["guest_name"],
+                                "checked_in_at": session["created_at"]})
+    if guests:
+        client.table("guest_roster").insert(list(guests.values())).execute()
+    return len(guests)
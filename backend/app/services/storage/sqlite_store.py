@@ -0,0 +1,195 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+from app.services.storage.schema import TABLES, UNIQUE_COLUMNS, INDEXES, GENERATED, BOOL, INT, JSON
+from app.services.storage.local_client import Filter
+
+_SQL_TYPES = {BOOL: "INTEGER", INT: "INTEGER", JSON: "TEXT"}
+_OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+class SQLiteStore:
+    """Row store in a single SQLite file (WAL mode), shared by all workers on a host"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._create_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are not thread-safe, and db_services is called from
+        # the event loop, executor threads and the scheduler: one connection per thread
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.depth = 0
+        return connection
+
+    def _create_schema(self):
+        connection = self._connection()
+        for table, columns in TABLES.items():
+            definitions = ", ".join(
+                f'"{name}" {_SQL_TYPES.get(kind, "TEXT")}' + (" PRIMARY KEY" if name == "id" else "")
+                for name, kind in columns.items()
+            )
+            connection.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({definitions})')
+            self._add_missing_columns(table, columns)
+            for column in UNIQUE_COLUMNS.get(table, []):
+                connection.execute(
+                    f'CREATE UNIQUE INDEX IF NOT EXISTS "uq_{table}_{column}" ON "{table}" ("{column}")'
+                )
+            for index_columns in INDEXES.get(table, []):
+                name = f"idx_{table}_{'_'.join(index_columns)}"
+                quoted = ", ".join(f'"{column}"' for column in index_columns)
+                connection.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({quoted})')
+
+    def _add_missing_columns(self, table: str, columns: dict):
+        """ALTER TABLE ... ADD COLUMN for columns added to the schema after the file was created"""
+        connection = self._connection()
+        existing = {row["name"] for row in connection.execute(f'PRAGMA table_info("{table}")')}
+        for name, kind in columns.items():
+            if name in existing:
+                continue
+            connection.execute(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {_SQL_TYPES.get(kind, "TEXT")}')
+            if name in GENERATED.get(table, {}):
+                source, function = GENERATED[table][name]
+                rows = connection.execute(f'SELECT "id", "{source}" FROM "{table}"').fetchall()
+                connection.executemany(
+                    f'UPDATE "{table}" SET "{name}" = ? WHERE "id" = ?',
+                    [(function(row[source]), row["id"]) for row in rows]
+                )
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE so concurrent writers queue on the lock instead of failing mid-way"""
+        connection = self._connection()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+
+        connection.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        else:
+            connection.execute("COMMIT")
+        finally:
+            self._local.depth = 0
+
+    # Value conversion
+    @staticmethod
+    def _encode(table: str, column: str, value):
+        kind = TABLES[table].get(column)
+        if value is None:
+            return None
+        if kind == JSON:
+            return json.dumps(value, default=str)
+        if kind == BOOL:
+            return int(bool(value))
+        return value
+
+    @staticmethod
+    def _decode(table: str, row: sqlite3.Row) -> dict:
+        decoded = {}
+        for column in row.keys():
+            value, kind = row[column], TABLES[table].get(column)
+            if value is not None and kind == JSON:
+                value = json.loads(value)
+            elif value is not None and kind == BOOL:
+                value = bool(value)
+            decoded[column] = value
+        return decoded
+
+    def _where(self, table: str, filters: List[Filter]) -> Tuple[str, list]:
+        clauses, params = [], []
+        for column, op, value, negated in filters:
+            if column not in TABLES[table]:
+                raise Exception(f"column {table}.{column} does not exist")
+            quoted = f'"{column}"'
+            if op == "is":
+                clause = f"{quoted} IS NULL" if value is None else f"{quoted} = ?"
+                if value is not None:
+                    params.append(int(value) if isinstance(value, bool) else value)
+            elif op == "in":
+                if value:
+                    clause = f"{quoted} IN ({', '.join('?' for _ in value)})"
+                    params.extend(self._encode(table, column, v) for v in value)
+                else:
+                    clause = "0"
+            elif op in ("like", "ilike"):
+                pattern = str(value).replace("*", "%")
+                if op == "ilike":
+                    clause = f"lower({quoted}) LIKE lower(?)"
+                else:
+                    clause = f"{quoted} GLOB ?"
+                    pattern = pattern.replace("%", "*").replace("_", "?")
+                params.append(pattern)
+            else:
+                clause = f"{quoted} {_OPERATORS[op]} ?"
+                params.append(self._encode(table, column, value))
+            # NOT keeps SQL NULL semantics: rows where the column is NULL match neither side
+            clauses.append(f"NOT ({clause})" if negated else clause)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def select(self, table: str, filters: List[Filter], orders: List[Tuple[str, bool]] = None,
+               limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+        where, params = self._where(table, filters)
+        sql = f'SELECT * FROM "{table}"{where}'
+        if orders:
+            sql += " ORDER BY " + ", ".join(
+                f'"{column}" ' + ("DESC NULLS FIRST" if desc else "ASC NULLS LAST") for column, desc in orders
+            )
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params += [-1 if limit is None else limit, offset]
+        rows = self._connection().execute(sql, params).fetchall()
+        return [self._decode(table, row) for row in rows]
+
+    def max_value(self, table: str, column: str):
+        return self._connection().execute(f'SELECT MAX("{column}") FROM "{table}"').fetchone()[0]
+
+    def insert(self, table: str, rows: List[dict]) -> List[dict]:
+        if not rows:
+            return []
+        columns = list(TABLES[table])
+        quoted = ", ".join(f'"{column}"' for column in columns)
+        sql = f'INSERT INTO "{table}" ({quoted}) VALUES ({", ".join("?" for _ in columns)})'
+        try:
+            with self.transaction():
+                self._connection().executemany(
+                    sql, [[self._encode(table, c, row.get(c)) for c in columns] for row in rows]
+                )
+        except sqlite3.IntegrityError as e:
+            raise Exception(f"duplicate key value violates unique constraint: {e}")
+        return rows
+
+    def update(self, table: str, filters: List[Filter], values: dict) -> List[dict]:
+        with self.transaction():
+            ids = [row["id"] for row in self.select(table, filters)]
+            if not ids or not values:
+                return self.select(table, [("id", "in", ids, False)]) if ids else []
+            assignments = ", ".join(f'"{column}" = ?' for column in values)
+            params = [self._encode(table, c, v) for c, v in values.items()]
+            where, where_params = self._where(table, [("id", "in", ids, False)])
+            self._connection().execute(f'UPDATE "{table}" SET {assignments}{where}', params + where_params)
+            return self.select(table, [("id", "in", ids, False)])
+
+    def delete(self, table: str, filters: List[Filter]) -> List[dict]:
+        with self.transaction():
+            rows = self.select(table, filters)
+            if rows:
+                where, params = self._where(table, [("id", "in", [row["id"] for row in rows], False)])
+                self._connection().execute(f'DELETE FROM "{table}"{where}', params)
+            return rows
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import uuid
+import random
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Iterable, List, Optional
+
+# Request-scoped tracing.
+# The HTTP middleware opens a trace per request (request ID from X-Request-ID or a
+# new one); db_services functions and the LLM call add spans to it through a
+# contextvar, so nothing has to be passed down explicitly. Spans are always
+# collected (a list append per span); the trace is written to the local exporter
+# when it was sampled or when the request was slow, so slow requests always come
+# with their full breakdown.
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_SLOW_REQUEST_MS = float(os.getenv("TRACE_SLOW_REQUEST_MS", "2000"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", os.path.join(backend_dir, "traces", "spans.ndjson"))
+# Bound memory for long streaming requests
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "500"))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+class Trace:
+    def __init__(self, name: str, request_id: str, sampled: bool):
+        self.trace_id = uuid.uuid4().hex
+        self.request_id = request_id
+        self.name = name
+        self.sampled = sampled
+        self.started_at = datetime.utcnow().isoformat()
+        self.started = time.perf_counter()
+        self.spans: List[dict] = []
+        self.dropped_spans = 0
+        self.finished = False
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+_current_span_id: contextvars.ContextVar = contextvars.ContextVar("current_span_id", default=None)
+_export_lock = threading.Lock()
+
+def get_request_id() -> Optional[str]:
+    """The request ID of the trace active in this context, if any"""
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+def start_trace(name: str, request_id: str = None):
+    """Open a trace for the current context; returns a token for finish_trace"""
+    if not TRACING_ENABLED:
+        return None
+    trace = Trace(name, request_id or uuid.uuid4().hex, random.random() < TRACE_SAMPLE_RATE)
+    return _current_trace.set(trace), _current_span_id.set(None)
+
+def finish_trace(token, status: int = None) -> Optional[dict]:
+    """Close the trace opened by start_trace and export it if sampled or slow"""
+    if token is None:
+        return None
+    trace = _current_trace.get()
+    trace_token, span_token = token
+    _current_trace.reset(trace_token)
+    _current_span_id.reset(span_token)
+    if trace is None:
+        return None
+
+    trace.finished = True
+    duration_ms = (time.perf_counter() - trace.started) * 1000
+    slow = duration_ms >= TRACE_SLOW_REQUEST_MS
+    if not (trace.sampled or slow):
+        return None
+
+    record = {
+        "trace_id": trace.trace_id,
+        "request_id": trace.request_id,
+        "name": trace.name,
+        "started_at": trace.started_at,
+        "duration_ms": round(duration_ms, 3),
+        "status": status,
+        "sampled": trace.sampled,
+        "slow": slow,
+        "dropped_spans": trace.dropped_spans,
+        "spans": trace.spans
+    }
+    export_trace(record)
+    if slow:
+        breakdown = ", ".join(f"{s['name']}={s['duration_ms']}ms" for s in trace.spans if s["parent_id"] is None)
+        print(f"Slow request {trace.request_id} {trace.name}: {round(duration_ms)}ms [{breakdown}]")
+    return record
+
+def export_trace(record: dict):
+    """Local exporter: one JSON line per trace"""
+    try:
+        os.makedirs(os.path.dirname(TRACE_EXPORT_PATH), exist_ok=True)
+        line = json.dumps(record, default=str) + "\n"
+        with _export_lock, open(TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+            f.write(line)
+    except Exception as e:
+        print(f"Error exporting trace: {e}")
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a child of the current span; a no-op outside a trace"""
+    trace = _current_trace.get()
+    if trace is None or trace.finished:
+        yield None
+        return
+
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _current_span_id.get()
+    token = _current_span_id.set(span_id)
+    started = time.perf_counter()
+    record = {"span_id": span_id, "parent_id": parent_id, "name": name,
+              "start_offset_ms": round((started - trace.started) * 1000, 3), "attributes": attributes}
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span_id.reset(token)
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        if len(trace.spans) < TRACE_MAX_SPANS:
+            trace.spans.append(record)
+        else:
+            trace.dropped_spans += 1
+
+def traced(name: str) -> Callable:
+    """Decorator form of span()"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def trace_module_functions(namespace: dict, module_name: str, prefix: str, exclude: Iterable[str] = ()) -> Optional[int]:
+    """Wrap every public function defined in a module in a span named <prefix><function>"""
+    if not TRACING_ENABLED:
+        return None
+    skipped = set(exclude)
+    traced_count = 0
+    for name, value in list(namespace.items()):
+        if (callable(value) and getattr(value, "__module__", None) == module_name
+                and not name.startswith("_") and name not in skipped and not isinstance(value, type)):
+            namespace[name] = traced(prefix + name)(value)
+            traced_count += 1
+    return traced_count
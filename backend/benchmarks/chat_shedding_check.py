@@ -0,0 +1,141 @@
+"""
+Concurrency check for chat load shedding.
+
+Fires a burst of concurrent /chat calls at the app in-process, with the stubbed
+Gemini model from load_benchmark sleeping for a fixed latency, and checks that the
+calls overlap, that /health keeps answering while they wait on the model (hedging
+and the deadline must not block the event loop) and that the router sheds work once
+LLM_SHED_TO_LIGHT_IN_FLIGHT / LLM_SHED_TO_TEMPLATE_IN_FLIGHT calls are in flight.
+Exits non-zero when a check fails.
+
+Usage (from the backend directory):
+    python benchmarks/chat_shedding_check.py --requests 40 --gemini-latency-ms 500
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import threading
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_benchmark import FakeGeminiModel, configure_environment
+
+# Planning asks: past the FAQ shortcut and routed to the full model unless shed
+COMPLEX_MESSAGES = [
+    "Can you recommend a good seafood restaurant for dinner tonight?",
+    "Could you plan a day trip around the old town for two adults?",
+    "Please suggest a few options for a quiet spa afternoon",
+    "Can you explain the difference between the two breakfast packages?"
+]
+
+class InFlightProbe(FakeGeminiModel):
+    """The fake model, also recording the most LLM calls seen in flight at once"""
+
+    def __init__(self, latency_ms: float):
+        super().__init__(latency_ms)
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str):
+        from app.services import ai_services
+        with self._lock:
+            self.peak_in_flight = max(self.peak_in_flight, ai_services._llm_in_flight)
+        return super().generate_content(prompt)
+
+def seed_guests(db_client, count: int):
+    """One checked-in guest per call, so the per-session and per-room rate limits stay out of the way"""
+    rows = [
+        {"room_number": str(700 + i), "guest_name": f"Shedding Guest {i}",
+         "session_token": f"shed_{i}_{random.getrandbits(32)}"}
+        for i in range(count)
+    ]
+    db_client.table("guest_roster").insert(
+        [{"room_number": r["room_number"], "guest_name": r["guest_name"]} for r in rows]
+    ).execute()
+    return rows
+
+async def main_async(args) -> bool:
+    import httpx
+    from app.main import app
+    from app.services import ai_services, db_services
+
+    probe = InFlightProbe(args.gemini_latency_ms)
+    ai_services.model = probe
+    ai_services.light_model = probe
+    guests = seed_guests(db_services.get_supabase(), args.requests)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check",
+                                 timeout=60) as client:
+        tokens = []
+        for guest in guests:
+            response = await client.post(
+                "/auth/login", json={"room_number": guest["room_number"], "guest_name": guest["guest_name"]}
+            )
+            response.raise_for_status()
+            tokens.append(response.json()["session_token"])
+
+        async def chat(i: int):
+            return await client.post(
+                "/chat", json={"text": COMPLEX_MESSAGES[i % len(COMPLEX_MESSAGES)]},
+                headers={"Authorization": f"Bearer {tokens[i]}"}
+            )
+
+        health_ms = []
+
+        async def poll_health(burst: asyncio.Task):
+            while not burst.done():
+                polled = time.perf_counter()
+                await client.get("/health")
+                health_ms.append((time.perf_counter() - polled) * 1000)
+                await asyncio.sleep(0.02)
+
+        started = time.perf_counter()
+        burst = asyncio.ensure_future(asyncio.gather(*(chat(i) for i in range(args.requests))))
+        await poll_health(burst)
+        responses = await burst
+        elapsed = time.perf_counter() - started
+
+    routes = dict(ai_services.chat_routes._values)
+    errors = sum(1 for response in responses if response.status_code != 200)
+    serial_seconds = probe.calls * args.gemini_latency_ms / 1000
+    print(f"{args.requests} concurrent chats in {elapsed:.2f}s "
+          f"({probe.calls} model calls, {serial_seconds:.2f}s if run one at a time), {errors} errors")
+    print(f"peak LLM calls in flight: {probe.peak_in_flight} "
+          f"(shed to light at {ai_services.LLM_SHED_TO_LIGHT_IN_FLIGHT}, "
+          f"to template at {ai_services.LLM_SHED_TO_TEMPLATE_IN_FLIGHT})")
+    print(f"/health during the burst: {len(health_ms)} polls, slowest {max(health_ms, default=0):.1f} ms")
+    for (tier, reason), value in sorted(routes.items()):
+        print(f"   {tier:<10}{reason:<16}{int(value):>6}")
+
+    checks = {
+        "no errors": errors == 0,
+        "calls overlap": probe.peak_in_flight > 1 and elapsed < serial_seconds,
+        "event loop responsive": bool(health_ms) and max(health_ms) < args.gemini_latency_ms / 2,
+        "shed to light": ai_services.chat_routes.value(ai_services.TIER_LIGHT, "shed") > 0,
+        "shed to template": ai_services.chat_routes.value(ai_services.TIER_TEMPLATE, "shed") > 0
+    }
+    for name, passed in checks.items():
+        print(f"{'✅' if passed else '❌'} {name}")
+    return all(checks.values())
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check that concurrent chats trigger LLM load shedding")
+    parser.add_argument("--requests", type=int, default=40, help="concurrent /chat calls")
+    parser.add_argument("--gemini-latency-ms", type=float, default=500.0)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--sqlite-path", default=os.path.join(backend_dir, "benchmark.db"))
+    parser.add_argument("--keep-db", action="store_true", help="reuse an existing SQLite file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_environment(args)
+    sys.exit(0 if asyncio.run(main_async(args)) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Cold-start benchmark: how long a new worker takes to import the app and answer /health.
+
+Each round runs a fresh interpreter with `python -X importtime -c "import app.main"`
+and records the cumulative import time of app.main and of the heaviest top-level
+packages, then starts another fresh interpreter that imports the app and serves one
+/health request in-process (time to ready). Exits non-zero when the median import
+time is over --budget-ms, so it can gate CI.
+
+Usage (from the backend directory):
+    python benchmarks/import_time_benchmark.py --budget-ms 1000 --output benchmarks/results/import.json
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+from collections import defaultdict
+from datetime import datetime
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports the app and serves one /health request, as a worker does before it is ready
+READY_SCRIPT = """
+import time
+started = time.perf_counter()
+import asyncio
+import httpx
+from app.main import app
+imported = time.perf_counter()
+
+async def health():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        return (await client.get("/health")).status_code
+
+status = asyncio.run(health())
+print(f"{(imported - started) * 1000:.3f} {(time.perf_counter() - started) * 1000:.3f} {status}")
+"""
+
+def _child_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("DB_BACKEND", "memory")
+    env.setdefault("SCHEDULER_ENABLED", "false")
+    env["PYTHONPATH"] = backend_dir + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+def parse_importtime(stderr: str) -> dict:
+    """Cumulative microseconds per module from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+def measure_imports(rounds: int) -> dict:
+    app_main_ms = []
+    by_package = defaultdict(list)
+    for _ in range(rounds):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            cwd=backend_dir, env=_child_env(), capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"import app.main failed:\n{result.stderr[-2000:]}")
+        modules = parse_importtime(result.stderr)
+        app_main_ms.append(modules["app.main"] / 1000)
+        # Top-level entries only: the cumulative time of a package includes its submodules
+        for name, cumulative in modules.items():
+            if "." not in name:
+                by_package[name].append(cumulative / 1000)
+
+    packages = {name: round(statistics.median(times), 3) for name, times in by_package.items()}
+    heaviest = dict(sorted(packages.items(), key=lambda item: item[1], reverse=True)[:15])
+    return {"app_main_ms": _summary(app_main_ms), "heaviest_packages_ms": heaviest}
+
+def measure_ready(rounds: int) -> dict:
+    import_ms, ready_ms = [], []
+    for _ in range(rounds):
+        result = subprocess.run(
+            [sys.executable, "-c", READY_SCRIPT], cwd=backend_dir, env=_child_env(), capture_output=True, text=True
+        )
+        lines = result.stdout.strip().splitlines()
+        if result.returncode != 0 or not lines:
+            raise RuntimeError(f"ready check failed:\n{result.stderr[-2000:]}")
+        imported, ready, status = lines[-1].split()
+        if status != "200":
+            raise RuntimeError(f"/health returned {status}")
+        import_ms.append(float(imported))
+        ready_ms.append(float(ready))
+    return {"import_ms": _summary(import_ms), "ready_ms": _summary(ready_ms)}
+
+def _summary(values: list) -> dict:
+    return {"median": round(statistics.median(values), 3), "min": round(min(values), 3),
+            "max": round(max(values), 3), "rounds": len(values)}
+
+def print_summary(results: dict):
+    imports = results["imports"]
+    print(f"\nimport app.main (-X importtime): median {imports['app_main_ms']['median']} ms "
+          f"(min {imports['app_main_ms']['min']}, max {imports['app_main_ms']['max']})")
+    print(f"time to first /health: median {results['ready']['ready_ms']['median']} ms")
+    print(f"\n{'package':<36}{'median ms':>12}")
+    for name, ms in imports["heaviest_packages_ms"].items():
+        print(f"{name:<36}{ms:>12}")
+    if results["budget_ms"]:
+        verdict = "within" if results["within_budget"] else "OVER"
+        print(f"\n{verdict} budget of {results['budget_ms']} ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker cold-start (import time) benchmark")
+    parser.add_argument("--rounds", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--budget-ms", type=float, default=0, help="fail when median import time exceeds this (0: no budget)")
+    parser.add_argument("--output", default=os.path.join(backend_dir, "benchmarks", "results", "import.json"))
+    args = parser.parse_args(argv)
+
+    results = {"imports": measure_imports(args.rounds), "ready": measure_ready(args.rounds)}
+    results["budget_ms"] = args.budget_ms
+    results["within_budget"] = not args.budget_ms or results["imports"]["app_main_ms"]["median"] <= args.budget_ms
+    results["environment"] = {
+        "python": platform.python_version(), "platform": platform.platform(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print_summary(results)
+    print(f"\nResults written to {args.output}")
+    return 0 if results["within_budget"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
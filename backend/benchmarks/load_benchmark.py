@@ -0,0 +1,327 @@
+"""
+End-to-end load benchmark for the Hotel Service API.
+
+Drives the FastAPI app in-process (no network) with a mix of guest and admin
+traffic, using a local DB backend and a stubbed Gemini model with configurable
+latency. Reports req/s, latency percentiles and DB calls per request for each
+route, and writes the results to a JSON file that can be compared across versions.
+
+Usage (from the backend directory):
+    python benchmarks/load_benchmark.py --users 20 --duration 30 --gemini-latency-ms 400
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+import contextvars
+from datetime import datetime
+from typing import Dict, List
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+# Weighted traffic mix: (route name, weight)
+TRAFFIC_MIX = [
+    ("guest_login", 5),
+    ("chat", 25),
+    ("guest_my_requests", 35),
+    ("admin_dashboard", 15),
+    ("admin_requests", 12),
+    ("admin_assign", 8)
+]
+
+GUEST_MESSAGES = [
+    "I need some fresh towels please",
+    "The air conditioning is not working",
+    "Can you bring me two extra pillows?",
+    "What is the wifi password?",
+    "What time is checkout?",
+    "Could you recommend a restaurant nearby?",
+    "Please send me a coffee and some snacks",
+    "Hello, thanks for the lovely room",
+    "Can you book a taxi to the airport for 6am?",
+    "The TV remote is broken, can you fix it"
+]
+
+# Canned model replies, chosen by the first keyword found in the guest message
+FAKE_REPLIES = [
+    ("towel", "SERVICE_REQUEST|towels|Fresh towels for room|normal\nHousekeeping will bring fresh towels shortly."),
+    ("air conditioning", "SERVICE_REQUEST|maintenance|Air conditioning not working|urgent\nMaintenance is on the way."),
+    ("pillow", "SERVICE_REQUEST|amenities|Two extra pillows|normal\nExtra pillows are on their way."),
+    ("coffee", "SERVICE_REQUEST|refreshments|Coffee and snacks|normal\nYour coffee and snacks will arrive soon."),
+    ("taxi", "SERVICE_REQUEST|transportation|Taxi to the airport at 6am|normal\nYour taxi is booked."),
+    ("tv", "SERVICE_REQUEST|tech_support|TV remote broken|urgent\nTechnical support will replace the remote."),
+    ("restaurant", "There are several excellent restaurants within walking distance; the concierge can book one."),
+]
+DEFAULT_REPLY = "You're welcome! Let me know if there is anything else I can help you with."
+
+class FakeGeminiResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeGeminiModel:
+    """Stands in for genai.GenerativeModel: sleeps for the configured latency, returns a canned reply"""
+
+    def __init__(self, latency_ms: float, jitter_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls = 0
+
+    def generate_content(self, prompt: str) -> FakeGeminiResponse:
+        self.calls += 1
+        delay = max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        # Blocking on purpose: the real SDK call is synchronous too
+        time.sleep(delay)
+        message = prompt.rsplit("Guest from Room", 1)[-1].lower()
+        for keyword, reply in FAKE_REPLIES:
+            if keyword in message:
+                return FakeGeminiResponse(reply)
+        return FakeGeminiResponse(DEFAULT_REPLY)
+
+# DB call counting: every table()/rpc() on the client is one round trip to PostgREST
+_db_calls: contextvars.ContextVar = contextvars.ContextVar("db_calls", default=None)
+
+def _counting(method):
+    def wrapper(*args, **kwargs):
+        counter = _db_calls.get()
+        if counter is not None:
+            counter[0] += 1
+        return method(*args, **kwargs)
+    return wrapper
+
+def configure_environment(args):
+    """Must run before the app is imported: db_services reads these at import time"""
+    os.environ["DB_BACKEND"] = args.backend
+    os.environ["SQLITE_PATH"] = args.sqlite_path
+    os.environ["SCHEDULER_ENABLED"] = "false"
+    os.environ.setdefault("LOCAL_DB_SEED_DEMO", "true")
+    if args.backend == "sqlite" and os.path.exists(args.sqlite_path) and not args.keep_db:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.sqlite_path + suffix):
+                os.remove(args.sqlite_path + suffix)
+
+def percentile(values: List[float], pct: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+class LoadRunner:
+    def __init__(self, app, db_client, args):
+        import httpx
+        self.args = args
+        self.db = db_client
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark")
+        self.samples: Dict[str, List[float]] = {name: [] for name, _ in TRAFFIC_MIX}
+        self.errors: Dict[str, int] = {name: 0 for name, _ in TRAFFIC_MIX}
+        self.db_calls: Dict[str, int] = {name: 0 for name, _ in TRAFFIC_MIX}
+        self.guests: List[dict] = []
+        self.admin_headers = {}
+        self.staff_ids: List[str] = []
+
+    def seed_guests(self):
+        rows = [
+            {"room_number": str(200 + i), "guest_name": f"Benchmark Guest {i}",
+             "session_token": f"bench_seed_{i}_{random.getrandbits(32)}"}
+            for i in range(self.args.guests)
+        ]
+        self.db.table("guest_sessions").insert(rows).execute()
+        # Check the guests in (once: the roster allows one stay per name and room)
+        checked_in = {
+            (r["room_number"], r["guest_name"])
+            for r in self.db.table("guest_roster").select("room_number, guest_name").in_(
+                "room_number", [row["room_number"] for row in rows]
+            ).is_("checkout_time", "null").execute().data or []
+        }
+        roster = [{"room_number": r["room_number"], "guest_name": r["guest_name"]}
+                  for r in rows if (r["room_number"], r["guest_name"]) not in checked_in]
+        if roster:
+            self.db.table("guest_roster").insert(roster).execute()
+        self.guests = [{"room_number": r["room_number"], "guest_name": r["guest_name"], "token": None} for r in rows]
+
+    async def setup(self):
+        self.seed_guests()
+        for guest in self.guests:
+            await self.login(guest)
+        response = await self.client.post("/admin/login", json={"username": "admin", "password": "admin123"})
+        response.raise_for_status()
+        self.admin_headers = {"Authorization": f"Bearer {response.json()['session_token']}"}
+        response = await self.client.get("/admin/staff", headers=self.admin_headers)
+        self.staff_ids = [s["id"] for s in response.json()["staff"]]
+
+    async def login(self, guest: dict):
+        response = await self.client.post(
+            "/auth/login", json={"room_number": guest["room_number"], "guest_name": guest["guest_name"]}
+        )
+        if response.status_code == 200:
+            guest["token"] = response.json()["session_token"]
+        return response
+
+    async def issue(self, route: str, rng: random.Random):
+        guest = rng.choice(self.guests)
+        guest_headers = {"Authorization": f"Bearer {guest['token']}"}
+        if route == "guest_login":
+            return await self.login(guest)
+        if route == "chat":
+            return await self.client.post("/chat", json={"text": rng.choice(GUEST_MESSAGES)}, headers=guest_headers)
+        if route == "guest_my_requests":
+            return await self.client.get("/guest/my-requests", headers=guest_headers)
+        if route == "admin_dashboard":
+            return await self.client.get("/admin/dashboard", headers=self.admin_headers)
+        if route == "admin_requests":
+            return await self.client.get("/admin/requests", params={"status": "pending"}, headers=self.admin_headers)
+        if route == "admin_assign":
+            # The benchmark's own lookup must not count towards the route's DB calls
+            counting = _db_calls.set(None)
+            pending = self.db.table("service_requests").select("id").eq("status", "pending").limit(20).execute().data
+            _db_calls.reset(counting)
+            if not pending:
+                return await self.client.get("/admin/requests", params={"status": "pending"}, headers=self.admin_headers)
+            return await self.client.post(
+                f"/admin/requests/{rng.choice(pending)['id']}/assign",
+                json={"staff_id": rng.choice(self.staff_ids), "notes": "benchmark"},
+                headers=self.admin_headers
+            )
+        raise ValueError(route)
+
+    async def virtual_user(self, user_id: int, deadline: float):
+        rng = random.Random(self.args.seed + user_id)
+        names = [name for name, _ in TRAFFIC_MIX]
+        weights = [weight for _, weight in TRAFFIC_MIX]
+        while time.perf_counter() < deadline:
+            route = rng.choices(names, weights)[0]
+            counter = [0]
+            _db_calls.set(counter)
+            started = time.perf_counter()
+            try:
+                response = await self.issue(route, rng)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            elapsed = time.perf_counter() - started
+            _db_calls.set(None)
+
+            self.samples[route].append(elapsed)
+            self.db_calls[route] += counter[0]
+            if failed:
+                self.errors[route] += 1
+            if self.args.think_time_ms:
+                await asyncio.sleep(rng.uniform(0, self.args.think_time_ms) / 1000)
+
+    async def run(self) -> float:
+        started = time.perf_counter()
+        deadline = started + self.args.duration
+        await asyncio.gather(*(self.virtual_user(i, deadline) for i in range(self.args.users)))
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route, samples in self.samples.items():
+            count = len(samples)
+            routes[route] = {
+                "requests": count,
+                "errors": self.errors[route],
+                "requests_per_second": round(count / elapsed, 2),
+                "latency_ms": {
+                    "mean": round(sum(samples) / count * 1000, 3) if count else None,
+                    **{f"p{p}": round(percentile(samples, p) * 1000, 3) if count else None for p in (50, 95, 99)}
+                },
+                "db_calls_per_request": round(self.db_calls[route] / count, 2) if count else None
+            }
+
+        all_samples = [s for samples in self.samples.values() for s in samples]
+        total = len(all_samples)
+        return {
+            "total": {
+                "requests": total,
+                "errors": sum(self.errors.values()),
+                "duration_seconds": round(elapsed, 3),
+                "requests_per_second": round(total / elapsed, 2),
+                "latency_ms": {f"p{p}": round(percentile(all_samples, p) * 1000, 3) if total else None
+                               for p in (50, 95, 99)},
+                "db_calls_per_request": round(sum(self.db_calls.values()) / total, 2) if total else None
+            },
+            "routes": routes
+        }
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=backend_dir, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+async def main_async(args) -> dict:
+    from app.main import app
+    from app.services import ai_services, db_services
+
+    fake_model = FakeGeminiModel(args.gemini_latency_ms, args.gemini_jitter_ms)
+    ai_services.model = fake_model
+    ai_services.light_model = fake_model
+    db_client = db_services.get_supabase()
+    db_client.table = _counting(db_client.table)
+    db_client.rpc = _counting(db_client.rpc)
+
+    runner = LoadRunner(app, db_client, args)
+    await runner.setup()
+    elapsed = await runner.run()
+    await runner.client.aclose()
+
+    results = runner.report(elapsed)
+    results["gemini_calls"] = fake_model.calls
+    results["config"] = {
+        "users": args.users, "duration": args.duration, "guests": args.guests, "backend": args.backend,
+        "gemini_latency_ms": args.gemini_latency_ms, "gemini_jitter_ms": args.gemini_jitter_ms,
+        "think_time_ms": args.think_time_ms, "seed": args.seed, "traffic_mix": dict(TRAFFIC_MIX)
+    }
+    results["environment"] = {
+        "git_commit": _git_commit(), "python": platform.python_version(),
+        "platform": platform.platform(), "timestamp": datetime.utcnow().isoformat()
+    }
+    return results
+
+def print_summary(results: dict):
+    print(f"\n{'route':<20}{'reqs':>8}{'err':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'db/req':>8}")
+    for route, stats in list(results["routes"].items()) + [("TOTAL", results["total"])]:
+        latency = stats["latency_ms"]
+        print(f"{route:<20}{stats['requests']:>8}{stats['errors']:>6}{stats['requests_per_second']:>10}"
+              f"{latency['p50'] or 0:>10.2f}{latency['p95'] or 0:>10.2f}{latency['p99'] or 0:>10.2f}"
+              f"{stats['db_calls_per_request'] or 0:>8}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Hotel Service API load benchmark")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of load")
+    parser.add_argument("--guests", type=int, default=50, help="checked-in guests to spread traffic over")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--sqlite-path", default=os.path.join(backend_dir, "benchmark.db"))
+    parser.add_argument("--keep-db", action="store_true", help="reuse an existing SQLite file")
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0)
+    parser.add_argument("--gemini-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--think-time-ms", type=float, default=0.0, help="max random pause between requests")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=os.path.join(backend_dir, "benchmarks", "results", "load.json"))
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_environment(args)
+    results = asyncio.run(main_async(args))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print_summary(results)
+    print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
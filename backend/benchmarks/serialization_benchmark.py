@@ -0,0 +1,208 @@
+"""
+Serialization and compression benchmark for the large admin list responses.
+
+Builds synthetic /admin/customer-history and /admin/history payloads of several
+sizes and times how long each takes to become response bytes: FastAPI's default
+path for a returned dict (jsonable_encoder + JSONResponse), FastJSONResponse with
+the standard library, and FastJSONResponse with orjson. The orjson bodies are then
+compressed with gzip and brotli at the levels the middleware uses (CPU time and
+bytes). Finally /admin/customer-history is requested through the app over the
+in-memory backend once per Accept-Encoding to record the bytes on the wire.
+
+Usage (from the backend directory):
+    python benchmarks/serialization_benchmark.py --rows 1000,10000,50000 --output benchmarks/results/serialization.json
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import platform
+import statistics
+from datetime import datetime, timedelta
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+os.environ.setdefault("DB_BACKEND", "memory")
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+os.environ.setdefault("WARM_UP_CLIENTS", "false")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.services import responses, compression
+
+REQUEST_TYPES = ["towels", "amenities", "housekeeping", "room_service", "maintenance", "concierge"]
+STATUSES = ["pending", "assigned", "in_progress", "completed", "cancelled"]
+PRIORITIES = ["low", "normal", "high", "urgent"]
+DESCRIPTIONS = [
+    "Guest asked for two extra bath towels",
+    "The air conditioning is making a rattling noise and the room is too warm",
+    "Please bring a bottle of sparkling water and some ice",
+    "Booked a table for four at the Italian restaurant at 8pm",
+    "TV remote is not working, batteries may need replacing"
+]
+
+def _timestamp(rng: random.Random) -> str:
+    moment = datetime(2024, 1, 1) + timedelta(seconds=rng.randrange(0, 365 * 86400))
+    return moment.isoformat() + "+00:00"
+
+def customer_history_rows(count: int, rng: random.Random) -> list:
+    """Rows shaped like get_persistent_customer_history's"""
+    return [{
+        "customer_name": f"Guest {rng.randrange(10000)}",
+        "room_number": str(100 + rng.randrange(400)),
+        "checkout_time": _timestamp(rng) if rng.random() < 0.6 else None,
+        "request_date": _timestamp(rng),
+        "request_type": rng.choice(REQUEST_TYPES),
+        "description": rng.choice(DESCRIPTIONS),
+        "status": rng.choice(STATUSES),
+        "priority": rng.choice(PRIORITIES),
+        "request_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "deleted_at": None,
+        "notes": "Handled by housekeeping" if rng.random() < 0.3 else None
+    } for _ in range(count)]
+
+def request_history_rows(count: int, rng: random.Random) -> list:
+    """Rows shaped like request_history events"""
+    return [{
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "request_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "action": rng.choice(["created", "assigned", "status_changed", "priority_changed"]),
+        "details": rng.choice(DESCRIPTIONS),
+        "user_type": rng.choice(["guest", "admin"]),
+        "user_id": "admin",
+        "timestamp": _timestamp(rng),
+        "payload": {"status": rng.choice(STATUSES), "priority": rng.choice(PRIORITIES),
+                    "room_number": str(100 + rng.randrange(400))},
+        "seq": seq
+    } for seq in range(1, count + 1)]
+
+def fastapi_default(content) -> bytes:
+    # What a route returning a dict costs: encode every value, then JSONResponse.render
+    return JSONResponse(jsonable_encoder(content)).body
+
+def fast_json_stdlib(content) -> bytes:
+    orjson, responses.orjson = responses.orjson, None
+    try:
+        return responses.FastJSONResponse(content).body
+    finally:
+        responses.orjson = orjson
+
+def fast_json_orjson(content) -> bytes:
+    return responses.FastJSONResponse(content).body
+
+def compress(encoding: str, body: bytes) -> bytes:
+    compressor = compression._Compressor(encoding)
+    return compressor.compress(body) + compressor.finish()
+
+def time_rounds(func, arg, repeat: int) -> tuple:
+    """Median and min milliseconds of func(arg) over `repeat` rounds, plus its result"""
+    times, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(arg)
+        times.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3)}, result
+
+def measure_payload(content, repeat: int) -> dict:
+    encoders = {"fastapi_default": fastapi_default, "fast_json_stdlib": fast_json_stdlib}
+    if responses.orjson is not None:
+        encoders["fast_json_orjson"] = fast_json_orjson
+    serialization, body = {}, None
+    for name, encoder in encoders.items():
+        timing, body = time_rounds(encoder, content, repeat)
+        serialization[name] = dict(timing, bytes=len(body))
+
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    compressed = {}
+    for encoding in encodings:
+        timing, output = time_rounds(lambda data: compress(encoding, data), body, repeat)
+        compressed[encoding] = dict(timing, bytes=len(output), ratio=round(len(body) / max(1, len(output)), 2))
+    return {"serialization": serialization, "compression": compressed}
+
+async def measure_wire(rows: int, repeat: int) -> dict:
+    """Bytes and latency of /admin/customer-history per Accept-Encoding, through the app"""
+    import httpx
+    from app.main import app
+    from app.services import db_services
+
+    client_db = db_services.get_supabase()
+    rng = random.Random(7)
+    history = [{
+        "original_request_id": row["request_id"], "customer_name": row["customer_name"],
+        "room_number": row["room_number"], "request_type": row["request_type"],
+        "description": row["description"], "priority": row["priority"], "status": row["status"],
+        "notes": row["notes"], "created_at": row["request_date"]
+    } for row in customer_history_rows(rows, rng)]
+    client_db.table("customer_request_history").insert(history).execute()
+
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        login = await client.post("/admin/login", json={"username": "admin", "password": "admin123"})
+        headers = {"Authorization": f"Bearer {login.json()['session_token']}"}
+        for encoding in ["identity", "gzip"] + (["br"] if compression.brotli is not None else []):
+            times, wire_bytes = [], 0
+            for _ in range(repeat):
+                started = time.perf_counter()
+                async with client.stream("GET", "/admin/customer-history",
+                                         headers=dict(headers, **{"Accept-Encoding": encoding})) as response:
+                    wire_bytes = sum([len(chunk) async for chunk in response.aiter_raw()])
+                    response.raise_for_status()
+                times.append((time.perf_counter() - started) * 1000)
+            results[encoding] = {"bytes": wire_bytes, "median_ms": round(statistics.median(times), 3)}
+    return {"rows": rows, "by_encoding": results}
+
+def run(row_counts: list, repeat: int, wire_rows: int) -> dict:
+    rng = random.Random(42)
+    payloads = {}
+    for count in row_counts:
+        payloads[f"customer_history_{count}"] = measure_payload(
+            {"customer_history": customer_history_rows(count, rng)}, repeat
+        )
+        payloads[f"request_history_{count}"] = measure_payload({"history": request_history_rows(count, rng)}, repeat)
+    return {
+        "payloads": payloads,
+        "wire": asyncio.run(measure_wire(wire_rows, repeat)) if wire_rows else None,
+        "settings": {"orjson": responses.orjson is not None, "brotli": compression.brotli is not None,
+                     "gzip_level": compression.COMPRESSION_GZIP_LEVEL,
+                     "brotli_quality": compression.COMPRESSION_BROTLI_QUALITY}
+    }
+
+def print_summary(results: dict):
+    print(f"\n{'payload':<28}{'encoder':<20}{'median ms':>12}{'bytes':>14}")
+    for name, payload in results["payloads"].items():
+        for encoder, timing in payload["serialization"].items():
+            print(f"{name:<28}{encoder:<20}{timing['median_ms']:>12}{timing['bytes']:>14}")
+        for encoding, timing in payload["compression"].items():
+            print(f"{'':<28}{'+ ' + encoding:<20}{timing['median_ms']:>12}{timing['bytes']:>14}  x{timing['ratio']}")
+    if results["wire"]:
+        print(f"\n/admin/customer-history, {results['wire']['rows']} rows:")
+        for encoding, timing in results["wire"]["by_encoding"].items():
+            print(f"  {encoding:<10}{timing['bytes']:>12} bytes{timing['median_ms']:>12} ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON serialization and compression benchmark")
+    parser.add_argument("--rows", default="1000,10000,50000", help="comma-separated payload sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds per measurement")
+    parser.add_argument("--wire-rows", type=int, default=10000,
+                        help="customer history rows for the through-the-app measurement (0: skip)")
+    parser.add_argument("--output", default=os.path.join(backend_dir, "benchmarks", "results", "serialization.json"))
+    args = parser.parse_args(argv)
+
+    results = run([int(count) for count in args.rows.split(",")], args.repeat, args.wire_rows)
+    results["environment"] = {
+        "python": platform.python_version(), "platform": platform.platform(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print_summary(results)
+    print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
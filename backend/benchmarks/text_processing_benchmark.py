@@ -0,0 +1,334 @@
+"""
+Micro-benchmarks for the chat text-processing hot path.
+
+Times detect_service_request_from_text, process_ai_response, model routing and the
+FAQ quick answers in get_ai_response over a corpus of guest messages and model replies
+(including malformed SERVICE_REQUEST lines), shows how the cost grows with message
+length and keyword-table size, and scores classification accuracy on a labelled set.
+DB writes and Gemini are replaced by in-process recorders so only text handling is timed.
+
+Usage (from the backend directory):
+    python benchmarks/text_processing_benchmark.py --output benchmarks/results/text.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+from datetime import datetime
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+os.environ.setdefault("DB_BACKEND", "memory")
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+
+from app.services import ai_services
+
+# Guest messages labelled with the service category they should create (None: no request)
+LABELLED_MESSAGES = [
+    ("I need some fresh towels please", "towels"),
+    ("Could you send me two bath towels?", "towels"),
+    ("Can you bring me extra pillows", "amenities"),
+    ("I'd like another blanket, it's cold", "amenities"),
+    ("Please send me some shampoo and soap", "amenities"),
+    ("I need my room cleaned", "housekeeping"),
+    ("Please make bed and tidy the room", "housekeeping"),
+    ("I would like to order breakfast to the room", "room_service"),
+    ("Can you bring me a club sandwich from the menu?", "room_service"),
+    ("Please bring me a coffee", "refreshments"),
+    ("I want some ice and a bottle of water", "refreshments"),
+    ("The shower is broken, please fix it", "maintenance"),
+    ("I need someone to repair the air conditioning", "maintenance"),
+    ("Please fix the lamp by the bed", "maintenance"),
+    ("The TV remote is broken, can you fix it", "maintenance"),
+    ("I need help with the wifi, it keeps disconnecting", "tech_support"),
+    ("Please send someone to fix the television", "maintenance"),
+    ("I need a taxi to the airport at 6am", "transportation"),
+    ("Could you send me a shuttle to the convention centre?", "transportation"),
+    ("I would like a reservation at an Italian restaurant tonight", "concierge"),
+    ("Please arrange show tickets for Saturday", "concierge"),
+    ("I'd like directions to the nearest museum", "local_info"),
+    ("What is the wifi password?", None),
+    ("What time is checkout?", None),
+    ("Where is the gym?", None),
+    ("Do you have a spa?", None),
+    ("Is there parking at the hotel?", None),
+    ("How much is the airport shuttle?", None),
+    ("Tell me about the restaurant hours", None),
+    ("Thanks, the room is lovely", None),
+    ("Hello!", None),
+    ("Good night", None),
+    ("Does the hotel offer laundry service?", None),
+    ("When does the pool open?", None),
+    ("Which floor is the bar on?", None),
+    ("Who is the manager on duty?", None),
+]
+
+# Model replies labelled with the (category, priority) a correct parser extracts (None: no request)
+LABELLED_REPLIES = [
+    ("SERVICE_REQUEST|towels|Fresh towels for room|normal\nHousekeeping will deliver them shortly.",
+     ("towels", "normal")),
+    ("SERVICE_REQUEST|maintenance|AC not working|urgent\nMaintenance is on the way.", ("maintenance", "urgent")),
+    ("Sure thing!\nSERVICE_REQUEST|amenities|Extra pillows|normal\nThey are on their way.", ("amenities", "normal")),
+    ("SERVICE_REQUEST|tech_support|TV not working|urgent", ("tech_support", "urgent")),
+    ("SERVICE_REQUEST|refreshments|Coffee|normal\r\nYour coffee will be up shortly.", ("refreshments", "normal")),
+    ("SERVICE_REQUEST| towels | Fresh towels | normal \nDone.", ("towels", "normal")),
+    ("SERVICE_REQUEST|room_service|Club sandwich|normal|extra field\nOrdered.", ("room_service", "normal")),
+    # Malformed: too few fields, missing pieces, wrong case, empty fields
+    ("SERVICE_REQUEST|towels|Fresh towels\nOn their way.", None),
+    ("SERVICE_REQUEST|towels\nOn their way.", None),
+    ("SERVICE_REQUEST|\nSorry, something went wrong.", None),
+    ("service_request|towels|Fresh towels|normal\nOn their way.", None),
+    ("SERVICE_REQUEST||Fresh towels|normal\nOn their way.", None),
+    ("SERVICE REQUEST: towels, fresh towels, normal", None),
+    ("The Wi-Fi password is HotelGuest123.", None),
+    ("Check-out time is 12:00 PM. Anything else?", None),
+    ("CANCEL_REQUEST|Guest requested cancellation via chat\nLet me check your requests.", None),
+]
+
+# Messages that the FAQ knowledge base in get_ai_response should answer without the model
+QUICK_ANSWER_MESSAGES = [
+    ("What is the wifi password?", True),
+    ("wifi password please", True),
+    ("When is check-out?", True),
+    ("What time is checkout tomorrow", True),
+    ("what time is breakfast", True),
+    ("Is the pool open late?", True),
+    ("do you have a gym", True),
+    ("Where can I park my car?", True),
+    ("I need towels", False),
+    ("Can you recommend a restaurant?", False),
+    ("The wifi is not working", False),
+    ("Please send someone to fix the shower", False),
+]
+
+# Messages labelled with the model tier route_message should pick at idle load
+ROUTED_MESSAGES = [
+    ("thanks!", "template"),
+    ("Hello", "template"),
+    ("ok great", "template"),
+    ("thanks, can you send more towels", "light"),
+    ("I need some fresh towels please", "light"),
+    ("Where is the gym?", "light"),
+    ("Can you recommend a good Italian restaurant nearby?", "full"),
+    ("What time does the pool open? And is there a spa?", "full"),
+    ("Please cancel my room service order", "full"),
+    ("We're celebrating an anniversary tomorrow, could you plan a romantic evening with dinner "
+     "and flowers in the room, and arrange a late checkout and a taxi to the airport afterwards?", "full"),
+]
+
+MESSAGE_LENGTHS = [20, 200, 2000, 20000]
+KEYWORD_TABLE_SCALES = [1, 4, 16, 64]
+
+class Recorder:
+    """Captures create_service_request / log_message calls instead of writing to the DB"""
+
+    def __init__(self):
+        self.requests = []
+        self.messages = 0
+
+    def create_service_request(self, room_number, request_type, description, priority="normal", session_token=None,
+                               idempotency_key=None):
+        self.requests.append((request_type, priority))
+        return {"id": "benchmark"}
+
+    def log_message(self, *args, **kwargs):
+        self.messages += 1
+
+class InstantModel:
+    """Model stub that answers immediately, so only local processing is timed"""
+
+    class Response:
+        text = "You're welcome! Let me know if there is anything else I can help you with."
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        return self.Response()
+
+def time_call(func, args_list, repeat: int, min_time: float = 0.05) -> dict:
+    """Median and p95 nanoseconds per call over `repeat` timed rounds of the whole argument list"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            for args in args_list:
+                func(*args)
+        if time.perf_counter() - started >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    per_call = []
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        for _ in range(loops):
+            for args in args_list:
+                func(*args)
+        per_call.append((time.perf_counter_ns() - started) / (loops * len(args_list)))
+    per_call.sort()
+    return {
+        "median_ns": round(statistics.median(per_call), 1),
+        "p95_ns": round(per_call[min(len(per_call) - 1, int(len(per_call) * 0.95))], 1),
+        "calls_per_round": loops * len(args_list)
+    }
+
+def _padded_message(length: int) -> str:
+    """A guest message of roughly `length` chars with the request keyword at the end (worst case)"""
+    filler = "Hi there, we just arrived after a long trip and the room looks great. "
+    body = (filler * (length // len(filler) + 1))[:max(0, length - 30)]
+    return body + " I need some fresh towels please"
+
+def _scaled_patterns(patterns: dict, scale: int) -> dict:
+    """The keyword table with (scale - 1) extra non-matching keywords per listed keyword"""
+    scaled = {}
+    for category, config in patterns.items():
+        extra = [f"{keyword}-variant-{i}" for keyword in config["keywords"] for i in range(scale - 1)]
+        # Extra keywords go first so real matches are found as late as possible
+        scaled[category] = {"keywords": extra + list(config["keywords"]), "priority": config["priority"]}
+    return scaled
+
+def classification_accuracy() -> dict:
+    misses = []
+    correct = 0
+    for message, expected in LABELLED_MESSAGES:
+        detected = ai_services.detect_service_request_from_text(message)
+        category = detected[0] if detected else None
+        if category == expected:
+            correct += 1
+        else:
+            misses.append({"message": message, "expected": expected, "got": category})
+    return {"labelled": len(LABELLED_MESSAGES), "correct": correct,
+            "accuracy": round(correct / len(LABELLED_MESSAGES), 4), "misses": misses}
+
+def reply_parse_accuracy(recorder: Recorder) -> dict:
+    misses, correct, leaks = [], 0, 0
+    for reply, expected in LABELLED_REPLIES:
+        recorder.requests.clear()
+        processed = ai_services.process_ai_response(reply, "guest message", "101", "token")
+        got = recorder.requests[0] if recorder.requests else None
+        if "SERVICE_REQUEST|" in processed or "CANCEL_REQUEST|" in processed:
+            leaks += 1
+        if got == expected:
+            correct += 1
+        else:
+            misses.append({"reply": reply, "expected": expected, "got": got})
+    return {"labelled": len(LABELLED_REPLIES), "correct": correct,
+            "accuracy": round(correct / len(LABELLED_REPLIES), 4),
+            "protocol_leaks": leaks, "misses": misses}
+
+def routing_accuracy() -> dict:
+    misses, correct = [], 0
+    for message, expected in ROUTED_MESSAGES:
+        tier, reason = ai_services.route_message(message)
+        if tier == expected:
+            correct += 1
+        else:
+            misses.append({"message": message, "expected": expected, "got": tier, "reason": reason})
+    return {"labelled": len(ROUTED_MESSAGES), "correct": correct,
+            "accuracy": round(correct / len(ROUTED_MESSAGES), 4), "misses": misses}
+
+def quick_answer_accuracy(model: InstantModel) -> dict:
+    correct = 0
+    for message, expected_quick in QUICK_ANSWER_MESSAGES:
+        calls = model.calls
+        ai_services.get_ai_response(message, "101", "token")
+        if (model.calls == calls) == expected_quick:
+            correct += 1
+    return {"labelled": len(QUICK_ANSWER_MESSAGES), "correct": correct,
+            "accuracy": round(correct / len(QUICK_ANSWER_MESSAGES), 4)}
+
+def run(repeat: int) -> dict:
+    recorder, model = Recorder(), InstantModel()
+    ai_services.create_service_request = recorder.create_service_request
+    ai_services.log_message = recorder.log_message
+    ai_services.get_active_requests_by_room = lambda room_number: []
+    ai_services.model = model
+    ai_services.light_model = model
+
+    messages = [(message,) for message, _ in LABELLED_MESSAGES]
+    replies = [(reply, "guest message", "101", "token") for reply, _ in LABELLED_REPLIES]
+    quick = [(message, "101", "token") for message, expected in QUICK_ANSWER_MESSAGES if expected]
+    full = [(message, "101", "token") for message, _ in LABELLED_MESSAGES]
+    routed = [(message,) for message, _ in ROUTED_MESSAGES]
+    faq = [(message,) for message, _ in QUICK_ANSWER_MESSAGES]
+
+    results = {
+        "timings": {
+            "detect_service_request_from_text": time_call(ai_services.detect_service_request_from_text, messages, repeat),
+            "process_ai_response": time_call(ai_services.process_ai_response, replies, repeat),
+            "route_message": time_call(ai_services.route_message, routed, repeat),
+            "answer_faq": time_call(ai_services.answer_faq, faq, repeat),
+            "get_ai_response_quick_answers": time_call(ai_services.get_ai_response, quick, repeat),
+            "get_ai_response_full_local": time_call(ai_services.get_ai_response, full, repeat)
+        },
+        "by_message_length": {},
+        "by_keyword_table_scale": {}
+    }
+
+    for length in MESSAGE_LENGTHS:
+        message = _padded_message(length)
+        results["by_message_length"][str(length)] = {
+            "detect_service_request_from_text": time_call(ai_services.detect_service_request_from_text,
+                                                          [(message,)], repeat),
+            "get_ai_response_full_local": time_call(ai_services.get_ai_response, [(message, "101", "token")], repeat)
+        }
+
+    original_patterns = ai_services.service_request_patterns
+    try:
+        for scale in KEYWORD_TABLE_SCALES:
+            ai_services.service_request_patterns = _scaled_patterns(original_patterns, scale)
+            keywords = sum(len(c["keywords"]) for c in ai_services.service_request_patterns.values())
+            results["by_keyword_table_scale"][str(scale)] = dict(
+                keywords=keywords,
+                **time_call(ai_services.detect_service_request_from_text, messages, repeat)
+            )
+    finally:
+        ai_services.service_request_patterns = original_patterns
+
+    results["accuracy"] = {
+        "detect_service_request_from_text": classification_accuracy(),
+        "process_ai_response": reply_parse_accuracy(recorder),
+        "route_message": routing_accuracy(),
+        "quick_answers": quick_answer_accuracy(model)
+    }
+    return results
+
+def print_summary(results: dict):
+    print(f"\n{'function':<36}{'median ns':>12}{'p95 ns':>12}")
+    for name, timing in results["timings"].items():
+        print(f"{name:<36}{timing['median_ns']:>12}{timing['p95_ns']:>12}")
+    print(f"\n{'message length':<36}{'detect ns':>12}{'full ns':>12}")
+    for length, timing in results["by_message_length"].items():
+        print(f"{length:<36}{timing['detect_service_request_from_text']['median_ns']:>12}"
+              f"{timing['get_ai_response_full_local']['median_ns']:>12}")
+    print(f"\n{'keyword table':<36}{'keywords':>12}{'detect ns':>12}")
+    for scale, timing in results["by_keyword_table_scale"].items():
+        print(f"{scale + 'x':<36}{timing['keywords']:>12}{timing['median_ns']:>12}")
+    print()
+    for name, score in results["accuracy"].items():
+        print(f"accuracy {name}: {score['correct']}/{score['labelled']} ({score['accuracy']:.1%})")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chat text-processing micro-benchmarks")
+    parser.add_argument("--repeat", type=int, default=7, help="timed rounds per measurement")
+    parser.add_argument("--output", default=os.path.join(backend_dir, "benchmarks", "results", "text.json"))
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    results["environment"] = {
+        "python": platform.python_version(), "platform": platform.platform(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print_summary(results)
+    print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+-- 0001: baseline schema (the script setup_supabase.py used to print for the SQL editor).
+-- Every statement is idempotent, so it also applies cleanly to databases created
+-- before migrations were tracked in schema_migrations.
+
+-- Create the guest_sessions table for authentication
+CREATE TABLE IF NOT EXISTS guest_sessions (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    room_number VARCHAR(10) NOT NULL,
+    guest_name VARCHAR(100) NOT NULL,
+    session_token TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE DEFAULT (NOW() + INTERVAL '24 hours'),
+    is_active BOOLEAN DEFAULT TRUE
+);
+
+-- Create admin users table
+CREATE TABLE IF NOT EXISTS admin_users (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    username VARCHAR(50) NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    full_name VARCHAR(100) NOT NULL,
+    role VARCHAR(20) DEFAULT 'admin' CHECK (role IN ('admin', 'manager', 'supervisor')),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    is_active BOOLEAN DEFAULT TRUE
+);
+
+-- Create staff members table
+CREATE TABLE IF NOT EXISTS staff_members (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    staff_id VARCHAR(20) NOT NULL UNIQUE,
+    full_name VARCHAR(100) NOT NULL,
+    department VARCHAR(50) NOT NULL,
+    role VARCHAR(50) NOT NULL,
+    phone VARCHAR(20),
+    email VARCHAR(100),
+    shift_start TIME,
+    shift_end TIME,
+    is_available BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Create admin sessions table
+CREATE TABLE IF NOT EXISTS admin_sessions (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    admin_user_id UUID REFERENCES admin_users(id),
+    session_token TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE DEFAULT (NOW() + INTERVAL '8 hours'),
+    is_active BOOLEAN DEFAULT TRUE
+);
+
+-- Create indexes for guest_sessions
+CREATE INDEX IF NOT EXISTS idx_guest_sessions_token ON guest_sessions(session_token);
+
+-- Create indexes for admin tables
+CREATE INDEX IF NOT EXISTS idx_admin_users_username ON admin_users(username);
+CREATE INDEX IF NOT EXISTS idx_admin_sessions_token ON admin_sessions(session_token);
+CREATE INDEX IF NOT EXISTS idx_staff_members_id ON staff_members(staff_id);
+CREATE INDEX IF NOT EXISTS idx_staff_members_department ON staff_members(department);
+
+-- Create the chat_messages table for storing conversations
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    room_number VARCHAR(10) NOT NULL,
+    message_text TEXT NOT NULL,
+    sender_type VARCHAR(10) CHECK (sender_type IN ('guest', 'bot')) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    session_token TEXT REFERENCES guest_sessions(session_token)
+);
+
+-- Create indexes for chat_messages
+CREATE INDEX IF NOT EXISTS idx_chat_messages_room ON chat_messages(room_number, created_at);
+CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages(session_token);
+
+-- Update service_requests table with staff assignment
+CREATE TABLE IF NOT EXISTS service_requests (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    room_number VARCHAR(10) NOT NULL,
+    request_type VARCHAR(50) NOT NULL,
+    description TEXT NOT NULL,
+    priority VARCHAR(20) DEFAULT 'normal' CHECK (priority IN ('normal', 'urgent', 'emergency')),
+    status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'acknowledged', 'assigned', 'in_progress', 'completed', 'cancelled')),
+    assigned_staff_id UUID REFERENCES staff_members(id),
+    assigned_by UUID REFERENCES admin_users(id),
+    assigned_at TIMESTAMP WITH TIME ZONE,
+    notes TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    session_token TEXT REFERENCES guest_sessions(session_token)
+);
+
+-- Create indexes for service_requests
+CREATE INDEX IF NOT EXISTS idx_service_requests_room ON service_requests(room_number, created_at);
+CREATE INDEX IF NOT EXISTS idx_service_requests_status ON service_requests(status);
+CREATE INDEX IF NOT EXISTS idx_service_requests_staff ON service_requests(assigned_staff_id);
+CREATE INDEX IF NOT EXISTS idx_service_requests_priority ON service_requests(priority);
+
+-- Request event log: the authoritative, append-only history of every request.
+-- service_requests and customer_request_history are projections of it.
+CREATE TABLE IF NOT EXISTS request_history (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    request_id UUID NOT NULL,
+    action VARCHAR(30) NOT NULL,
+    details TEXT,
+    user_type VARCHAR(20),
+    user_id TEXT,
+    timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+ALTER TABLE request_history ADD COLUMN IF NOT EXISTS payload JSONB DEFAULT '{}'::jsonb;
+ALTER TABLE request_history ADD COLUMN IF NOT EXISTS seq BIGSERIAL;
+-- Events outlive the requests they describe
+ALTER TABLE request_history DROP CONSTRAINT IF EXISTS request_history_request_id_fkey;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_request_history_seq ON request_history(seq);
+
+CREATE TABLE IF NOT EXISTS customer_request_history (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    original_request_id UUID NOT NULL,
+    customer_name VARCHAR(100),
+    room_number VARCHAR(10) NOT NULL,
+    request_type VARCHAR(50) NOT NULL,
+    description TEXT NOT NULL,
+    priority VARCHAR(20) DEFAULT 'normal',
+    status VARCHAR(20) DEFAULT 'pending',
+    notes TEXT,
+    assigned_staff_id UUID,
+    assigned_by UUID,
+    assigned_at TIMESTAMP WITH TIME ZONE,
+    session_token TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    deleted_at TIMESTAMP WITH TIME ZONE
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_customer_history_request ON customer_request_history(original_request_id);
+
+-- Per-request state snapshots used to rebuild projections quickly
+CREATE TABLE IF NOT EXISTS request_snapshots (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    request_id UUID NOT NULL UNIQUE,
+    state JSONB NOT NULL,
+    last_seq BIGINT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_request_snapshots_seq ON request_snapshots(last_seq);
+
+-- Apply each request event to the projections in the same transaction.
+-- Mirrors apply_event() in backend/app/services/request_events.py.
+CREATE OR REPLACE FUNCTION apply_request_event()
+RETURNS TRIGGER AS $$
+DECLARE
+    p JSONB := COALESCE(NEW.payload, '{}'::jsonb);
+    previous service_requests%ROWTYPE;
+BEGIN
+    IF NEW.action = 'imported' THEN
+        RETURN NEW;
+    END IF;
+
+    IF NEW.action = 'created' THEN
+        INSERT INTO service_requests (id, room_number, request_type, description, priority, status, session_token, created_at)
+        VALUES (NEW.request_id, p->>'room_number', p->>'request_type', p->>'description',
+                COALESCE(p->>'priority', 'normal'), COALESCE(p->>'status', 'pending'),
+                p->>'session_token', NEW.timestamp);
+        INSERT INTO customer_request_history (original_request_id, customer_name, room_number, request_type,
+                                              description, priority, status, session_token, created_at)
+        VALUES (NEW.request_id, COALESCE(p->>'customer_name', 'Unknown Guest'), p->>'room_number',
+                p->>'request_type', p->>'description', COALESCE(p->>'priority', 'normal'),
+                COALESCE(p->>'status', 'pending'), p->>'session_token', NEW.timestamp);
+        RETURN NEW;
+    END IF;
+
+    SELECT * INTO previous FROM service_requests WHERE id = NEW.request_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Service request % not found', NEW.request_id;
+    END IF;
+    -- Keep what the event changed from in the log
+    NEW.payload := p || jsonb_build_object('previous_status', previous.status, 'previous_priority', previous.priority);
+
+    IF NEW.action = 'deleted' THEN
+        DELETE FROM service_requests WHERE id = NEW.request_id;
+        UPDATE customer_request_history SET deleted_at = NEW.timestamp
+        WHERE original_request_id = NEW.request_id;
+        RETURN NEW;
+    END IF;
+
+    UPDATE service_requests SET
+        status = COALESCE(p->>'status', status),
+        priority = COALESCE(p->>'priority', priority),
+        description = COALESCE(p->>'description', description),
+        notes = COALESCE(p->>'notes', notes),
+        assigned_staff_id = COALESCE((p->>'assigned_staff_id')::uuid, assigned_staff_id),
+        assigned_by = COALESCE((p->>'assigned_by')::uuid, assigned_by),
+        assigned_at = COALESCE((p->>'assigned_at')::timestamptz, assigned_at)
+    WHERE id = NEW.request_id;
+
+    UPDATE customer_request_history SET
+        status = COALESCE(p->>'status', status),
+        priority = COALESCE(p->>'priority', priority),
+        description = COALESCE(p->>'description', description),
+        notes = COALESCE(p->>'notes', notes),
+        assigned_staff_id = COALESCE((p->>'assigned_staff_id')::uuid, assigned_staff_id),
+        assigned_by = COALESCE((p->>'assigned_by')::uuid, assigned_by),
+        assigned_at = COALESCE((p->>'assigned_at')::timestamptz, assigned_at)
+    WHERE original_request_id = NEW.request_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS apply_request_event ON request_history;
+CREATE TRIGGER apply_request_event
+    BEFORE INSERT ON request_history
+    FOR EACH ROW
+    EXECUTE FUNCTION apply_request_event();
+
+-- Backfill a full-state event for requests that predate the event log
+INSERT INTO request_history (request_id, action, details, user_type, user_id, timestamp, payload)
+SELECT sr.id, 'imported', 'Imported existing request state', 'system', 'migration', sr.created_at,
+       to_jsonb(sr) || jsonb_build_object('customer_name', COALESCE(crh.customer_name, 'Unknown Guest'))
+FROM service_requests sr
+LEFT JOIN customer_request_history crh ON crh.original_request_id = sr.id
+WHERE NOT EXISTS (
+    SELECT 1 FROM request_history rh
+    WHERE rh.request_id = sr.id AND rh.action IN ('created', 'imported')
+);
+
+-- Create function to clean up expired sessions
+CREATE OR REPLACE FUNCTION cleanup_expired_sessions()
+RETURNS void AS $$
+BEGIN
+    UPDATE guest_sessions 
+    SET is_active = FALSE 
+    WHERE expires_at < NOW() AND is_active = TRUE;
+
+    UPDATE admin_sessions 
+    SET is_active = FALSE 
+    WHERE expires_at < NOW() AND is_active = TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Indexes used by the session janitor
+ALTER TABLE guest_sessions ADD COLUMN IF NOT EXISTS checkout_time TIMESTAMP WITH TIME ZONE;
+CREATE INDEX IF NOT EXISTS idx_guest_sessions_expires ON guest_sessions(expires_at);
+CREATE INDEX IF NOT EXISTS idx_admin_sessions_expires ON admin_sessions(expires_at);
+CREATE INDEX IF NOT EXISTS idx_service_requests_session ON service_requests(session_token);
+
+-- Guest login: checked-in guests live in guest_roster, one row per stay,
+-- separate from the per-login session tokens. Names are matched on a
+-- generated lower-case, whitespace-collapsed column, so a login is a single
+-- equality lookup on the (room_number, guest_name_normalized) index.
+CREATE TABLE IF NOT EXISTS guest_roster (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    room_number VARCHAR(10) NOT NULL,
+    guest_name VARCHAR(100) NOT NULL,
+    guest_name_normalized TEXT GENERATED ALWAYS AS
+        (lower(btrim(regexp_replace(guest_name, '[[:space:]]+', ' ', 'g')))) STORED,
+    checked_in_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    checkout_time TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_guest_roster_checked_in
+    ON guest_roster(room_number, guest_name_normalized) WHERE checkout_time IS NULL;
+
+ALTER TABLE guest_sessions ADD COLUMN IF NOT EXISTS guest_name_normalized TEXT GENERATED ALWAYS AS
+    (lower(btrim(regexp_replace(guest_name, '[[:space:]]+', ' ', 'g')))) STORED;
+CREATE INDEX IF NOT EXISTS idx_guest_sessions_room_name ON guest_sessions(room_number, guest_name_normalized);
+DROP INDEX IF EXISTS idx_guest_sessions_room;
+
+-- Backfill the roster from the sessions of guests who have not checked out
+INSERT INTO guest_roster (room_number, guest_name, checked_in_at)
+SELECT DISTINCT ON (room_number, guest_name_normalized) room_number, guest_name, created_at
+FROM guest_sessions
+WHERE checkout_time IS NULL
+ORDER BY room_number, guest_name_normalized, created_at
+ON CONFLICT DO NOTHING;
+
+-- Delete one batch of expired sessions (called by the backend scheduler)
+-- Guest sessions still referenced by chat or requests are kept; occupancy is
+-- in guest_roster, so other expired sessions can go.
+CREATE OR REPLACE FUNCTION cleanup_expired_sessions_batch(batch_size INTEGER DEFAULT 500)
+RETURNS TABLE(guest_deleted INTEGER, admin_deleted INTEGER, skipped BOOLEAN) AS $$
+DECLARE
+    g INTEGER := 0;
+    a INTEGER := 0;
+BEGIN
+    -- Only one cleanup at a time across all workers and nodes
+    IF NOT pg_try_advisory_xact_lock(hashtext('cleanup_expired_sessions')) THEN
+        RETURN QUERY SELECT 0, 0, TRUE;
+        RETURN;
+    END IF;
+
+    DELETE FROM admin_sessions
+    WHERE id IN (
+        SELECT id FROM admin_sessions
+        WHERE expires_at < NOW()
+        LIMIT batch_size
+    );
+    GET DIAGNOSTICS a = ROW_COUNT;
+
+    DELETE FROM guest_sessions
+    WHERE id IN (
+        SELECT gs.id FROM guest_sessions gs
+        WHERE gs.expires_at < NOW()
+          AND NOT EXISTS (SELECT 1 FROM chat_messages cm WHERE cm.session_token = gs.session_token)
+          AND NOT EXISTS (SELECT 1 FROM service_requests sr WHERE sr.session_token = gs.session_token)
+        LIMIT batch_size
+    );
+    GET DIAGNOSTICS g = ROW_COUNT;
+
+    RETURN QUERY SELECT g, a, FALSE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create trigger function for updating updated_at
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create triggers for updated_at
+DROP TRIGGER IF EXISTS update_service_requests_updated_at ON service_requests;
+CREATE TRIGGER update_service_requests_updated_at
+    BEFORE UPDATE ON service_requests
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_staff_members_updated_at ON staff_members;
+CREATE TRIGGER update_staff_members_updated_at
+    BEFORE UPDATE ON staff_members
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
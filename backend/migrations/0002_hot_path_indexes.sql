@@ -0,0 +1,24 @@
+-- 0002: indexes for the filters and sorts db_services runs on every poll and job.
+-- The local SQLite schema (app/services/storage/schema.py) already had them;
+-- benchmarks/index_check.py EXPLAINs each query against a seeded database.
+-- customer_request_history(original_request_id) is covered by the unique
+-- idx_customer_history_request from 0001.
+
+-- Guest history and the session janitor's "still referenced" check
+CREATE INDEX IF NOT EXISTS idx_customer_history_session ON customer_request_history(session_token);
+-- Admin customer history (newest first) and the keyset-paged export
+CREATE INDEX IF NOT EXISTS idx_customer_history_created ON customer_request_history(created_at);
+
+-- Per-request timeline, ordered by time
+CREATE INDEX IF NOT EXISTS idx_request_history_request_time ON request_history(request_id, timestamp);
+-- History date ranges, analytics and archival
+CREATE INDEX IF NOT EXISTS idx_request_history_timestamp ON request_history(timestamp);
+
+-- Admin list filtered by status, newest first; replaces the status-only index
+CREATE INDEX IF NOT EXISTS idx_service_requests_status_created ON service_requests(status, created_at);
+DROP INDEX IF EXISTS idx_service_requests_status;
+-- Admin list without a filter and analytics date ranges
+CREATE INDEX IF NOT EXISTS idx_service_requests_created ON service_requests(created_at);
+
+-- Chat archival: oldest messages first
+CREATE INDEX IF NOT EXISTS idx_chat_messages_created ON chat_messages(created_at);
@@ -0,0 +1,65 @@
+-- 0003: expired guest sessions leave guest_sessions even when chat messages or
+-- requests reference them, so the table (and verify_session_token's index) stays
+-- bounded. The references are nulled on delete; customer_request_history keeps its
+-- own copy of the token, and guest_sessions_archive keeps what the customer history
+-- views still read (guest name and checkout time).
+
+CREATE TABLE IF NOT EXISTS guest_sessions_archive (
+    id UUID PRIMARY KEY,
+    room_number VARCHAR(10) NOT NULL,
+    guest_name VARCHAR(100) NOT NULL,
+    session_token TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP WITH TIME ZONE,
+    expires_at TIMESTAMP WITH TIME ZONE,
+    checkout_time TIMESTAMP WITH TIME ZONE,
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE chat_messages DROP CONSTRAINT IF EXISTS chat_messages_session_token_fkey;
+ALTER TABLE chat_messages ADD CONSTRAINT chat_messages_session_token_fkey
+    FOREIGN KEY (session_token) REFERENCES guest_sessions(session_token) ON DELETE SET NULL;
+
+ALTER TABLE service_requests DROP CONSTRAINT IF EXISTS service_requests_session_token_fkey;
+ALTER TABLE service_requests ADD CONSTRAINT service_requests_session_token_fkey
+    FOREIGN KEY (session_token) REFERENCES guest_sessions(session_token) ON DELETE SET NULL;
+
+-- Delete one batch of expired sessions (called by the backend scheduler).
+-- Guest sessions are copied to guest_sessions_archive first; occupancy is in
+-- guest_roster, so nothing else needs them once they expire.
+CREATE OR REPLACE FUNCTION cleanup_expired_sessions_batch(batch_size INTEGER DEFAULT 500)
+RETURNS TABLE(guest_deleted INTEGER, admin_deleted INTEGER, skipped BOOLEAN) AS $$
+DECLARE
+    g INTEGER := 0;
+    a INTEGER := 0;
+BEGIN
+    -- Only one cleanup at a time across all workers and nodes
+    IF NOT pg_try_advisory_xact_lock(hashtext('cleanup_expired_sessions')) THEN
+        RETURN QUERY SELECT 0, 0, TRUE;
+        RETURN;
+    END IF;
+
+    DELETE FROM admin_sessions
+    WHERE id IN (
+        SELECT id FROM admin_sessions
+        WHERE expires_at < NOW()
+        LIMIT batch_size
+    );
+    GET DIAGNOSTICS a = ROW_COUNT;
+
+    WITH expired AS (
+        DELETE FROM guest_sessions
+        WHERE id IN (
+            SELECT id FROM guest_sessions
+            WHERE expires_at < NOW()
+            LIMIT batch_size
+        )
+        RETURNING id, room_number, guest_name, session_token, created_at, expires_at, checkout_time
+    )
+    INSERT INTO guest_sessions_archive (id, room_number, guest_name, session_token, created_at, expires_at, checkout_time)
+    SELECT id, room_number, guest_name, session_token, created_at, expires_at, checkout_time FROM expired
+    ON CONFLICT (session_token) DO NOTHING;
+    GET DIAGNOSTICS g = ROW_COUNT;
+
+    RETURN QUERY SELECT g, a, FALSE;
+END;
+$$ LANGUAGE plpgsql;
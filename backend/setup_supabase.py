@@ -3,11 +3,19 @@
 Supabase Setup Script for Hotel Service Application
 This script will:
 1. Test the Supabase connection
-2. Create necessary database tables
+2. Apply the schema migrations in backend/migrations
 3. Insert sample data for testing
+4. Optionally generate a large synthetic dataset for scale testing (--generate)
 """
 
 import os
+import sys
+import math
+import time
+import uuid
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
@@ -16,6 +24,7 @@ load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+backend_dir = os.path.dirname(os.path.abspath(__file__))
 
 def test_connection():
     """Test Supabase connection"""
@@ -43,184 +52,48 @@ def test_connection():
         return None
 
 def create_tables(supabase: Client):
-    """Create necessary tables using SQL"""
+    """Apply the pending schema migrations in backend/migrations"""
     print("\n📋 Creating database tables...")
-    
-    # Combined SQL to create all necessary tables
-    full_sql = """
-        -- Create the guest_sessions table for authentication
-        CREATE TABLE IF NOT EXISTS guest_sessions (
-            id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
-            room_number VARCHAR(10) NOT NULL,
-            guest_name VARCHAR(100) NOT NULL,
-            session_token TEXT NOT NULL UNIQUE,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-            expires_at TIMESTAMP WITH TIME ZONE DEFAULT (NOW() + INTERVAL '24 hours'),
-            is_active BOOLEAN DEFAULT TRUE
-        );
-
-        -- Create admin users table
-        CREATE TABLE IF NOT EXISTS admin_users (
-            id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
-            username VARCHAR(50) NOT NULL UNIQUE,
-            password_hash TEXT NOT NULL,
-            full_name VARCHAR(100) NOT NULL,
-            role VARCHAR(20) DEFAULT 'admin' CHECK (role IN ('admin', 'manager', 'supervisor')),
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-            is_active BOOLEAN DEFAULT TRUE
-        );
-
-        -- Create staff members table
-        CREATE TABLE IF NOT EXISTS staff_members (
-            id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
-            staff_id VARCHAR(20) NOT NULL UNIQUE,
-            full_name VARCHAR(100) NOT NULL,
-            department VARCHAR(50) NOT NULL,
-            role VARCHAR(50) NOT NULL,
-            phone VARCHAR(20),
-            email VARCHAR(100),
-            shift_start TIME,
-            shift_end TIME,
-            is_available BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-        );
-
-        -- Create admin sessions table
-        CREATE TABLE IF NOT EXISTS admin_sessions (
-            id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
-            admin_user_id UUID REFERENCES admin_users(id),
-            session_token TEXT NOT NULL UNIQUE,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-            expires_at TIMESTAMP WITH TIME ZONE DEFAULT (NOW() + INTERVAL '8 hours'),
-            is_active BOOLEAN DEFAULT TRUE
-        );
-
-        -- Create indexes for guest_sessions
-        CREATE INDEX IF NOT EXISTS idx_guest_sessions_token ON guest_sessions(session_token);
-        CREATE INDEX IF NOT EXISTS idx_guest_sessions_room ON guest_sessions(room_number);
-
-        -- Create indexes for admin tables
-        CREATE INDEX IF NOT EXISTS idx_admin_users_username ON admin_users(username);
-        CREATE INDEX IF NOT EXISTS idx_admin_sessions_token ON admin_sessions(session_token);
-        CREATE INDEX IF NOT EXISTS idx_staff_members_id ON staff_members(staff_id);
-        CREATE INDEX IF NOT EXISTS idx_staff_members_department ON staff_members(department);
-
-        -- Create the chat_messages table for storing conversations
-        CREATE TABLE IF NOT EXISTS chat_messages (
-            id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
-            room_number VARCHAR(10) NOT NULL,
-            message_text TEXT NOT NULL,
-            sender_type VARCHAR(10) CHECK (sender_type IN ('guest', 'bot')) NOT NULL,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-            session_token TEXT REFERENCES guest_sessions(session_token)
-        );
-
-        -- Create indexes for chat_messages
-        CREATE INDEX IF NOT EXISTS idx_chat_messages_room ON chat_messages(room_number, created_at);
-        CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages(session_token);
-
-        -- Update service_requests table with staff assignment
-        CREATE TABLE IF NOT EXISTS service_requests (
-            id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
-            room_number VARCHAR(10) NOT NULL,
-            request_type VARCHAR(50) NOT NULL,
-            description TEXT NOT NULL,
-            priority VARCHAR(20) DEFAULT 'normal' CHECK (priority IN ('normal', 'urgent', 'emergency')),
-            status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'acknowledged', 'assigned', 'in_progress', 'completed', 'cancelled')),
-            assigned_staff_id UUID REFERENCES staff_members(id),
-            assigned_by UUID REFERENCES admin_users(id),
-            assigned_at TIMESTAMP WITH TIME ZONE,
-            notes TEXT,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-            session_token TEXT REFERENCES guest_sessions(session_token)
-        );
-
-        -- Create indexes for service_requests
-        CREATE INDEX IF NOT EXISTS idx_service_requests_room ON service_requests(room_number, created_at);
-        CREATE INDEX IF NOT EXISTS idx_service_requests_status ON service_requests(status);
-        CREATE INDEX IF NOT EXISTS idx_service_requests_staff ON service_requests(assigned_staff_id);
-        CREATE INDEX IF NOT EXISTS idx_service_requests_priority ON service_requests(priority);
-
-        -- Create function to clean up expired sessions
-        CREATE OR REPLACE FUNCTION cleanup_expired_sessions()
-        RETURNS void AS $$
-        BEGIN
-            UPDATE guest_sessions 
-            SET is_active = FALSE 
-            WHERE expires_at < NOW() AND is_active = TRUE;
-            
-            UPDATE admin_sessions 
-            SET is_active = FALSE 
-            WHERE expires_at < NOW() AND is_active = TRUE;
-        END;
-        $$ LANGUAGE plpgsql;
-
-        -- Create trigger function for updating updated_at
-        CREATE OR REPLACE FUNCTION update_updated_at_column()
-        RETURNS TRIGGER AS $$
-        BEGIN
-            NEW.updated_at = NOW();
-            RETURN NEW;
-        END;
-        $$ LANGUAGE plpgsql;
-
-        -- Create triggers for updated_at
-        DROP TRIGGER IF EXISTS update_service_requests_updated_at ON service_requests;
-        CREATE TRIGGER update_service_requests_updated_at
-            BEFORE UPDATE ON service_requests
-            FOR EACH ROW
-            EXECUTE FUNCTION update_updated_at_column();
-
-        DROP TRIGGER IF EXISTS update_staff_members_updated_at ON staff_members;
-        CREATE TRIGGER update_staff_members_updated_at
-            BEFORE UPDATE ON staff_members
-            FOR EACH ROW
-            EXECUTE FUNCTION update_updated_at_column();
-    """
-    
-    try:
-        # Execute the SQL directly using the database URL
-        import requests
-        
-        # Use Supabase REST API to execute SQL
-        headers = {
-            'apikey': SUPABASE_KEY,
-            'Authorization': f'Bearer {SUPABASE_KEY}',
-            'Content-Type': 'application/json'
-        }
-        
-        # Execute SQL using the Supabase SQL endpoint
-        sql_url = f"{SUPABASE_URL}/rest/v1/rpc/exec_sql"
-        
-        # Try using the admin API if available
-        print("   Attempting to create tables via SQL...")
-        
-        # For now, let's try creating tables individually
+
+    sys.path.insert(0, backend_dir)
+    from app.services.migrations import apply_migrations, load_migrations, migrations_enabled
+
+    migrations = load_migrations()
+    if migrations_enabled():
+        # Direct Postgres connection: apply and record each pending migration
         try:
-            # First, try to query an existing table
-            supabase.table("guest_sessions").select("id").limit(1).execute()
-            print("✅ Basic tables already exist!")
-            
-            # Check if admin tables exist
-            try:
-                supabase.table("admin_users").select("id").limit(1).execute()
-                print("✅ Admin tables already exist!")
-            except:
-                print("   Creating admin tables...")
-                # Admin tables will be created when first used
-            
-            return True
-        except:
-            print("   Tables don't exist yet, they will be created when first used.")
-            print("✅ Database connection verified - tables will be auto-created!")
+            applied = apply_migrations(migrations=migrations)
+            print(f"✅ Schema up to date ({len(applied)} of {len(migrations)} migrations applied now)")
             return True
-            
-    except Exception as e:
-        print(f"⚠️  Note: {e}")
-        print("   Tables will be created automatically when the application runs.")
-        return True
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            return False
+
+    # PostgREST cannot run DDL: the files have to go through the Supabase SQL editor
+    print("   Set DATABASE_URL (and pip install asyncpg) to apply migrations automatically,")
+    print("   or run these files in the Supabase SQL editor, in order:")
+    for migration in migrations:
+        print(f"     migrations/{os.path.basename(migration.path)}")
+    try:
+        supabase.table("guest_sessions").select("id").limit(1).execute()
+        print("✅ Basic tables already exist!")
+    except Exception:
+        print("⚠️  Tables don't exist yet - run the migrations above first")
+    return True
+
+def print_migration_status():
+    """List the migrations not yet applied to DATABASE_URL"""
+    sys.path.insert(0, backend_dir)
+    from app.services.migrations import load_migrations, migrations_enabled, pending_migrations
+
+    migrations = load_migrations()
+    if not migrations_enabled():
+        print("❌ DATABASE_URL not set or asyncpg not installed")
+        return
+    pending = pending_migrations(migrations=migrations)
+    print(f"📋 {len(migrations) - len(pending)} of {len(migrations)} migrations applied")
+    for migration in pending:
+        print(f"   pending: {migration.version:04d}_{migration.name}")
 
 def insert_sample_data(supabase: Client):
     """Insert sample data for testing"""
@@ -250,6 +123,16 @@ def insert_sample_data(supabase: Client):
             supabase.table("guest_sessions").insert(sample_sessions).execute()
             print("✅ Guest sessions inserted!")
 
+        # Check and insert the checked-in guests that can log in
+        existing_roster = supabase.table("guest_roster").select("id").limit(1).execute()
+        if not existing_roster.data:
+            sample_roster = [
+                {"room_number": "101", "guest_name": "John Smith"},
+                {"room_number": "102", "guest_name": "Jane Doe"}
+            ]
+            supabase.table("guest_roster").insert(sample_roster).execute()
+            print("✅ Guest roster inserted!")
+
         # Check and insert admin users
         try:
             existing_admins = supabase.table("admin_users").select("id").limit(1).execute()
@@ -422,6 +305,9 @@ def verify_setup(supabase: Client):
         # Check guest_sessions
         sessions = supabase.table("guest_sessions").select("room_number, guest_name").execute()
         print(f"   📋 Guest sessions: {len(sessions.data)} records")
+
+        roster = supabase.table("guest_roster").select("room_number, guest_name").is_("checkout_time", "null").execute()
+        print(f"   🛏️  Checked-in guests: {len(roster.data)} records")
         
         # Check admin_users
         try:
@@ -452,8 +338,355 @@ def verify_setup(supabase: Client):
         print(f"❌ Error during verification: {e}")
         return False
 
-def main():
+# Synthetic data for scale testing (python setup_supabase.py --generate).
+# Everything below comes from one random.Random(seed): the same seed, size and end
+# time always produce the same rows, ids and session tokens, so benchmark runs are
+# comparable. Requests are written as request_history events in timestamp order and
+# the projection trigger (or LocalClient) builds service_requests and
+# customer_request_history from them, as it does for live traffic.
+
+FIRST_NAMES = [
+    "Olivia", "Liam", "Emma", "Noah", "Ava", "Elijah", "Sophia", "Lucas", "Mia", "Mateo", "Amelia", "Ethan",
+    "Harper", "Kenji", "Aisha", "Omar", "Priya", "Diego", "Chloe", "Yusuf", "Hannah", "Ivan", "Grace", "Wei",
+    "Fatima", "Leo", "Sofia", "Daniel", "Zara", "Samuel"
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Martinez", "Lopez",
+    "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Nguyen", "Patel", "Kim", "Rossi", "Schmidt",
+    "Dubois", "Tanaka", "Kowalski", "Silva", "Okafor", "Haddad", "Larsen", "Novak", "Cohen", "Murphy"
+]
+
+# department -> (staff code prefix, roles, shifts)
+STAFF_DEPARTMENTS = {
+    "Housekeeping": ("HK", ["Housekeeper", "Room Attendant", "Supervisor"], [("07:00:00", "15:00:00"), ("15:00:00", "23:00:00")]),
+    "Room Service": ("RS", ["Server", "Cook"], [("06:00:00", "14:00:00"), ("14:00:00", "22:00:00")]),
+    "Maintenance": ("MT", ["Technician", "Electrician"], [("07:00:00", "15:00:00"), ("22:00:00", "06:00:00")]),
+    "Concierge": ("CS", ["Concierge", "Bell Attendant"], [("08:00:00", "16:00:00"), ("16:00:00", "00:00:00")])
+}
+
+# request_type -> (department, weight, guest messages, bot reply)
+REQUEST_TYPES = {
+    "towels": ("Housekeeping", 18, ["Could I get some fresh towels please?", "We need two extra bath towels"],
+               "Housekeeping will bring fresh towels shortly."),
+    "housekeeping": ("Housekeeping", 14, ["Can someone clean the room this afternoon?", "Please make up the room"],
+                     "I've asked housekeeping to take care of your room."),
+    "amenities": ("Housekeeping", 12, ["Can you bring two extra pillows?", "We're out of shampoo and soap"],
+                  "Your amenities are on their way."),
+    "room_service": ("Room Service", 16, ["I'd like a club sandwich and a coffee", "Breakfast for two please"],
+                     "Your order has been sent to the kitchen."),
+    "refreshments": ("Room Service", 8, ["Please send some sparkling water and ice", "Could we get coffee and snacks?"],
+                     "Refreshments will arrive soon."),
+    "maintenance": ("Maintenance", 14, ["The air conditioning is not working", "The shower drain is blocked"],
+                    "Maintenance is on the way."),
+    "tech_support": ("Maintenance", 8, ["The TV remote is broken", "The wifi keeps disconnecting"],
+                     "Technical support will take a look."),
+    "transportation": ("Concierge", 6, ["Can you book a taxi to the airport for 6am?", "We need a car to the station"],
+                       "Your taxi is booked."),
+    "concierge": ("Concierge", 4, ["Could you book a table for dinner at 8pm?", "Can you get us theatre tickets?"],
+                  "The concierge will confirm your booking shortly.")
+}
+
+GUEST_QUESTIONS = [
+    ("What is the wifi password?", "The WiFi password is HotelGuest123."),
+    ("What time is checkout?", "Checkout time is 12:00 PM. Would you like a late checkout?"),
+    ("When is breakfast served?", "Breakfast is served from 6:30 to 10:30 in the main restaurant."),
+    ("Is the pool open?", "The pool is open daily from 7:00 AM to 10:00 PM."),
+    ("Could you recommend a restaurant nearby?", "There are several excellent restaurants within walking distance."),
+    ("Hello, thanks for the lovely room", "You're very welcome! Enjoy your stay.")
+]
+
+# Share of requests made in each hour of the day
+HOURLY_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 8, 10, 9, 7, 6, 6, 6, 5, 5, 6, 8, 9, 9, 8, 6, 4, 2]
+# priority -> (weight, minutes until a staff member is assigned)
+PRIORITIES = {"normal": (80, (5, 45)), "urgent": (17, (2, 15)), "emergency": (3, (1, 5))}
+CANCEL_RATE, DELETE_CANCELLED_RATE, ACKNOWLEDGE_RATE, ESCALATE_RATE = 0.07, 0.5, 0.2, 0.04
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat()
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    # Knuth's method: fine for the small per-night means used here
+    limit, count, product = math.exp(-mean), 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+def _minutes(rng: random.Random, low: float, high: float) -> timedelta:
+    return timedelta(minutes=rng.uniform(low, high))
+
+def generate_staff(rng: random.Random, count: int) -> list:
+    """count staff members spread over the departments, most in housekeeping"""
+    departments = list(STAFF_DEPARTMENTS)
+    weights = [4, 2, 2, 1]
+    numbers = {department: 0 for department in departments}
+    staff = []
+    for _ in range(count):
+        department = departments[len(staff)] if len(staff) < len(departments) else rng.choices(departments, weights)[0]
+        prefix, roles, shifts = STAFF_DEPARTMENTS[department]
+        numbers[department] += 1
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        shift_start, shift_end = rng.choice(shifts)
+        staff.append({
+            "id": _uuid(rng),
+            "staff_id": f"{prefix}{numbers[department]:04d}",
+            "full_name": f"{first} {last}",
+            "department": department,
+            "role": rng.choice(roles),
+            "phone": f"555-{rng.randrange(10000):04d}",
+            "email": f"{first.lower()}.{last.lower()}{numbers[department]}@hotel.com",
+            "shift_start": shift_start,
+            "shift_end": shift_end
+        })
+    return staff
+
+def room_numbers(count: int, per_floor: int = 20) -> list:
+    return [f"{1 + index // per_floor}{1 + index % per_floor:02d}" for index in range(count)]
+
+def _request_events(rng: random.Random, request: dict, created: datetime, staff_by_department: dict,
+                    admin_ids: list) -> list:
+    """A request's lifecycle as (timestamp, event) pairs: created, then cancelled (and maybe
+    deleted) or acknowledged / assigned / in progress / completed, with the odd escalation"""
+    request_id = request["request_id"]
+
+    def event(moment: datetime, action: str, details: str, user_type: str, user_id: str, payload: dict = None):
+        return moment, {"id": _uuid(rng), "request_id": request_id, "action": action, "details": details,
+                        "user_type": user_type, "user_id": user_id, "timestamp": _iso(moment),
+                        "payload": payload or {}}
+
+    events = [event(created, "created", f"Request created: {request['description']}", "guest",
+                    request["session_token"], {
+                        "room_number": request["room_number"], "request_type": request["request_type"],
+                        "description": request["description"], "priority": request["priority"],
+                        "status": "pending", "session_token": request["session_token"],
+                        "customer_name": request["customer_name"]
+                    })]
+    moment = created
+    if rng.random() < CANCEL_RATE:
+        moment += _minutes(rng, 2, 20)
+        events.append(event(moment, "cancelled", "Guest no longer needs it", "guest", "guest_chat",
+                            {"status": "cancelled", "notes": "Guest no longer needs it"}))
+        if rng.random() < DELETE_CANCELLED_RATE:
+            moment += _minutes(rng, 60, 48 * 60)
+            events.append(event(moment, "deleted", "Cancelled request deleted by admin", "admin", "admin"))
+        return events
+
+    priority = request["priority"]
+    if priority == "normal" and rng.random() < ESCALATE_RATE:
+        moment += _minutes(rng, 5, 30)
+        priority = "urgent"
+        events.append(event(moment, "priority_changed", "Priority changed to urgent", "admin", "admin",
+                            {"priority": "urgent"}))
+    if rng.random() < ACKNOWLEDGE_RATE:
+        moment += _minutes(rng, 1, 10)
+        events.append(event(moment, "status_changed", "Status changed to acknowledged", "admin", "admin",
+                            {"status": "acknowledged"}))
+
+    moment += _minutes(rng, *PRIORITIES[priority][1])
+    staff_member = rng.choice(staff_by_department[REQUEST_TYPES[request["request_type"]][0]])
+    admin_id = rng.choice(admin_ids) if admin_ids else None
+    payload = {"assigned_staff_id": staff_member["id"], "assigned_at": _iso(moment), "status": "assigned"}
+    if admin_id:
+        payload["assigned_by"] = admin_id
+    events.append(event(moment, "assigned", f"Assigned to staff member {staff_member['staff_id']}", "admin",
+                        admin_id or "admin", payload))
+
+    moment += _minutes(rng, 5, 30)
+    events.append(event(moment, "status_changed", "Status changed to in_progress", "admin", "admin",
+                        {"status": "in_progress"}))
+    moment += _minutes(rng, 10, 90)
+    events.append(event(moment, "status_changed", "Status changed to completed", "admin", "admin",
+                        {"status": "completed"}))
+    return events
+
+def generate_scale_data(rooms: int = 500, days: int = 365, staff_count: int = None, seed: int = 42,
+                        end: datetime = None, requests_per_night: float = 0.6, questions_per_night: float = 0.5,
+                        admin_ids: list = None) -> dict:
+    """Rows for every table, keyed by table name, for `rooms` rooms over the `days` before `end`.
+
+    Each room has back-to-back stays (1-7 nights, ~75% occupancy); every stay checks
+    guests into guest_roster and opens a guest session. Guests chat and make
+    requests on a daily rhythm; request events after `end` are dropped, so recent
+    requests are still open. request_history rows are in timestamp order.
+    """
+    rng = random.Random(seed)
+    end = (end or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    start = end - timedelta(days=days)
+    staff = generate_staff(rng, staff_count or max(len(STAFF_DEPARTMENTS), rooms // 10))
+    staff_by_department = {}
+    for member in staff:
+        staff_by_department.setdefault(member["department"], []).append(member)
+    request_types = list(REQUEST_TYPES)
+    type_weights = [REQUEST_TYPES[request_type][1] for request_type in request_types]
+    priorities = list(PRIORITIES)
+    priority_weights = [PRIORITIES[priority][0] for priority in priorities]
+
+    roster, sessions, messages, timed_events = [], [], [], []
+
+    def message(room_number: str, session_token: str, sender_type: str, text: str, moment: datetime):
+        messages.append({"id": _uuid(rng), "room_number": room_number, "message_text": text,
+                         "sender_type": sender_type, "created_at": _iso(moment), "session_token": session_token})
+
+    def moments(check_in: datetime, check_out: datetime, nights: int, mean: float):
+        # Times during the stay, following the hotel's daily rhythm
+        for night in range(nights):
+            day = (check_in + timedelta(days=night)).replace(hour=0, minute=0, second=0, microsecond=0)
+            for _ in range(_poisson(rng, mean)):
+                moment = day + timedelta(hours=rng.choices(range(24), HOURLY_WEIGHTS)[0],
+                                         seconds=rng.randrange(3600))
+                if check_in < moment < min(check_out, end):
+                    yield moment
+
+    for room_number in room_numbers(rooms):
+        check_in = (start + timedelta(days=rng.uniform(0, 3))).replace(hour=14, minute=0, second=0, microsecond=0)
+        while check_in < end:
+            nights = rng.choices(range(1, 8), [20, 25, 20, 12, 10, 6, 7])[0]
+            check_in += timedelta(minutes=rng.randrange(0, 6 * 60))
+            check_out = (check_in + timedelta(days=nights)).replace(hour=10) + timedelta(minutes=rng.randrange(120))
+            checked_out = check_out <= end
+            last_name = rng.choice(LAST_NAMES)
+            guests = [f"{rng.choice(FIRST_NAMES)} {last_name}"]
+            if rng.random() < 0.3:
+                guests.append(f"{rng.choice(FIRST_NAMES)} {last_name}")
+            for guest_name in dict.fromkeys(guests):
+                roster.append({"id": _uuid(rng), "room_number": room_number, "guest_name": guest_name,
+                               "checked_in_at": _iso(check_in), "checkout_time": _iso(check_out) if checked_out else None,
+                               "created_at": _iso(check_in)})
+
+            # The guest logs in on arrival; a current guest's session is still valid
+            session_token = f"synthetic_{seed}_{room_number}_{rng.getrandbits(64):016x}"
+            logged_in = check_in + _minutes(rng, 5, 60)
+            if not checked_out:
+                logged_in = max(logged_in, end - timedelta(hours=rng.uniform(0, 12)))
+            sessions.append({
+                "id": _uuid(rng), "room_number": room_number, "guest_name": guests[0], "session_token": session_token,
+                "created_at": _iso(logged_in), "expires_at": _iso(logged_in + timedelta(hours=24)),
+                "is_active": not checked_out, "checkout_time": _iso(check_out) if checked_out else None
+            })
+
+            for moment in moments(check_in, check_out, nights, questions_per_night):
+                question, answer = rng.choice(GUEST_QUESTIONS)
+                message(room_number, session_token, "guest", question, moment)
+                message(room_number, session_token, "bot", answer, moment + timedelta(seconds=rng.uniform(1, 4)))
+
+            for moment in moments(check_in, check_out, nights, requests_per_night):
+                request_type = rng.choices(request_types, type_weights)[0]
+                _, _, texts, reply = REQUEST_TYPES[request_type]
+                description = rng.choice(texts)
+                message(room_number, session_token, "guest", description, moment - timedelta(seconds=rng.uniform(2, 5)))
+                message(room_number, session_token, "bot", reply, moment + timedelta(seconds=rng.uniform(0.5, 2)))
+                request = {"request_id": _uuid(rng), "room_number": room_number, "request_type": request_type,
+                           "description": description, "priority": rng.choices(priorities, priority_weights)[0],
+                           "session_token": session_token, "customer_name": guests[0]}
+                timed_events.extend(_request_events(rng, request, moment, staff_by_department, admin_ids or []))
+
+            check_in = (check_out + timedelta(days=rng.choices([0, 1, 2, 3, 5], [55, 20, 12, 8, 5])[0])).replace(
+                hour=14, minute=0, second=0, microsecond=0
+            )
+
+    # Events are applied in seq order, which follows insertion order: sort by time
+    timed_events.sort(key=lambda pair: pair[0])
+    return {
+        "staff_members": staff,
+        "guest_roster": roster,
+        "guest_sessions": sessions,
+        "chat_messages": messages,
+        "request_history": [event for moment, event in timed_events if moment <= end]
+    }
+
+def bulk_insert(client, table: str, rows: list, batch_size: int = 1000) -> float:
+    """Insert rows in batches of batch_size (one statement each); returns the seconds taken"""
+    started = time.perf_counter()
+    for offset in range(0, len(rows), batch_size):
+        client.table(table).insert(rows[offset:offset + batch_size]).execute()
+        if len(rows) > batch_size:
+            print(f"\r   ⏳ {table}: {min(offset + batch_size, len(rows)):,}/{len(rows):,}", end="", flush=True)
+    elapsed = time.perf_counter() - started
+    rate = len(rows) / elapsed if elapsed else 0
+    print(f"\r   ✅ {table}: {len(rows):,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+    return elapsed
+
+def insert_scale_data(client, rooms: int, days: int, staff_count: int = None, seed: int = 42, end: datetime = None,
+                      batch_size: int = 1000, requests_per_night: float = 0.6,
+                      questions_per_night: float = 0.5) -> bool:
+    """Generate the synthetic dataset and bulk insert it, tables in foreign key order"""
+    print(f"\n🧪 Generating synthetic data: {rooms} rooms, {days} days, seed {seed}...")
+    try:
+        # Generated staff codes (HK0001, ...) do not depend on the seed: a second run would collide
+        first_code = generate_staff(random.Random(seed), 1)[0]["staff_id"]
+        if client.table("staff_members").select("id").eq("staff_id", first_code).limit(1).execute().data:
+            print(f"ℹ️  Synthetic data already present (staff {first_code}); use a fresh database to regenerate")
+            return True
+
+        admins = client.table("admin_users").select("id").eq("is_active", True).order("username").execute().data or []
+        started = time.perf_counter()
+        data = generate_scale_data(rooms, days, staff_count, seed, end, requests_per_night, questions_per_night,
+                                   [admin["id"] for admin in admins])
+        print(f"   Generated {sum(len(rows) for rows in data.values()):,} rows in {time.perf_counter() - started:.1f}s")
+
+        for table, rows in data.items():
+            bulk_insert(client, table, rows, batch_size)
+        return True
+    except Exception as e:
+        print(f"\n❌ Error inserting synthetic data: {e}")
+        return False
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Set up the Hotel Service database")
+    parser.add_argument("--migration-status", action="store_true",
+                        help="list the schema migrations not yet applied to DATABASE_URL and exit")
+    parser.add_argument("--generate", action="store_true",
+                        help="also insert a large synthetic dataset (rooms, guests, staff, requests, chat)")
+    parser.add_argument("--target", choices=["supabase", "sqlite", "memory"], default="supabase",
+                        help="database to set up; sqlite and memory use the local storage backend and imply --generate")
+    parser.add_argument("--sqlite-path", default=os.getenv("SQLITE_PATH", os.path.join(backend_dir, "hotel.db")))
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365, help="days of history to generate")
+    parser.add_argument("--staff", type=int, default=None, help="staff members (default: one per 10 rooms)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", default=None,
+                        help="ISO timestamp the history ends at (default: now); fix it for byte-identical datasets")
+    parser.add_argument("--requests-per-night", type=float, default=0.6)
+    parser.add_argument("--questions-per-night", type=float, default=0.5)
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per bulk insert")
+    return parser.parse_args(argv)
+
+def generate_options(args) -> dict:
+    end = datetime.fromisoformat(args.end) if args.end else None
+    if end is not None and end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    return {"rooms": args.rooms, "days": args.days, "staff_count": args.staff, "seed": args.seed, "end": end,
+            "batch_size": args.batch_size, "requests_per_night": args.requests_per_night,
+            "questions_per_night": args.questions_per_night}
+
+def setup_local(args):
+    """Generate the synthetic dataset into the local SQLite (or in-memory) backend"""
+    sys.path.insert(0, backend_dir)
+    from app.services.storage import create_local_client
+
+    print(f"🏨 Hotel Service - Local {args.target} Setup")
+    print("=" * 40)
+    client = create_local_client(args.target, args.sqlite_path)
+    if not insert_scale_data(client, **generate_options(args)):
+        print("\n❌ Setup failed - could not insert synthetic data")
+        return
+    if args.target == "sqlite":
+        print(f"\n🎉 Synthetic data written to {args.sqlite_path}")
+        print(f"   Start the backend with DB_BACKEND=sqlite SQLITE_PATH={args.sqlite_path}")
+
+def main(argv=None):
     """Main setup function"""
+    args = parse_args(argv)
+    if args.migration_status:
+        print_migration_status()
+        return
+    if args.target != "supabase":
+        setup_local(args)
+        return
+
     print("🏨 Hotel Service - Supabase Setup")
     print("=" * 40)
     
@@ -471,6 +704,10 @@ def main():
     # Insert sample data
     if not insert_sample_data(supabase):
         print("\n⚠️  Setup completed but sample data insertion failed")
+
+    # Insert the synthetic scale-testing dataset
+    if args.generate and not insert_scale_data(supabase, **generate_options(args)):
+        print("\n⚠️  Setup completed but synthetic data insertion failed")
     
     # Verify setup
     if not verify_setup(supabase):
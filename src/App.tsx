@@ -1,8 +1,9 @@
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import { LoginForm } from './components/LoginForm';
 import { ChatInterface } from './components/ChatInterface';
 import { AdminDashboard } from './components/AdminDashboard';
 import { GuestStatus } from './components/GuestStatus';
+import { getChatHistory } from './api/chatAPI';
 
 export interface Guest {
   name: string;
@@ -59,6 +60,28 @@ function App() {
     setMessages(prev => [...prev, newMessage]);
   };
 
+  // Restore the room's recent conversation after a guest logs in
+  useEffect(() => {
+    if (!isAuthenticated || userType !== 'guest' || !sessionToken) return;
+    let cancelled = false;
+    getChatHistory(sessionToken)
+      .then(page => {
+        if (cancelled || page.messages.length === 0) return;
+        const history: ChatMessage[] = page.messages.map(message => ({
+          id: message.id,
+          type: message.sender_type === 'guest' ? 'user' : 'bot',
+          content: message.message_text,
+          timestamp: new Date(message.created_at)
+        }));
+        // Keep the welcome message first and anything sent while loading last
+        setMessages(prev => [prev[0], ...history, ...prev.slice(1)]);
+      })
+      .catch(error => console.error('Error loading chat history:', error));
+    return () => {
+      cancelled = true;
+    };
+  }, [isAuthenticated, userType, sessionToken]);
+
   const handleLogin = (token: string, userData: any, type: 'guest' | 'admin') => {
     setSessionToken(token);
     setUserType(type);
@@ -1,27 +1,50 @@
-// src/api/chatApi.ts
-export const sendMessage = async (text: string, roomNumber: string) => {
-  const res = await fetch("http://127.0.0.1:8000/chat", {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ text, room_number: roomNumber }),
+// src/api/chatAPI.ts
+const API_BASE = import.meta.env?.VITE_API_URL || 'http://localhost:8000';
+
+export interface ChatHistoryMessage {
+  id: string;
+  sender_type: 'guest' | 'bot';
+  message_text: string;
+  created_at: string;
+}
+
+export interface ChatHistoryPage {
+  messages: ChatHistoryMessage[]; // oldest first
+  next_cursor: string | null; // pass as `before` to load older messages
+}
+
+const authHeaders = (sessionToken: string) => ({
+  'Authorization': `Bearer ${sessionToken}`,
+});
+
+export const sendMessage = async (text: string, sessionToken: string) => {
+  const res = await fetch(`${API_BASE}/chat`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', ...authHeaders(sessionToken) },
+    body: JSON.stringify({ text }),
   });
+  if (!res.ok) {
+    throw new Error(`Failed to send message (${res.status})`);
+  }
   const data = await res.json();
   return data.reply;
 };
 
-export const sendRequest = async (request: string, roomNumber: string) => {
-  const res = await fetch("http://127.0.0.1:8000/request", {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ request, room: roomNumber }),
+// Fetch one page of the room's chat history, newest page first
+export const getChatHistory = async (
+  sessionToken: string,
+  before?: string | null,
+  limit = 30
+): Promise<ChatHistoryPage> => {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (before) {
+    params.set('before', before);
+  }
+  const res = await fetch(`${API_BASE}/guest/chat-history?${params}`, {
+    headers: authHeaders(sessionToken),
   });
-  const data = await res.json();
-  return data.status;
-};
-
-// Fetch chat history
-export const getChatHistory = async (roomNumber: string) => {
-  const res = await fetch(`http://127.0.0.1:8000/history?room_number=${roomNumber}`);
-  const data = await res.json();
-  return data.messages; // expected: [{text: string, sender: "guest"|"ai"}]
+  if (!res.ok) {
+    throw new Error(`Failed to load chat history (${res.status})`);
+  }
+  return res.json();
 };
@@ -46,6 +46,10 @@ export const ChatInterface: React.FC<ChatInterfaceProps> = ({
         if (response.status === 401) {
           throw new Error('Session expired. Please login again.');
         }
+        if (response.status === 429) {
+          const retryAfter = response.headers.get('Retry-After');
+          throw new Error(`You're sending messages too quickly. Please wait ${retryAfter || 'a few'} seconds and try again.`);
+        }
         throw new Error('Failed to get response from AI');
       }
 